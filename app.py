@@ -10,27 +10,49 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Query, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 # Importar nuestros módulos
+from config import settings
 try:
     from database import job_db
 except ImportError:
     job_db = None
-from scrapers.seccion_amarilla_simple import GoogleMapsLeadScraper
+from scrapers.registry import source_registry
+from utils.health import HealthProber
+from utils.callbacks import CALLBACK_EVENTS, DEFAULT_CALLBACK_EVENTS, JobCallbacks, callback_dispatcher, check_callback_url
+from utils.http_client import fetcher
+from utils.job_control import JobControl, active_jobs
+from utils.job_stream import JobStream, job_streams, replay_events
+from utils.lead import as_dict
+from utils.proxy_pool import proxy_pool
+from utils.logging_config import JobLogSummary, setup_logging
+from utils.metrics import JOBS_QUEUED, JOBS_RUNNING, monitor_event_loop_lag, render_metrics
+from utils.profiling import JobProfiler, profile_span, to_collapsed
+from utils.compression import decompress, iter_decompress
+from utils.serialization import HAS_ORJSON, iter_object, loads
+from utils.website_enrichment import website_enricher
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging (JSON, escrito desde un hilo aparte vía cola)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Schemas
 class ScrapingRequest(BaseModel):
     sectors: List[str] = Field(..., description="Sectores a scrapear")
     locations: List[str] = Field(..., description="Ubicaciones a scrapear")
-    max_leads_per_sector: int = Field(default=10, description="Máximo leads por sector")
-    sources: List[str] = Field(default=["google_maps"], description="Fuentes de scraping")
+    max_leads_per_sector: int = Field(default=settings.default_max_leads, description="Máximo leads por sector")
+    sources: List[str] = Field(default_factory=lambda: list(settings.default_sources), description="Fuentes de scraping")
+    profile: bool = Field(default=False, description="Registrar perfil de CPU y spans del job")
+    enrich_websites: bool = Field(default=settings.enrichment_enabled, description="Buscar emails y redes en el sitio web de cada lead")
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, description="Tiempo máximo de ejecución del job (segundos de reloj); al vencer se guardan los resultados parciales")
+    max_requests: Optional[int] = Field(default=None, gt=0, description="Máximo de requests HTTP de scraping del job, reintentos incluidos")
+    max_leads: Optional[int] = Field(default=None, gt=0, description="Máximo de leads del job en total")
+    callback_url: Optional[str] = Field(default=None, description="URL a la que se envían (POST firmado) los eventos del job")
+    callback_events: List[str] = Field(default_factory=lambda: list(DEFAULT_CALLBACK_EVENTS), description="Eventos a notificar: progress, completed, cancelled, failed")
 
 class ScrapingResponse(BaseModel):
     job_id: str
@@ -45,22 +67,35 @@ class JobStatus(BaseModel):
     estimated_time: Optional[int] = None
     created_at: str
     updated_at: str
+    stop_reason: Optional[str] = None
 
 class ValidationError(BaseModel):
     detail: str
 
+# Probes de salud en background (nunca en el request de /health)
+health_prober = HealthProber(interval=settings.health_probe_interval, timeout=settings.health_probe_timeout)
+for source_name in source_registry.names():
+    health_prober.register(source_name, source_registry.create(source_name).test_connection)
+if job_db is not None:
+    health_prober.register("database", job_db.ping)
+
 # Lifecycle
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle de la aplicación"""
     logger.info("🚀 Starting Swip Lead Scraper API")
     
-    # Verificar scrapers disponibles
-    scrapers_status = await check_scrapers()
-    logger.info(f"📊 Scrapers status: {scrapers_status}")
+    # Verificar scrapers disponibles sin bloquear el arranque
+    health_prober.start()
+    
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    callback_dispatcher.start()
     
     yield
     
+    lag_monitor.cancel()
+    await callback_dispatcher.stop()
+    await health_prober.stop()
     logger.info("🛑 Shutting down Swip Lead Scraper API")
 
 # App
@@ -68,7 +103,8 @@ app = FastAPI(
     title="Swip Lead Scraper API",
     description="API para scraping y procesamiento de leads PyME",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse
 )
 
 # CORS
@@ -81,57 +117,117 @@ app.add_middleware(
 )
 
 # Helper functions
-async def check_scrapers() -> Dict[str, bool]:
-    """Verificar estado de scrapers"""
-    scrapers = {}
-    
-    try:
-        scraper = GoogleMapsLeadScraper()
-        scrapers["google_maps"] = scraper.test_connection()
-    except Exception as e:
-        logger.error(f"Google Maps scraper error: {e}")
-        scrapers["google_maps"] = False
+async def check_scrapers() -> Dict[str, Optional[bool]]:
+    """Estado cacheado de scrapers (None si aún no se ha probado)"""
+    return {name: health_prober.status(name) for name in source_registry.names()}
+
+# Límite de jobs ejecutándose a la vez (MAX_CONCURRENT_JOBS); el resto espera en cola
+job_slots = asyncio.Semaphore(settings.max_concurrent_jobs)
+
+async def scrape_source(source: str, request_data: ScrapingRequest, stream: JobStream, summary: JobLogSummary, control: JobControl):
+    """Recorrer sector × ubicación en una fuente, publicando los leads en `stream` conforme llegan
+
+    Al llenarse el presupuesto de leads del job, `control` cancela la fase en el siguiente await.
+    """
+    scraper = source_registry.create(source)
     
-    return scrapers
+    for sector in request_data.sectors:
+        for location in request_data.locations:
+            logger.debug("🔍 Scraping %s: %s in %s", source, sector, location)
+            
+            try:
+                leads = await scraper.scrape_leads(
+                    sector=sector,
+                    location=location,
+                    max_leads=request_data.max_leads_per_sector
+                )
+                
+                leads = control.take_leads(leads)
+                stream.add_leads(leads)
+                summary.add(pairs=1, leads=len(leads), **{f"leads_{source}": len(leads)})
+                
+            except Exception as e:
+                logger.error(f"❌ Scraping error ({source}) for {sector} in {location}: {e}")
+                summary.add(pairs=1, errors=1)
+                stream.add_leads([])
+                continue
+
+async def scrape_pairs(request_data: ScrapingRequest, stream: JobStream, summary: JobLogSummary, control: JobControl):
+    """Todas las fuentes en paralelo; el tiempo del job es el de la fuente más lenta"""
+    await asyncio.gather(*[
+        scrape_source(source, request_data, stream, summary, control)
+        for source in dict.fromkeys(request_data.sources)
+    ])
+
+async def enrich_leads(job_id: str, all_leads: List[Dict], summary: JobLogSummary):
+    """Emails y redes desde los sitios web; lo enriquecido antes del timeout se conserva"""
+    with profile_span('enrich', leads=len(all_leads)):
+        try:
+            enriched = await asyncio.wait_for(website_enricher.enrich(all_leads), timeout=settings.enrichment_job_timeout)
+            summary.add(enriched=enriched)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Job {job_id}: enriquecimiento web excedió {settings.enrichment_job_timeout:.0f}s")
+            summary.add(enrich_timed_out=1)
+        except Exception as e:
+            logger.error(f"❌ Enrichment error ({job_id}): {e}")
 
-async def run_scraping_job(job_id: str, request_data: ScrapingRequest):
+async def run_scraping_job(job_id: str, request_data: ScrapingRequest, control: JobControl, stream: JobStream):
     """Ejecutar scraping job en background"""
+    try:
+        async with job_slots:
+            JOBS_QUEUED.dec()
+            if control.cancelled:
+                # Cancelado mientras esperaba turno: DELETE ya lo marcó en la base
+                return
+            JOBS_RUNNING.inc()
+            await _run_scraping_job(job_id, request_data, control, stream)
+    finally:
+        active_jobs.pop(job_id, None)
+        # Lo que se conecte después lee los resultados guardados
+        job_streams.pop(job_id, None)
+
+async def _run_scraping_job(job_id: str, request_data: ScrapingRequest, control: JobControl, stream: JobStream):
+    summary = JobLogSummary(job_id)
+    profiler = JobProfiler(job_id) if request_data.profile else None
+    if profiler:
+        profiler.start()
     try:
         logger.info(f"🎯 Starting scraping job: {job_id}")
         
-        all_leads = []
+        # Los leads del job son los del stream: /stream los publica conforme llegan
+        all_leads = stream.leads
+        control.start_clock()
+        stream.set_phase('scraping')
         
-        for sector in request_data.sectors:
-            for location in request_data.locations:
-                logger.info(f"🔍 Scraping: {sector} in {location}")
-                
-                try:
-                    # Usar Google Maps scraper
-                    scraper = GoogleMapsLeadScraper()
-                    leads = await scraper.scrape_leads(
-                        sector=sector,
-                        location=location,
-                        max_leads=request_data.max_leads_per_sector
-                    )
-                    
-                    all_leads.extend(leads)
-                    logger.info(f"✅ Found {len(leads)} leads for {sector} in {location}")
-                    
-                    # Pausa entre sectores
-                    await asyncio.sleep(2)
-                    
-                except Exception as e:
-                    logger.error(f"❌ Scraping error for {sector} in {location}: {e}")
-                    continue
+        # SCRAPING_TIMEOUT, deadline, presupuestos o DELETE: se guardan los leads obtenidos hasta el momento
+        await control.run(scrape_pairs(request_data, stream, summary, control), timeout=settings.scraping_timeout)
+        if control.stopped:
+            logger.warning(f"⏹️ Job {job_id} detenido ({control.stop_reason}); guardando resultados parciales")
+            summary.add(**{f"stopped_{control.stop_reason}": 1}, requests=control.requests)
+        
+        if request_data.enrich_websites and all_leads:
+            stream.set_phase('enriching')
+            # Sin presupuesto de requests (son sitios de cada negocio), pero sí con deadline y DELETE
+            await control.run(enrich_leads(job_id, all_leads, summary), budgeted=False)
         
         # Actualizar job con resultados
-        job_db.update_job(job_id, "completed", all_leads)
+        status = "cancelled" if control.cancelled else "completed"
+        with profile_span('persist', leads=len(all_leads)):
+            job_db.update_job(job_id, status, all_leads, stop_reason=control.stop_reason)
         
-        logger.info(f"🎉 Job completed: {job_id} with {len(all_leads)} total leads")
+        stream.finish(status, control.stop_reason)
+        summary.emit(logger, status)
         
     except Exception as e:
         logger.error(f"❌ Job failed: {job_id} - {e}")
         job_db.update_job(job_id, "failed", [])
+        stream.finish("failed")
+        summary.emit(logger, "failed")
+    finally:
+        JOBS_RUNNING.dec()
+        if profiler:
+            profiler.stop()
+            job_db.save_profile(job_id, profiler.to_dict())
 
 # Endpoints
 @app.get("/")
@@ -146,15 +242,45 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check"""
+    """Health check (resultados cacheados del prober)"""
     scrapers = await check_scrapers()
     
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "scrapers": scrapers
+        "scrapers": scrapers,
+        "checks": health_prober.snapshot(),
+        "circuit_breakers": fetcher.snapshot(),
+        "identities": proxy_pool.snapshot()
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: el proceso y el event loop responden"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: la base de datos está disponible (las fuentes externas no cuentan)"""
+    database_ok = health_prober.status("database")
+    ready = job_db is not None and database_ok is True
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": database_ok,
+            "scrapers": await check_scrapers(),
+            "circuit_breakers": fetcher.snapshot()
+        }
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas en formato Prometheus"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.post("/scrape", response_model=ScrapingResponse)
 async def start_scraping(
     request: ScrapingRequest,
@@ -163,7 +289,7 @@ async def start_scraping(
     """Iniciar proceso de scraping"""
     try:
         # Validar sources
-        valid_sources = ["google_maps"]
+        valid_sources = source_registry.names()
         invalid_sources = [s for s in request.sources if s not in valid_sources]
         if invalid_sources:
             raise HTTPException(
@@ -171,6 +297,19 @@ async def start_scraping(
                 detail=f"Fuentes inválidas: {invalid_sources}. Válidas: {valid_sources}"
             )
         
+        # Validar callback
+        if request.callback_url:
+            try:
+                await check_callback_url(request.callback_url, settings.callback_allowed_hosts)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        invalid_events = [e for e in request.callback_events if e not in CALLBACK_EVENTS]
+        if invalid_events:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Eventos inválidos: {invalid_events}. Válidos: {list(CALLBACK_EVENTS)}"
+            )
+        
         # Crear job en database
         job_id = job_db.create_job(request.dict())
         
@@ -181,7 +320,16 @@ async def start_scraping(
             raise HTTPException(status_code=500, detail="Database not available")
         
         # Ejecutar scraping en background
-        background_tasks.add_task(run_scraping_job, job_id, request)
+        control = JobControl(job_id, request.deadline_seconds, request.max_requests, request.max_leads)
+        active_jobs[job_id] = control
+        stream = JobStream(job_id, pairs_total=len(set(request.sources)) * len(request.sectors) * len(request.locations))
+        job_streams[job_id] = stream
+        if request.callback_url:
+            stream.subscribe(JobCallbacks(
+                job_id, request.callback_url, request.callback_events, callback_dispatcher, settings.callback_progress_interval
+            ))
+        background_tasks.add_task(run_scraping_job, job_id, request, control, stream)
+        JOBS_QUEUED.inc()
         
         return ScrapingResponse(
             job_id=job_id,
@@ -210,7 +358,8 @@ async def get_job_status(job_id: str):
             status=job["status"],
             estimated_time=job.get("estimated_time"),
             created_at=job["created_at"],
-            updated_at=job["updated_at"]
+            updated_at=job["updated_at"],
+            stop_reason=job.get("stop_reason")
         )
         
     except HTTPException:
@@ -223,35 +372,37 @@ async def get_job_status(job_id: str):
 async def get_job_results(job_id: str):
     """Obtener resultados de un job"""
     try:
-        job = job_db.get_job_status(job_id)
+        job = job_db.get_job_results_raw(job_id)
         
         if not job:
             raise HTTPException(status_code=404, detail="Job no encontrado")
         
-        if job["status"] == "started":
+        status, results, total_leads, stop_reason = job
+        if status == "started":
             return {
                 "job_id": job_id,
                 "status": "processing",
                 "message": "Job aún en proceso"
             }
-        elif job["status"] == "failed":
+        elif status == "failed":
             return {
                 "job_id": job_id,
                 "status": "failed",
                 "message": "Job falló"
             }
-        elif job["status"] == "completed":
-            results = job.get("results", [])
-            if results is None:
-                results = []
-            
-            return {
-                "job_id": job_id,
-                "status": "completed",
-                "total_leads": len(results),
-                "leads": results,
-                "debug_results_type": str(type(results))
-            }
+        elif status in ("completed", "cancelled"):
+            # Los leads guardados ya son JSON: se descomprimen por bloques directo al cuerpo,
+            # sin decodificar ni re-codificar. Con stop_reason son resultados parciales.
+            body = iter_object(
+                "leads",
+                iter_decompress(results) if results else [b'[]'],
+                job_id=job_id,
+                status=status,
+                total_leads=total_leads,
+                stop_reason=stop_reason,
+                debug_results_type=str(list)
+            )
+            return StreamingResponse(body, media_type="application/json")
         
     except HTTPException:
         raise
@@ -259,23 +410,138 @@ async def get_job_results(job_id: str):
         logger.error(f"Get job results error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs/{job_id}/stream")
+async def stream_job_events(
+    job_id: str,
+    offset: int = Query(default=0, ge=0, description="Leads ya recibidos; el stream empieza en el siguiente"),
+    last_event_id: Optional[str] = Header(default=None)
+):
+    """Leads y progreso del job como Server-Sent Events (lead, progress, end)
+
+    Cada evento `lead` lleva como id su posición en los resultados: al
+    reconectarse, EventSource manda Last-Event-ID y el stream sigue desde ahí.
+    En vivo los leads salen antes del enriquecimiento por sitio web; releídos
+    de un job terminado vienen ya enriquecidos (mismas posiciones, más campos).
+    """
+    try:
+        if last_event_id and last_event_id.isdigit():
+            offset = max(offset, int(last_event_id))
+        
+        stream = job_streams.get(job_id)
+        if stream is not None:
+            body = stream.events(offset)
+        else:
+            job = job_db.get_job_results_raw(job_id)
+            if not job:
+                raise HTTPException(status_code=404, detail="Job no encontrado")
+            status, results, total_leads, stop_reason = job
+            leads = []
+            if results and offset < total_leads:
+                # Solo se decodifica si al cliente le faltan leads
+                leads = await asyncio.to_thread(lambda: loads(decompress(results)))
+            body = iter(replay_events(leads, offset, {
+                "status": status,
+                "stop_reason": stop_reason,
+                "total_leads": total_leads
+            }))
+        
+        return StreamingResponse(
+            body,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Stream job error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancelar un job encolado o en ejecución; lo obtenido hasta el momento se guarda"""
+    try:
+        job = job_db.get_job_status(job_id)
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Job no encontrado")
+        
+        if job["status"] != "started":
+            raise HTTPException(status_code=409, detail=f"Job ya terminó ({job['status']})")
+        
+        control = active_jobs.get(job_id)
+        if control is not None and control.started:
+            # El job guarda sus resultados parciales al salir de la fase en curso
+            control.cancel()
+            return {"job_id": job_id, "status": "cancelling", "message": "Cancelación solicitada"}
+        
+        # Encolado (o huérfano de un proceso anterior): no hay nada que detener
+        if control is not None:
+            control.cancel()
+        job_db.update_job(job_id, "cancelled", [], stop_reason="cancelled")
+        stream = job_streams.pop(job_id, None)
+        if stream is not None:
+            stream.finish("cancelled", "cancelled")
+        return {"job_id": job_id, "status": "cancelled", "message": "Job cancelado antes de empezar"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cancel job error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str, format: str = "collapsed", view: str = "cpu"):
+    """Obtener perfil de un job (pilas colapsadas para flamegraph o JSON)"""
+    try:
+        profile = job_db.get_profile(job_id)
+        
+        if not profile:
+            raise HTTPException(status_code=404, detail="Perfil no encontrado (¿job creado con profile=true?)")
+        
+        if format == "json":
+            return profile
+        elif format == "collapsed":
+            return PlainTextResponse(to_collapsed(profile, view=view))
+        else:
+            raise HTTPException(status_code=400, detail="Formato no válido. Válidos: ['collapsed', 'json']")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get job profile error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/sources")
+async def list_sources():
+    """Fuentes registradas con sus capacidades y último estado de salud"""
+    return {
+        name: {
+            "capabilities": capabilities,
+            "healthy": health_prober.status(name)
+        }
+        for name, capabilities in source_registry.describe().items()
+    }
+
 @app.post("/test-scraper")
 async def test_scraper(source: str = "google_maps"):
     """Probar un scraper específico"""
     try:
-        if source == "google_maps":
-            scraper = GoogleMapsLeadScraper()
-            # Test con un restaurante en Querétaro
-            results = await scraper.test_single_search("Restaurantes", "Querétaro", 1)
-        else:
+        if source not in source_registry.names():
             raise HTTPException(status_code=400, detail="Fuente no válida")
         
+        scraper = source_registry.create(source)
+        # Test con un restaurante en Querétaro
+        results = await scraper.test_single_search("Restaurantes", "Querétaro", 1)
+        
         return {
             "source": source,
-            "test_results": results,
+            "test_results": [as_dict(result) for result in results],
             "status": "success" if results else "no_results"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Test scraper error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Mide throughput y latencia de scrapers, procesador y base de datos sin red
+
+Uso:
+    python -m benchmarks.bench                  # corre y compara contra baseline.json
+    python -m benchmarks.bench --quick          # menos iteraciones, sin 100k leads
+    python -m benchmarks.bench --save-baseline  # guarda los resultados como nuevo baseline
+
+Las páginas de benchmarks/fixtures/ reproducen el marcado de resultados de
+Sección Amarilla y las respuestas JSON de la API de MercadoLibre (/sites/MLM/search
+y /users?ids=), y se sirven desde un servidor HTTP local. El baseline es
+específico de cada máquina: regenerarlo al cambiar de hardware.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bs4 import BeautifulSoup
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from database import JobDatabase  # noqa: E402
+from scrapers.mercadolibre_scraper import MercadoLibreLeadScraper, seller_cache  # noqa: E402
+from scrapers.seccion_amarilla_simple import GoogleMapsLeadScraper  # noqa: E402
+from utils.data_processor import LeadProcessor  # noqa: E402
+from utils.lead import Lead  # noqa: E402
+from utils.numbering_plan import numbering_plan  # noqa: E402
+from utils.phone import clear_phone_caches, find_phone, normalize_phone, phone_key  # noqa: E402
+from utils.rate_limiter import rate_limiter  # noqa: E402
+from utils.single_flight import scrape_flights  # noqa: E402
+from utils.compression import iter_decompress  # noqa: E402
+from utils.serialization import iter_object  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+CATEGORIES = ['contadores', 'abogados', 'agencias-de-marketing']
+
+
+def _load_json_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Sirve /resultados/<categoria>/... con la página grabada de esa categoría
+    y una API de MercadoLibre falsa sobre los listados/vendedores de las fixtures JSON"""
+
+    ml_items = _load_json_fixture('mercadolibre_search.json')
+    ml_users = _load_json_fixture('mercadolibre_users.json')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+
+        if parts[0] == 'sites' and parts[-1] == 'search':
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', ['50'])[0])
+            self._send_json({
+                'results': self.ml_items[offset:offset + limit],
+                'paging': {'total': len(self.ml_items), 'offset': offset, 'limit': limit}
+            })
+            return
+
+        if parts == ['users']:
+            ids = query.get('ids', [''])[0].split(',')
+            self._send_json([
+                {'code': 200, 'body': self.ml_users[seller_id]} if seller_id in self.ml_users
+                else {'code': 404, 'body': {'message': 'not_found'}}
+                for seller_id in ids
+            ])
+            return
+
+        if parts[0] == 'sites':
+            self._send_json({'id': parts[-1]})
+            return
+
+        category = parts[1] if len(parts) > 1 and parts[0] == 'resultados' else ''
+        path = os.path.join(FIXTURES_DIR, f"seccion_amarilla_{category}.html")
+
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+
+        self._send(body, 'text/html; charset=utf-8')
+
+    def _send_json(self, payload):
+        self._send(json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_fixture_soups() -> List[BeautifulSoup]:
+    soups = []
+    for category in CATEGORIES:
+        with open(os.path.join(FIXTURES_DIR, f"seccion_amarilla_{category}.html"), 'rb') as f:
+            soups.append(BeautifulSoup(f.read(), 'html.parser'))
+    return soups
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_bench(
+    name: str,
+    func: Callable[..., int],
+    iterations: int,
+    unit: str,
+    setup: Optional[Callable[[], Any]] = None
+) -> Dict:
+    """Ejecuta `func` N veces; `func` devuelve cuántas unidades (páginas, leads, filas) procesó
+
+    Con `setup`, cada ejecución es `func(setup())` y el setup queda fuera del
+    tiempo medido (p. ej. copias frescas de datos que `func` modifica).
+    """
+    def once() -> int:
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        count = func(*args)
+        latencies.append(time.perf_counter() - start)
+        return count
+
+    latencies: List[float] = []
+    once()  # warmup
+    latencies.clear()
+
+    units = 0
+    for _ in range(iterations):
+        units += once()
+
+    total = sum(latencies)
+    result = {
+        'name': name,
+        'unit': unit,
+        'throughput': round(units / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_rss_mb': peak_rss_mb()
+    }
+    print(f"  {name:<36} {result['throughput']:>12,.1f} {unit}/s   "
+          f"p50 {result['p50_ms']:>9.3f} ms   p99 {result['p99_ms']:>9.3f} ms   "
+          f"rss {result['peak_rss_mb']:>7.1f} MB")
+    return result
+
+
+def synthetic_leads(seed_leads: List[Lead], count: int) -> List[Lead]:
+    """Multiplica los leads reales de las fixtures variando nombre y teléfono"""
+    rng = random.Random(count)
+    leads = []
+    for i in range(count):
+        seed = seed_leads[i % len(seed_leads)]
+        lead = seed.copy()
+        lead.name = f"{seed.name} {i}"
+        lead.phone = f"55{rng.randint(10000000, 99999999)}"
+        leads.append(lead)
+    return leads
+
+
+def bench_scraper(iterations: int) -> List[Dict]:
+    server = start_fixture_server()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    base = f"http://{host}/resultados"
+    # Se mide el scraper, no el pacing de cortesía
+    rate_limiter.exempt_hosts.add(host)
+    urls = [f"{base}/{category}/distrito-federal/zona-metropolitana/1" for category in CATEGORIES]
+    scraper = GoogleMapsLeadScraper()
+    loop = asyncio.new_event_loop()
+
+    leads_seen = []
+
+    def scrape_page():
+        scraper.extracted_leads.clear()
+        scrape_flights.clear()
+        leads = loop.run_until_complete(scraper.scrape_leads_from_url(random.choice(urls), 100))
+        leads_seen.append(len(leads))
+        return 1
+
+    try:
+        result = run_bench('scrape_leads_from_url', scrape_page, iterations, 'pages')
+        # Promedio de leads por página (sin el warmup) para derivar leads/s
+        leads_per_page = sum(leads_seen[1:]) / max(1, len(leads_seen) - 1)
+        result['leads_per_s'] = round(result['throughput'] * leads_per_page, 2)
+        print(f"  {'':<36} {result['leads_per_s']:>12,.1f} leads/s")
+        return [result]
+    finally:
+        loop.close()
+        server.shutdown()
+
+
+def bench_mercadolibre(iterations: int) -> List[Dict]:
+    server = start_fixture_server()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    rate_limiter.exempt_hosts.add(host)
+    scraper = MercadoLibreLeadScraper()
+    scraper.api_url = f"http://{host}"
+    loop = asyncio.new_event_loop()
+
+    def scrape_sellers(cached: bool):
+        scrape_flights.clear()
+        if not cached:
+            seller_cache.clear()
+        return len(loop.run_until_complete(scraper.scrape_leads('Comercio', 'Ciudad de México', 1000)))
+
+    try:
+        return [
+            run_bench('MercadoLibre scrape_leads (frío)', lambda: scrape_sellers(False), max(3, iterations // 5), 'leads'),
+            run_bench('MercadoLibre scrape_leads (cache)', lambda: scrape_sellers(True), max(3, iterations // 5), 'leads'),
+        ]
+    finally:
+        loop.close()
+        server.shutdown()
+
+
+def bench_extraction(iterations: int) -> List[Dict]:
+    scraper = GoogleMapsLeadScraper()
+    rows = [row for soup in load_fixture_soups() for row in soup.find_all('tr')]
+
+    def extract_rows():
+        return sum(1 for row in rows if scraper._extract_from_business_row(row, 'Contadores'))
+
+    def extract_phones():
+        return sum(1 for row in rows if scraper._extract_phone_robust(row))
+
+    return [
+        run_bench('_extract_from_business_row', extract_rows, iterations, 'leads'),
+        run_bench('_extract_phone_robust', extract_phones, iterations, 'rows'),
+    ]
+
+
+def bench_phone(iterations: int) -> List[Dict]:
+    texts = [row.get_text() for soup in load_fixture_soups() for row in soup.find_all('tr')]
+    found = [phone for phone in map(find_phone, texts) if phone]
+    # Sin repetidos: en la medición en frío ninguna llamada puede pegarle al memo
+    unique_phones = list(dict.fromkeys(found))
+    phones = found * 10
+
+    # Sin memo: cada iteración parte de caches vacíos
+    def find_cold():
+        clear_phone_caches()
+        return sum(1 for text in texts if find_phone(text))
+
+    def normalize_cold():
+        # Pocos teléfonos únicos: varias pasadas, cada una con caches vacíos
+        normalized = 0
+        for _ in range(10):
+            clear_phone_caches()
+            normalized += sum(1 for phone in unique_phones if normalize_phone(phone))
+        return normalized
+
+    nationals = [phone_key(phone) for phone in phones]
+
+    def lookup():
+        return sum(1 for national in nationals if numbering_plan.lookup(national))
+
+    return [
+        run_bench('find_phone (sin memo)', find_cold, iterations, 'rows'),
+        run_bench('normalize_phone (sin memo)', normalize_cold, iterations, 'phones'),
+        run_bench('numbering_plan.lookup', lookup, iterations, 'phones'),
+    ]
+
+
+def bench_processor(seed_leads: List[Dict], sizes: List[int]) -> List[Dict]:
+    processor = LeadProcessor()
+    results = []
+
+    for size in sizes:
+        leads = synthetic_leads(seed_leads, size)
+        iterations = max(1, 20000 // size)
+        # process_leads limpia y enriquece los Lead en el lugar: cada ejecución parte de copias crudas
+        results.append(run_bench(
+            f'LeadProcessor.process_leads {size // 1000}k',
+            lambda batch: len(processor.process_leads(batch)),
+            iterations,
+            'leads',
+            setup=lambda: [lead.copy() for lead in leads]
+        ))
+
+    return results
+
+
+def bench_database(seed_leads: List[Dict], iterations: int) -> List[Dict]:
+    leads = synthetic_leads(seed_leads, 1000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = JobDatabase(db_path=os.path.join(tmp, 'bench.db'))
+        job_ids = []
+
+        def insert():
+            job_id = db.create_job({'sectors': ['Contadores'], 'locations': ['CDMX']})
+            db.update_job(job_id, 'completed', leads)
+            job_ids.append(job_id)
+            return len(leads)
+
+        def read():
+            job = db.get_job_status(random.choice(job_ids))
+            return len(job['results'])
+
+        def read_raw():
+            # Camino de /jobs/{id}/results: bytes guardados → cuerpo de la respuesta
+            status, results, total_leads, _ = db.get_job_results_raw(random.choice(job_ids))
+            for _ in iter_object('leads', iter_decompress(results), job_id='bench', status=status, total_leads=total_leads):
+                pass
+            return total_leads
+
+        return [
+            run_bench('JobDatabase insert (1k leads)', insert, iterations, 'leads'),
+            run_bench('JobDatabase read (1k leads)', read, iterations, 'leads'),
+            run_bench('JobDatabase read raw (1k leads)', read_raw, iterations, 'leads'),
+        ]
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for result in results:
+        reference = baseline.get(result['name'])
+        if not reference or not reference.get('throughput'):
+            continue
+
+        ratio = result['throughput'] / reference['throughput']
+        status = 'OK'
+        if ratio < 1 - tolerance:
+            status = 'REGRESIÓN'
+            regressions.append(result['name'])
+        print(f"  {result['name']:<36} {ratio:>6.2f}x baseline   {status}")
+
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks offline del lead scraper")
+    parser.add_argument('--quick', action='store_true', help="Menos iteraciones y sin 100k leads")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar resultados como baseline")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Ruta del baseline JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Caída de throughput tolerada (0.25 = 25%%)")
+    parser.add_argument('--output', help="Guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    iterations = 20 if args.quick else 100
+    sizes = [1000, 10000] if args.quick else [1000, 10000, 100000]
+
+    # Los benchmarks no deben medir el costo de escribir logs
+    logging.disable(logging.WARNING)
+
+    seed_leads = [
+        lead for soup in load_fixture_soups()
+        for lead in (GoogleMapsLeadScraper()._extract_from_business_row(row, 'Contadores') for row in soup.find_all('tr'))
+        if lead
+    ]
+
+    print("🏁 Benchmarks")
+    results = []
+    results += bench_scraper(iterations)
+    results += bench_mercadolibre(iterations)
+    results += bench_extraction(iterations)
+    results += bench_phone(iterations)
+    results += bench_processor(seed_leads, sizes)
+    results += bench_database(seed_leads, max(5, iterations // 5))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({result['name']: result for result in results}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"💾 Baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ Sin baseline; ejecutar con --save-baseline")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    print("📊 Comparación contra baseline")
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ Regresiones: {', '.join(regressions)}")
+        return 1
+
+    print("✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Load Test
+Generador de carga reproducible para la API de jobs
+
+Levanta el sitio falso de benchmarks/fixtures y la API (uvicorn, proceso aparte)
+apuntando a él, y luego cada worker repite: POST /scrape → polling de
+/jobs/{id}/status → GET /jobs/{id}/results.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 20 --jobs 100
+    python -m benchmarks.load_test --url http://localhost:8000  # API ya levantada
+
+Reporta percentiles de latencia por endpoint y el lag del event loop de la API
+(histograma event_loop_lag_seconds de /metrics) durante la prueba.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.bench import ROOT_DIR, percentile, start_fixture_server
+
+SECTORS = ['Contadores', 'Abogados', 'Marketing']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_api(fake_site_url: str, db_path: str) -> (subprocess.Popen, str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        SECCION_AMARILLA_BASE_URL=fake_site_url,
+        RATE_LIMIT_EXEMPT_HOSTS=fake_site_url.split('://', 1)[1],
+        JOBS_DB_PATH=db_path,
+        LOG_LEVEL='WARNING'
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT_DIR,
+        env=env
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(session: aiohttp.ClientSession, base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"La API no respondió en {timeout}s")
+
+
+async def fetch_lag_buckets(session: aiohttp.ClientSession, base_url: str) -> Dict[float, float]:
+    """Buckets acumulados del histograma de lag del event loop"""
+    async with session.get(f"{base_url}/metrics") as response:
+        text = await response.text()
+
+    buckets = {}
+    for family in text_string_to_metric_families(text):
+        if family.name != 'event_loop_lag_seconds':
+            continue
+        for sample in family.samples:
+            if sample.name.endswith('_bucket'):
+                buckets[float(sample.labels['le'])] = sample.value
+    return buckets
+
+
+def bucket_quantile(before: Dict[float, float], after: Dict[float, float], q: float) -> Optional[float]:
+    """Cuantil aproximado (cota superior del bucket) del delta entre dos lecturas"""
+    delta = sorted((le, after.get(le, 0) - before.get(le, 0)) for le in after)
+    if not delta or delta[-1][1] <= 0:
+        return None
+
+    target = q * delta[-1][1]
+    for le, count in delta:
+        if count >= target:
+            return le
+    return delta[-1][0]
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.job_durations: List[float] = []
+        self.statuses: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+async def timed_request(session: aiohttp.ClientSession, stats: LoadStats, endpoint: str, method: str, url: str, **kwargs) -> Optional[Dict]:
+    start = time.perf_counter()
+    try:
+        async with session.request(method, url, **kwargs) as response:
+            body = await response.json()
+            stats.record(endpoint, time.perf_counter() - start, response.status < 400)
+            return body if response.status < 400 else None
+    except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError):
+        stats.record(endpoint, time.perf_counter() - start, False)
+        return None
+
+
+async def run_job(session: aiohttp.ClientSession, base_url: str, stats: LoadStats, args, rng: random.Random):
+    payload = {
+        'sectors': rng.sample(SECTORS, k=min(args.sectors, len(SECTORS))),
+        'locations': ['Ciudad de México'] * args.locations,
+        'max_leads_per_sector': args.max_leads,
+        'sources': ['google_maps']
+    }
+
+    job_start = time.perf_counter()
+    created = await timed_request(session, stats, 'POST /scrape', 'POST', f"{base_url}/scrape", json=payload)
+    if not created:
+        return
+
+    job_id = created['job_id']
+    status = 'started'
+    while status == 'started':
+        await asyncio.sleep(args.poll_interval)
+        job = await timed_request(session, stats, 'GET /jobs/{id}/status', 'GET', f"{base_url}/jobs/{job_id}/status")
+        if job is None:
+            return
+        status = job['status']
+
+    await timed_request(session, stats, 'GET /jobs/{id}/results', 'GET', f"{base_url}/jobs/{job_id}/results")
+    stats.job_durations.append(time.perf_counter() - job_start)
+    stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+
+async def worker(queue: asyncio.Queue, session: aiohttp.ClientSession, base_url: str, stats: LoadStats, args, rng: random.Random):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        await run_job(session, base_url, stats, args, rng)
+
+
+def print_report(stats: LoadStats, elapsed: float, lag_before: Dict, lag_after: Dict):
+    print(f"\n📊 {sum(stats.statuses.values())} jobs en {elapsed:.1f}s  estados: {stats.statuses}")
+    print(f"  {'endpoint':<26} {'n':>6} {'err':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for endpoint, values in stats.latencies.items():
+        print(f"  {endpoint:<26} {len(values):>6} {stats.errors.get(endpoint, 0):>5} "
+              f"{percentile(values, 50) * 1000:>10.1f} {percentile(values, 95) * 1000:>10.1f} "
+              f"{percentile(values, 99) * 1000:>10.1f} {max(values) * 1000:>10.1f}")
+
+    if stats.job_durations:
+        print(f"  duración de job           p50 {percentile(stats.job_durations, 50):.2f}s   "
+              f"p99 {percentile(stats.job_durations, 99):.2f}s")
+
+    lag = {q: bucket_quantile(lag_before, lag_after, q) for q in (0.5, 0.99, 1.0)}
+    if lag[0.5] is None:
+        print("  lag del event loop: sin datos (¿API sin event_loop_lag_seconds?)")
+    else:
+        print(f"  lag del event loop (≤ bucket)  p50 {lag[0.5] * 1000:.0f} ms   "
+              f"p99 {lag[0.99] * 1000:.0f} ms   max {lag[1.0] * 1000:.0f} ms")
+
+
+async def main_async(args) -> int:
+    fixture_server = None
+    api_process = None
+    tmp_dir = None
+    base_url = args.url
+
+    if not base_url:
+        fixture_server = start_fixture_server()
+        tmp_dir = tempfile.TemporaryDirectory()
+        api_process, base_url = start_api(
+            f"http://127.0.0.1:{fixture_server.server_address[1]}",
+            os.path.join(tmp_dir.name, 'jobs.db')
+        )
+
+    try:
+        timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+        connector = aiohttp.TCPConnector(limit=args.concurrency * 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await wait_until_ready(session, base_url)
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(args.jobs):
+                queue.put_nowait(i)
+
+            stats = LoadStats()
+            lag_before = await fetch_lag_buckets(session, base_url)
+            start = time.perf_counter()
+
+            await asyncio.gather(*[
+                worker(queue, session, base_url, stats, args, random.Random(args.seed + i))
+                for i in range(args.concurrency)
+            ])
+
+            elapsed = time.perf_counter() - start
+            lag_after = await fetch_lag_buckets(session, base_url)
+
+        print_report(stats, elapsed, lag_before, lag_after)
+        return 1 if stats.errors else 0
+
+    finally:
+        if api_process:
+            api_process.terminate()
+            api_process.wait(timeout=10)
+        if fixture_server:
+            fixture_server.shutdown()
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de jobs")
+    parser.add_argument('--url', help="URL de una API ya levantada (por defecto se levanta una local con el sitio falso)")
+    parser.add_argument('--concurrency', type=int, default=10, help="Workers concurrentes")
+    parser.add_argument('--jobs', type=int, default=50, help="Total de jobs a enviar")
+    parser.add_argument('--sectors', type=int, default=1, help="Sectores por job")
+    parser.add_argument('--locations', type=int, default=1, help="Ubicaciones por job")
+    parser.add_argument('--max-leads', type=int, default=10, help="max_leads_per_sector por job")
+    parser.add_argument('--poll-interval', type=float, default=0.5, help="Segundos entre polls de status")
+    parser.add_argument('--request-timeout', type=float, default=60.0, help="Timeout por request")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla para reproducibilidad")
+    args = parser.parse_args(argv)
+
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Configuración
+Settings tipados cargados una sola vez desde el entorno / .env
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+def _str(name: str, default: str = '') -> str:
+    return os.getenv(name, default).strip()
+
+
+def _int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        logger.warning(f"⚠️ {name}={value!r} no es entero, usando {default}")
+        return default
+
+
+def _float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, '') else default
+    except ValueError:
+        logger.warning(f"⚠️ {name}={value!r} no es numérico, usando {default}")
+        return default
+
+
+def _bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _list(name: str, default: str = '') -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(',') if item.strip()]
+
+
+@dataclass(frozen=True)
+class Settings:
+    # General
+    environment: str = 'production'
+    log_level: str = 'INFO'
+    log_format: str = 'json'
+    api_secret_key: str = ''
+
+    # Database
+    jobs_db_path: str = '/app/jobs.db'
+    # Nivel zlib para los resultados guardados (0 = JSON sin comprimir)
+    results_compression_level: int = 6
+
+    # Plan de numeración del IFT (CSV); vacío = plan por lada incluido en utils/
+    numbering_plan_path: str = ''
+
+    # Jobs
+    default_max_leads: int = 50
+    default_sources: List[str] = field(default_factory=lambda: ['google_maps'])
+    scraping_timeout: float = 3600.0
+    max_concurrent_jobs: int = 2
+
+    # Descarga de fuentes
+    seccion_amarilla_base_url: str = 'https://www.seccionamarilla.com.mx'
+    seccion_amarilla_max_pages: int = 3
+    fetch_timeout: float = 30.0
+    fetch_max_retries: int = 3
+    fetch_backoff_base: float = 0.5
+    fetch_backoff_max: float = 10.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 60.0
+    http_pool_size: int = 10
+    # Segundos que se reutiliza una página ya scrapeada por jobs concurrentes (0 = solo coalescer)
+    scrape_memo_ttl: float = 300.0
+
+    # Directorios: requests simultáneos por directorio
+    directory_concurrency: int = 2
+
+    # MercadoLibre (API pública de listados)
+    mercadolibre_api_url: str = 'https://api.mercadolibre.com'
+    mercadolibre_site_id: str = 'MLM'
+    mercadolibre_access_token: Optional[str] = None
+    mercadolibre_page_size: int = 50
+    mercadolibre_max_pages: int = 5
+    mercadolibre_seller_cache_ttl: float = 6 * 3600.0
+
+    # Enriquecimiento web (emails y redes desde el sitio de cada lead)
+    enrichment_enabled: bool = True
+    enrichment_concurrency: int = 8
+    enrichment_per_domain: int = 2
+    enrichment_max_pages: int = 3
+    enrichment_timeout: float = 10.0
+    enrichment_job_timeout: float = 120.0
+    enrichment_cache_ttl: float = 7 * 24 * 3600.0
+
+    # Rate limiting
+    rate_limit_delay: float = 2.0
+    rate_limit_min_rate: float = 0.05
+    rate_limit_max_rate: float = 5.0
+    rate_limit_burst: float = 2.0
+    rate_limit_exempt_hosts: List[str] = field(default_factory=list)
+
+    # Anti-detección
+    use_proxies: bool = False
+    proxy_list: List[str] = field(default_factory=list)
+    rotating_user_agents: bool = True
+    direct_identities: int = 3
+
+    # Health checks
+    health_probe_interval: float = 60.0
+    health_probe_timeout: float = 15.0
+
+    # Integraciones
+    n8n_webhook_url: Optional[str] = None
+    n8n_api_key: Optional[str] = None
+    chatwoot_api_url: str = ''
+    chatwoot_api_token: Optional[str] = None
+    chatwoot_account_id: str = '1'
+    google_sheets_credentials: Optional[str] = None
+    google_sheets_spreadsheet_id: Optional[str] = None
+    integration_timeout: float = 30.0
+
+    # Callbacks de jobs (callback_url del request)
+    callback_workers: int = 2
+    callback_queue_size: int = 1000
+    callback_max_attempts: int = 6
+    callback_backoff_base: float = 2.0
+    callback_backoff_max: float = 300.0
+    callback_progress_interval: float = 30.0
+    # Hosts a los que se permite llamar aunque resuelvan a una IP privada (p. ej. n8n interno)
+    callback_allowed_hosts: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = None) -> 'Settings':
+        """Carga .env (sin pisar variables ya definidas en el entorno) y construye los settings"""
+        load_dotenv(env_file, override=False)
+        defaults = cls()
+
+        return cls(
+            environment=_str('ENVIRONMENT', defaults.environment),
+            log_level=_str('LOG_LEVEL', defaults.log_level).upper(),
+            log_format=_str('LOG_FORMAT', defaults.log_format).lower(),
+            api_secret_key=_str('API_SECRET_KEY'),
+            jobs_db_path=_str('JOBS_DB_PATH', defaults.jobs_db_path),
+            numbering_plan_path=_str('NUMBERING_PLAN_PATH', defaults.numbering_plan_path),
+            results_compression_level=min(9, max(0, _int('RESULTS_COMPRESSION_LEVEL', defaults.results_compression_level))),
+            default_max_leads=_int('DEFAULT_MAX_LEADS', defaults.default_max_leads),
+            default_sources=_list('DEFAULT_SOURCES') or defaults.default_sources,
+            scraping_timeout=_float('SCRAPING_TIMEOUT', defaults.scraping_timeout),
+            max_concurrent_jobs=max(1, _int('MAX_CONCURRENT_JOBS', defaults.max_concurrent_jobs)),
+            seccion_amarilla_base_url=_str('SECCION_AMARILLA_BASE_URL', defaults.seccion_amarilla_base_url).rstrip('/'),
+            seccion_amarilla_max_pages=max(1, _int('SECCION_AMARILLA_MAX_PAGES', defaults.seccion_amarilla_max_pages)),
+            fetch_timeout=_float('FETCH_TIMEOUT', defaults.fetch_timeout),
+            fetch_max_retries=_int('FETCH_MAX_RETRIES', defaults.fetch_max_retries),
+            fetch_backoff_base=_float('FETCH_BACKOFF_BASE', defaults.fetch_backoff_base),
+            fetch_backoff_max=_float('FETCH_BACKOFF_MAX', defaults.fetch_backoff_max),
+            breaker_failure_threshold=_int('BREAKER_FAILURE_THRESHOLD', defaults.breaker_failure_threshold),
+            breaker_reset_timeout=_float('BREAKER_RESET_TIMEOUT', defaults.breaker_reset_timeout),
+            http_pool_size=_int('HTTP_POOL_SIZE', defaults.http_pool_size),
+            scrape_memo_ttl=max(0.0, _float('SCRAPE_MEMO_TTL', defaults.scrape_memo_ttl)),
+            directory_concurrency=max(1, _int('DIRECTORY_CONCURRENCY', defaults.directory_concurrency)),
+            mercadolibre_api_url=_str('MERCADOLIBRE_API_URL', defaults.mercadolibre_api_url).rstrip('/'),
+            mercadolibre_site_id=_str('MERCADOLIBRE_SITE_ID', defaults.mercadolibre_site_id),
+            mercadolibre_access_token=_str('MERCADOLIBRE_ACCESS_TOKEN') or None,
+            mercadolibre_page_size=min(50, max(1, _int('MERCADOLIBRE_PAGE_SIZE', defaults.mercadolibre_page_size))),
+            mercadolibre_max_pages=max(1, _int('MERCADOLIBRE_MAX_PAGES', defaults.mercadolibre_max_pages)),
+            mercadolibre_seller_cache_ttl=_float('MERCADOLIBRE_SELLER_CACHE_TTL', defaults.mercadolibre_seller_cache_ttl),
+            enrichment_enabled=_bool('ENRICHMENT_ENABLED', defaults.enrichment_enabled),
+            enrichment_concurrency=max(1, _int('ENRICHMENT_CONCURRENCY', defaults.enrichment_concurrency)),
+            enrichment_per_domain=max(1, _int('ENRICHMENT_PER_DOMAIN', defaults.enrichment_per_domain)),
+            enrichment_max_pages=max(1, _int('ENRICHMENT_MAX_PAGES', defaults.enrichment_max_pages)),
+            enrichment_timeout=_float('ENRICHMENT_TIMEOUT', defaults.enrichment_timeout),
+            enrichment_job_timeout=_float('ENRICHMENT_JOB_TIMEOUT', defaults.enrichment_job_timeout),
+            enrichment_cache_ttl=_float('ENRICHMENT_CACHE_TTL', defaults.enrichment_cache_ttl),
+            rate_limit_delay=max(0.01, _float('RATE_LIMIT_DELAY', defaults.rate_limit_delay)),
+            rate_limit_min_rate=_float('RATE_LIMIT_MIN_RATE', defaults.rate_limit_min_rate),
+            rate_limit_max_rate=_float('RATE_LIMIT_MAX_RATE', defaults.rate_limit_max_rate),
+            rate_limit_burst=_float('RATE_LIMIT_BURST', defaults.rate_limit_burst),
+            rate_limit_exempt_hosts=_list('RATE_LIMIT_EXEMPT_HOSTS'),
+            use_proxies=_bool('USE_PROXIES', defaults.use_proxies),
+            proxy_list=_list('PROXY_LIST'),
+            rotating_user_agents=_bool('ROTATING_USER_AGENTS', defaults.rotating_user_agents),
+            direct_identities=max(1, _int('DIRECT_IDENTITIES', defaults.direct_identities)),
+            health_probe_interval=_float('HEALTH_PROBE_INTERVAL', defaults.health_probe_interval),
+            health_probe_timeout=_float('HEALTH_PROBE_TIMEOUT', defaults.health_probe_timeout),
+            n8n_webhook_url=_str('N8N_WEBHOOK_URL') or None,
+            n8n_api_key=_str('N8N_API_KEY') or None,
+            chatwoot_api_url=_str('CHATWOOT_API_URL').rstrip('/'),
+            chatwoot_api_token=_str('CHATWOOT_API_TOKEN') or None,
+            chatwoot_account_id=_str('CHATWOOT_ACCOUNT_ID', defaults.chatwoot_account_id),
+            google_sheets_credentials=_str('GOOGLE_SHEETS_CREDENTIALS') or None,
+            google_sheets_spreadsheet_id=_str('GOOGLE_SHEETS_SPREADSHEET_ID') or None,
+            integration_timeout=_float('INTEGRATION_TIMEOUT', defaults.integration_timeout),
+            callback_workers=max(1, _int('CALLBACK_WORKERS', defaults.callback_workers)),
+            callback_queue_size=max(1, _int('CALLBACK_QUEUE_SIZE', defaults.callback_queue_size)),
+            callback_max_attempts=max(1, _int('CALLBACK_MAX_ATTEMPTS', defaults.callback_max_attempts)),
+            callback_backoff_base=_float('CALLBACK_BACKOFF_BASE', defaults.callback_backoff_base),
+            callback_backoff_max=_float('CALLBACK_BACKOFF_MAX', defaults.callback_backoff_max),
+            callback_progress_interval=_float('CALLBACK_PROGRESS_INTERVAL', defaults.callback_progress_interval),
+            callback_allowed_hosts=[host.lower() for host in _list('CALLBACK_ALLOWED_HOSTS')]
+        )
+
+
+# Instancia global, cargada una vez al importar
+settings = Settings.from_env()
@@ -1,17 +1,23 @@
 import sqlite3
-import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from config import settings
+from utils.compression import compress, decompress
+from utils.metrics import DB_QUERY_DURATION, timed
+from utils.serialization import dumps, loads
+
 logger = logging.getLogger(__name__)
 
 class JobDatabase:
-    def __init__(self, db_path: str = "/app/jobs.db"):
+    def __init__(self, db_path: str = "/app/jobs.db", compression_level: Optional[int] = None):
         self.db_path = db_path
+        self.compression_level = settings.results_compression_level if compression_level is None else compression_level
         self.init_db()
     
+    @timed(DB_QUERY_DURATION, operation='init_db')
     def init_db(self):
         """Inicializar base de datos"""
         try:
@@ -26,10 +32,22 @@ class JobDatabase:
                     results TEXT,
                     created_at TEXT,
                     updated_at TEXT,
-                    estimated_time INTEGER
+                    estimated_time INTEGER,
+                    profile TEXT,
+                    lead_count INTEGER,
+                    stop_reason TEXT
                 )
             ''')
             
+            # Migrar bases existentes sin columnas de perfil / conteo de leads / razón de parada
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(jobs)')]
+            if 'profile' not in columns:
+                cursor.execute('ALTER TABLE jobs ADD COLUMN profile TEXT')
+            if 'lead_count' not in columns:
+                cursor.execute('ALTER TABLE jobs ADD COLUMN lead_count INTEGER')
+            if 'stop_reason' not in columns:
+                cursor.execute('ALTER TABLE jobs ADD COLUMN stop_reason TEXT')
+            
             conn.commit()
             conn.close()
             logger.info("✅ Database initialized")
@@ -37,6 +55,16 @@ class JobDatabase:
         except Exception as e:
             logger.error(f"❌ Database init error: {e}")
     
+    def ping(self) -> bool:
+        """Verificar que la base de datos responde"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            conn.execute('SELECT 1 FROM jobs LIMIT 1')
+            return True
+        finally:
+            conn.close()
+    
+    @timed(DB_QUERY_DURATION, operation='create_job')
     def create_job(self, request_data: Dict) -> str:
         """Crear nuevo job"""
         try:
@@ -49,7 +77,7 @@ class JobDatabase:
             cursor.execute('''
                 INSERT INTO jobs (job_id, status, request_data, created_at, updated_at, estimated_time)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (job_id, "started", json.dumps(request_data), now, now, 5))
+            ''', (job_id, "started", dumps(request_data), now, now, 5))
             
             conn.commit()
             conn.close()
@@ -61,13 +89,17 @@ class JobDatabase:
             logger.error(f"❌ Create job error: {e}")
             return None
     
+    @timed(DB_QUERY_DURATION, operation='get_job_status')
     def get_job_status(self, job_id: str) -> Optional[Dict]:
         """Obtener status del job"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,))
+            cursor.execute('''
+                SELECT job_id, status, request_data, results, created_at, updated_at, estimated_time, stop_reason
+                FROM jobs WHERE job_id = ?
+            ''', (job_id,))
             row = cursor.fetchone()
             conn.close()
             
@@ -75,11 +107,12 @@ class JobDatabase:
                 return {
                     "job_id": row[0],
                     "status": row[1],
-                    "request_data": json.loads(row[2]) if row[2] else {},
-                    "results": json.loads(row[3]) if row[3] else None,
+                    "request_data": loads(row[2]) if row[2] else {},
+                    "results": loads(decompress(row[3])) if row[3] else None,
                     "created_at": row[4],
                     "updated_at": row[5],
-                    "estimated_time": row[6]
+                    "estimated_time": row[6],
+                    "stop_reason": row[7]
                 }
             return None
             
@@ -87,20 +120,22 @@ class JobDatabase:
             logger.error(f"❌ Get job error: {e}")
             return None
     
-    def update_job(self, job_id: str, status: str, results: List[Dict] = None):
-        """Actualizar job"""
+    @timed(DB_QUERY_DURATION, operation='update_job')
+    def update_job(self, job_id: str, status: str, results: List[Dict] = None, stop_reason: Optional[str] = None):
+        """Actualizar job (`stop_reason` si terminó antes de tiempo: resultados parciales)"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             now = datetime.now().isoformat()
-            results_json = json.dumps(results) if results else None
+            # Se guardan los bytes JSON (comprimidos); get_job_results_raw los devuelve sin decodificar
+            results_json = self._encode_results(results) if results else None
             
             cursor.execute('''
                 UPDATE jobs 
-                SET status = ?, results = ?, updated_at = ?
+                SET status = ?, results = ?, lead_count = ?, stop_reason = ?, updated_at = ?
                 WHERE job_id = ?
-            ''', (status, results_json, now, job_id))
+            ''', (status, results_json, len(results) if results else 0, stop_reason, now, job_id))
             
             conn.commit()
             conn.close()
@@ -110,5 +145,76 @@ class JobDatabase:
         except Exception as e:
             logger.error(f"❌ Update job error: {e}")
 
+    def _encode_results(self, results: List[Dict]) -> bytes:
+        payload = dumps(results)
+        return compress(payload, self.compression_level) if self.compression_level else payload
+
+    @timed(DB_QUERY_DURATION, operation='get_job_results_raw')
+    def get_job_results_raw(self, job_id: str) -> Optional[Tuple[str, Optional[bytes], int, Optional[str]]]:
+        """(status, resultados tal como están guardados, total de leads, razón de parada)
+
+        El payload puede venir comprimido: usar utils.compression.iter_decompress
+        para leerlo por bloques.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT status, results, lead_count, stop_reason FROM jobs WHERE job_id = ?', (job_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if not row:
+                return None
+            
+            status, results, lead_count, stop_reason = row
+            if isinstance(results, str):
+                results = results.encode('utf-8')
+            if results and lead_count is None:
+                # Filas anteriores a la columna lead_count
+                lead_count = len(loads(decompress(results)))
+            return status, results, lead_count or 0, stop_reason
+            
+        except Exception as e:
+            logger.error(f"❌ Get job results error: {e}")
+            return None
+
+    @timed(DB_QUERY_DURATION, operation='save_profile')
+    def save_profile(self, job_id: str, profile: Dict):
+        """Guardar perfil de ejecución del job"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'UPDATE jobs SET profile = ? WHERE job_id = ?',
+                (dumps(profile), job_id)
+            )
+            
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            logger.error(f"❌ Save profile error: {e}")
+    
+    @timed(DB_QUERY_DURATION, operation='get_profile')
+    def get_profile(self, job_id: str) -> Optional[Dict]:
+        """Obtener perfil de ejecución del job"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT profile FROM jobs WHERE job_id = ?', (job_id,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row and row[0]:
+                return loads(row[0])
+            return None
+            
+        except Exception as e:
+            logger.error(f"❌ Get profile error: {e}")
+            return None
+
 # Instancia global
-job_db = JobDatabase()
+job_db = JobDatabase(settings.jobs_db_path)
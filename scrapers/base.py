@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Base Lead Scraper
+Interfaz común que implementan todas las fuentes de leads
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class BaseLeadScraper(ABC):
+    """Contrato de una fuente: scraping async, probe de conexión y capacidades declaradas
+
+    `capabilities` describe lo que la fuente sabe hacer, p. ej.:
+        fields     campos que entrega cada lead
+        sectors    sectores con búsqueda específica (None = cualquiera)
+        locations  ubicaciones soportadas (None = cualquiera)
+
+    Una fuente que no implemente `scrape_leads` y `test_connection` falla con
+    TypeError al instanciarla (registry.create).
+    """
+
+    name: str = ''
+    capabilities: Dict = {}
+
+    @abstractmethod
+    async def scrape_leads(self, sector: str, location: str, max_leads: int = 10) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def test_connection(self) -> bool:
+        ...
+
+    async def test_single_search(self, sector: str, location: str, max_results: int = 1) -> List[Dict]:
+        return await self.scrape_leads(sector, location, max_results)
+
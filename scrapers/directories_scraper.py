@@ -7,18 +7,70 @@ Scraper para directorios empresariales mexicanos
 import asyncio
 import requests
 from bs4 import BeautifulSoup
-import time
-import random
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Tuple
 import re
 import logging
 from datetime import datetime
-from urllib.parse import quote_plus
+
+from config import Settings, settings
+from scrapers.base import BaseLeadScraper
+from utils.cache import TTLCache
+from utils.extraction import get_directories, get_template
+from utils.http_client import CircuitOpenError, fetcher
+from utils.job_control import remaining_requests
+from utils.metrics import LEADS_PER_PAGE, PARSE_TIME, track_time
+from utils.phone import phone_key
+from utils.profiling import profile_span
+from utils.single_flight import scrape_flights
 
 logger = logging.getLogger(__name__)
 
-class DirectoriesLeadScraper:
-    def __init__(self):
+
+class DirectoryQuery(NamedTuple):
+    """Una variante del plan: directorio × término × alias de ubicación"""
+    directory: str
+    term: str
+    alias: str
+    url: str
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.directory, self.term, self.alias)
+
+
+class QueryVariantStats:
+    """Aporte histórico de cada variante; las que nunca aportan leads nuevos se saltan
+
+    El historial expira (`ttl`), así una variante descartada se vuelve a probar
+    más adelante por si el directorio cambió.
+    """
+
+    def __init__(self, min_runs: int = 2, ttl: float = 24 * 3600):
+        self.min_runs = min_runs
+        self.history = TTLCache(ttl=ttl, max_size=20000)
+
+    def record(self, key: Tuple[str, str, str], new_leads: int):
+        runs, total = self.history.get(key, (0, 0))
+        self.history.set(key, (runs + 1, total + new_leads))
+
+    def is_redundant(self, key: Tuple[str, str, str]) -> bool:
+        runs, total = self.history.get(key, (0, 0))
+        return runs >= self.min_runs and total == 0
+
+
+# Historial compartido entre jobs
+variant_stats = QueryVariantStats()
+
+class DirectoriesLeadScraper(BaseLeadScraper):
+    name = "directories"
+    capabilities = {
+        'fields': ['name', 'phone', 'address', 'credit_potential'],
+        'sectors': ['Restaurantes', 'Talleres', 'Comercio', 'Servicios', 'Producción'],
+        'locations': ['Querétaro', 'Ciudad de México', 'Toluca', 'Naucalpan']
+    }
+
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
         self.session = requests.Session()
         self.leads = []
         
@@ -29,24 +81,9 @@ class DirectoriesLeadScraper:
             'Referer': 'https://www.google.com/'
         })
         
-        # Directorios empresariales mexicanos
-        self.directories = {
-            "seccion_amarilla": {
-                "base_url": "https://www.seccionamarilla.com.mx",
-                "search_pattern": "/buscar/{term}-{location}",
-                "business_selector": ".lister-item"
-            },
-            "paginas_amarillas": {
-                "base_url": "https://www.paginasamarillas.com.mx",
-                "search_pattern": "/{location}/{term}",
-                "business_selector": ".resultado"
-            },
-            "locatel": {
-                "base_url": "https://www.locatel.com.mx",
-                "search_pattern": "/busqueda/{term}-{location}",
-                "business_selector": ".business-item"
-            }
-        }
+        # Directorios empresariales mexicanos (scrapers/templates.json: URL, patrón de búsqueda y plantilla)
+        self.directories = get_directories()
+        self.directories["seccion_amarilla"]["base_url"] = self.config.seccion_amarilla_base_url
         
         # Sectores con términos específicos para directorios
         self.sector_terms = {
@@ -75,139 +112,160 @@ class DirectoriesLeadScraper:
             "Naucalpan": ["naucalpan", "naucalpan-estado-mexico"]
         }
 
-    async def test_single_search(self, sector: str, location: str, max_results: int = 1) -> List[Dict]:
-        """Test con una búsqueda simple"""
-        try:
-            return [{"name": f"Directorio {sector} en {location}", "source": "directories"}]
-        except Exception as e:
-            logger.error(f"Test search failed: {e}")
-            return []
+    async def test_connection(self) -> bool:
+        """Disponible si responde al menos un directorio"""
+        availability = await asyncio.to_thread(self.test_directory_availability)
+        return any(availability.values())
 
     async def scrape_leads(self, sector: str, location: str, max_leads: int = 30) -> List[Dict]:
-        """Scraping principal de directorios"""
+        """Scraping principal de directorios
+
+        Ejecuta el plan de búsqueda en paralelo (con un límite de requests
+        simultáneos por directorio) y va fusionando y deduplicando los
+        resultados conforme llegan; al juntar `max_leads` cancela el resto.
+        Cada búsqueda cuesta un request del presupuesto del job, así que el plan
+        se recorta a `max_leads` búsquedas y a los requests que le quedan al job.
+        """
+        tasks = []
         try:
             logger.info(f"📞 Iniciando scraping directorios: {sector} en {location}")
             
-            # Por ahora retornamos datos de ejemplo
-            sample_leads = [
-                {
-                    "name": f"Negocio {sector} {location}",
-                    "phone": "442-345-6789",
-                    "address": f"Calle Principal {location}",
-                    "sector": sector,
-                    "location": location,
-                    "source": "Directorio: Sección Amarilla",
-                    "credit_potential": "MEDIO",
-                    "extracted_at": datetime.now().isoformat()
-                }
-            ]
+            plan = self._build_query_plan(sector, location)
+            active = [query for query in plan if not variant_stats.is_redundant(query.key)] or plan
+            budget = remaining_requests()
+            active = active[:max_leads if budget is None else min(max_leads, budget)]
             
-            logger.info(f"✅ Directorios completado: {len(sample_leads)} leads")
-            return sample_leads
+            limits = {name: asyncio.Semaphore(self.config.directory_concurrency) for name in self.directories}
+            tasks = [asyncio.create_task(self._run_query(query, limits[query.directory])) for query in active]
+            
+            leads = []
+            seen = set()
+            
+            for next_done in asyncio.as_completed(tasks):
+                query, businesses = await next_done
+                if businesses is None:
+                    continue
+                
+                new_leads = 0
+                for business in businesses:
+                    key = self._dedup_key(business)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    business.update({
+                        'sector': sector,
+                        'location': location,
+                        'business_type': self._map_sector_to_business_type(sector)
+                    })
+                    leads.append(business)
+                    new_leads += 1
+                
+                variant_stats.record(query.key, new_leads)
+                if len(leads) >= max_leads:
+                    break
+            
+            logger.info(
+                f"✅ Directorios completado: {len(leads[:max_leads])} leads",
+                extra={'queries': len(active), 'skipped_queries': len(plan) - len(active)}
+            )
+            return leads[:max_leads]
             
         except Exception as e:
             logger.error(f"❌ Error en scraping directorios: {e}")
             return []
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    async def _search_directory(self, directory_name: str, config: Dict, term: str, location: str, max_results: int) -> List[Dict]:
+    def _build_query_plan(self, sector: str, location: str) -> List[DirectoryQuery]:
+        """Alias de ubicación × términos × directorios, intercalando directorios
+
+        El alias principal va primero: si el plan se recorta, se conservan todos
+        los términos antes que las variantes del nombre de la ubicación.
+        """
+        terms = self.sector_terms.get(sector) or [self._slugify(sector)]
+        aliases = self.location_mapping.get(location) or [self._slugify(location)]
+        
+        plan = []
+        for alias in aliases:
+            for term in terms:
+                for name, directory in self.directories.items():
+                    url = directory["base_url"] + directory["search_pattern"].format(term=term, location=alias)
+                    plan.append(DirectoryQuery(name, term, alias, url))
+        return plan
+
+    async def _run_query(self, query: DirectoryQuery, limit: asyncio.Semaphore) -> Tuple[DirectoryQuery, Optional[List[Dict]]]:
+        """Devuelve (query, negocios); None si la búsqueda falló (no cuenta como variante redundante)"""
+        async with limit:
+            try:
+                businesses = await scrape_flights.do(
+                    (f"directory:{query.directory}", query.term, query.alias, 1),
+                    lambda: self._search_directory(query.directory, self.directories[query.directory], query.url)
+                )
+                # scrape_leads completa cada negocio en el lugar: copias, no los compartidos
+                return query, [dict(business) for business in businesses]
+            except CircuitOpenError:
+                return query, None
+            except Exception as e:
+                logger.warning(f"Error buscando en {query.directory}: {e}")
+                return query, None
+
+    async def _search_directory(self, directory_name: str, directory: Dict, search_url: str) -> List[Dict]:
         """Busca en un directorio específico"""
-        try:
-            search_path = config["search_pattern"].format(term=term, location=location)
-            search_url = config["base_url"] + search_path
-            
-            logger.info(f"📍 Buscando en: {search_url}")
-            
-            response = self.session.get(search_url, timeout=15)
-            
-            if response.status_code != 200:
-                logger.warning(f"Error HTTP {response.status_code} en {directory_name}")
-                return []
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+        logger.debug("📍 Buscando en: %s", search_url)
+        
+        with profile_span('fetch', url=search_url):
+            response = await fetcher.get(search_url, source=f"directory:{directory_name}", timeout=self.config.fetch_timeout)
+        
+        if response.status_code != 200:
+            logger.debug("Error HTTP %s en %s", response.status_code, directory_name)
+            return []
+        
+        with track_time(PARSE_TIME, source='directories'):
+            with profile_span('parse', url=search_url):
+                soup = BeautifulSoup(response.content, 'html.parser')
             
             # Extraer negocios usando selectores específicos
-            businesses = self._extract_businesses_from_directory(soup, config, directory_name)
-            
-            return businesses[:max_results]
-            
-        except Exception as e:
-            logger.warning(f"Error buscando en {directory_name}: {e}")
-            return []
+            with profile_span('extract', url=search_url):
+                businesses = self._extract_businesses_from_directory(soup, directory, directory_name)
+        
+        LEADS_PER_PAGE.labels(source='directories').observe(len(businesses))
+        return businesses
+
+    def _dedup_key(self, business: Dict) -> str:
+        return phone_key(business.get('phone') or '') or business.get('name', '').lower()
+
+    def _slugify(self, text: str) -> str:
+        return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
 
     def _extract_businesses_from_directory(self, soup: BeautifulSoup, config: Dict, directory_name: str) -> List[Dict]:
-        """Extrae negocios usando selectores específicos del directorio"""
+        """Extrae negocios con la plantilla del directorio en una sola pasada"""
         businesses = []
         
         try:
-            business_elements = soup.select(config["business_selector"])
-            
-            logger.info(f"📊 {directory_name}: {len(business_elements)} elementos encontrados")
+            template = get_template(config["template"])
             
-            for element in business_elements:
-                try:
-                    business = {
-                        'source': directory_name,
-                        'extracted_at': datetime.now().isoformat()
-                    }
-                    
-                    # Extraer información básica
-                    element_text = element.get_text()
-                    
-                    # Buscar teléfonos
-                    phones = self._extract_phones_from_text(element_text)
-                    if phones:
-                        business['phone'] = phones[0]
-                    
-                    # Nombre genérico si no se encuentra específico
-                    business['name'] = f"Negocio en directorio {directory_name}"
-                    
-                    if business.get('phone'):
-                        businesses.append(business)
-                
-                except Exception as e:
+            for _, fields in template.extract(soup):
+                # Sin nombre no es un lead utilizable
+                if not fields['name']:
                     continue
+                businesses.append({
+                    'name': fields['name'],
+                    'phone': fields['phone'],
+                    'address': fields['address'],
+                    'website': fields['website'],
+                    'rating': fields['rating'],
+                    'source': directory_name,
+                    'extracted_at': datetime.now().isoformat()
+                })
+            
+            logger.debug("📊 %s: %d negocios extraídos", directory_name, len(businesses))
         
         except Exception as e:
             logger.warning(f"Error en extracción específica: {e}")
         
         return businesses
 
-    def _extract_phones_from_text(self, text: str) -> List[str]:
-        """Extrae teléfonos mexicanos del texto"""
-        phone_patterns = [
-            r'\+52\s*\d{2}\s*\d{4}\s*\d{4}',
-            r'\(\d{2,3}\)\s*\d{3,4}[-\s]?\d{4}',
-            r'\d{2,3}[-\s]?\d{3,4}[-\s]?\d{4}',
-            r'\b\d{10}\b',
-        ]
-        
-        phones = []
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text)
-            phones.extend(matches)
-        
-        # Filtrar teléfonos válidos
-        valid_phones = []
-        for phone in phones:
-            cleaned_phone = self._clean_phone(phone)
-            if cleaned_phone and len(re.sub(r'\D', '', cleaned_phone)) >= 10:
-                valid_phones.append(cleaned_phone)
-        
-        return list(set(valid_phones))
-
-    def _clean_phone(self, phone_text: str) -> str:
-        """Limpia y valida números de teléfono"""
-        if not phone_text:
-            return ''
-        
-        cleaned = re.sub(r'[^\d+\s\-\(\)]', '', phone_text.strip())
-        digits_only = re.sub(r'\D', '', cleaned)
-        
-        if 10 <= len(digits_only) <= 13:
-            return cleaned
-        
-        return ''
-
     def _map_sector_to_business_type(self, sector: str) -> str:
         """Mapea sector a tipo de negocio"""
         mapping = {
@@ -229,7 +287,7 @@ class DirectoriesLeadScraper:
         
         for name, config in self.directories.items():
             try:
-                response = self.session.get(config["base_url"], timeout=10)
+                response = self.session.get(config["base_url"], timeout=self.config.health_probe_timeout)
                 availability[name] = response.status_code == 200
                 logger.info(f"📊 {name}: {'✅ Disponible' if availability[name] else '❌ No disponible'}")
             except Exception as e:
@@ -1,41 +1,30 @@
 #!/usr/bin/env python3
 """
 Sección Amarilla Lead Scraper - DATOS MEXICANOS REALES
-Scraper para negocios PyME verificados de México
+Scraper para negocios PyME verificados de México (fuente "seccion_amarilla")
 """
 
 import asyncio
-import time
 import random
 from typing import List, Dict, Optional
 import requests
 from bs4 import BeautifulSoup
 import logging
 from datetime import datetime
-import re
-from urllib.parse import quote_plus, urljoin
+
+from config import Settings, settings
+from scrapers.base import BaseLeadScraper
+from utils.extraction import get_template
+from utils.http_client import CircuitOpenError, fetcher
+from utils.metrics import LEADS_PER_PAGE, PARSE_TIME, track_time
+from utils.phone import phone_key
+from utils.profiling import profile_span
+from utils.single_flight import scrape_flights
 
 logger = logging.getLogger(__name__)
 
-class GoogleMapsLeadScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.base_url = "https://www.seccionamarilla.com.mx"
-        self.leads = []
-        
-        # Headers para parecer navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
-        
-        # Mapeo de sectores a categorías de Sección Amarilla
-       self.sector_categories = {
+# Mapeo de sectores a categorías de Sección Amarilla
+SECTOR_CATEGORIES = {
     'Restaurantes': [
         'restaurantes',
         'comida-rapida',
@@ -58,10 +47,60 @@ class GoogleMapsLeadScraper:
     ]
 }
 
-    def test_connection(self) -> bool:
+LOCATION_MAPPING = {
+    'Querétaro': 'queretaro/zona-metropolitana',
+    'Ciudad de México': 'distrito-federal/zona-metropolitana',
+    'Guadalajara': 'jalisco/zona-metropolitana',
+    'Monterrey': 'nuevo-leon/zona-metropolitana'
+}
+
+
+class SeccionAmarillaLeadScraper(BaseLeadScraper):
+    """Motor multi-categoría y multi-ciudad: todas las categorías de un sector en paralelo
+
+    Primero descarga la página 1 de cada categoría; si no alcanza, sigue
+    paginando solo las categorías que rindieron. El cupo de `max_leads` se
+    reparte en proporción a lo que aportó cada categoría.
+    """
+    
+    name = "seccion_amarilla"
+    capabilities = {
+        'fields': ['name', 'phone', 'address', 'website', 'business_type', 'credit_potential', 'contact_priority'],
+        'sectors': list(SECTOR_CATEGORIES),
+        'locations': list(LOCATION_MAPPING)
+    }
+    
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
+        self.session = requests.Session()
+        self.base_url = self.config.seccion_amarilla_base_url
+        self.template = get_template('seccion_amarilla')
+        self.leads = []
+        
+        # Headers para parecer navegador real
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        })
+        
+        # Mapeo de sectores a categorías de Sección Amarilla
+        self.sector_categories = SECTOR_CATEGORIES
+        
+        # Mapear ubicaciones a formato de Sección Amarilla
+        self.location_mapping = LOCATION_MAPPING
+        
+        # Páginas por categoría como máximo
+        self.max_pages = self.config.seccion_amarilla_max_pages
+
+    async def test_connection(self) -> bool:
         """Testa la conexión a Sección Amarilla"""
         try:
-            response = self.session.get(self.base_url, timeout=15)
+            response = await asyncio.to_thread(self.session.get, self.base_url, timeout=self.config.health_probe_timeout)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Test connection failed: {e}")
@@ -71,8 +110,8 @@ class GoogleMapsLeadScraper:
         """Test con una búsqueda en Sección Amarilla"""
         try:
             category = self.sector_categories.get(sector, [sector.lower()])[0]
-            results = await self._search_seccion_amarilla(category, location, max_results)
-            return results
+            results = await self._search_seccion_amarilla(category, location, 1)
+            return self._process_leads(results[:max_results], sector, location)
         except Exception as e:
             logger.error(f"Test search failed: {e}")
             return []
@@ -82,229 +121,131 @@ class GoogleMapsLeadScraper:
         try:
             logger.info(f"🎯 Iniciando scraping REAL: {sector} en {location}")
             
-            all_leads = []
             categories = self.sector_categories.get(sector, [sector.lower()])
+            found: Dict[str, List[Dict]] = {category: [] for category in categories}
+            seen = set()
             
-            # Probar múltiples categorías
-            for category in categories[:3]:
-                try:
-                    logger.info(f"🔍 Buscando categoría: {category}")
-                    
-                    leads_batch = await self._search_seccion_amarilla(category, location, max_leads // 3)
-                    
-                    if leads_batch:
-                        all_leads.extend(leads_batch)
-                        logger.info(f"✅ Encontrados {len(leads_batch)} leads en {category}")
-                    
-                    # Pausa entre búsquedas
-                    await asyncio.sleep(random.uniform(3, 8))
-                    
-                    if len(all_leads) >= max_leads:
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"❌ Error en categoría {category}: {e}")
-                    continue
+            # Ronda 1: página 1 de todas las categorías; luego solo las que rindieron en la ronda anterior
+            active = list(categories)
+            page = 1
+            while active and page <= self.max_pages:
+                batches = await asyncio.gather(*[
+                    self._search_seccion_amarilla(category, location, page) for category in active
+                ])
+                
+                productive = []
+                for category, batch in zip(active, batches):
+                    new_leads = 0
+                    for lead in batch:
+                        key = self._dedup_key(lead)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        found[category].append(lead)
+                        new_leads += 1
+                    if new_leads:
+                        productive.append(category)
+                
+                if sum(len(leads) for leads in found.values()) >= max_leads:
+                    break
+                active = productive
+                page += 1
+            
+            quotas = self._split_by_yield(max_leads, {category: len(leads) for category, leads in found.items()})
+            all_leads = [lead for category in categories for lead in found[category][:quotas[category]]]
             
             # Procesar leads
             processed_leads = self._process_leads(all_leads, sector, location)
             
-            logger.info(f"✅ Scraping completado: {len(processed_leads)} leads")
+            logger.info(
+                f"✅ Scraping completado: {len(processed_leads)} leads",
+                extra={'pages': page, 'yield_by_category': {category: len(leads) for category, leads in found.items()}}
+            )
             return processed_leads[:max_leads]
             
         except Exception as e:
             logger.error(f"❌ Error general: {e}")
             return []
 
-     async def _search_seccion_amarilla(self, category: str, location: str, max_results: int) -> List[Dict]:
-    """Buscar en Sección Amarilla con URL específica"""
-    try:
-        # Mapear ubicaciones a formato de Sección Amarilla
-        location_mapping = {
-            'Querétaro': 'queretaro/zona-metropolitana',
-            'Ciudad de México': 'distrito-federal/zona-metropolitana',
-            'Guadalajara': 'jalisco/zona-metropolitana',
-            'Monterrey': 'nuevo-leon/zona-metropolitana'
-        }
-        
-        # Obtener ubicación formateada
-        formatted_location = location_mapping.get(location, 'queretaro/zona-metropolitana')
+    def _split_by_yield(self, max_leads: int, yields: Dict[str, int]) -> Dict[str, int]:
+        """Reparte `max_leads` en proporción al rendimiento de cada categoría (mayor residuo)"""
+        total = sum(yields.values())
+        if total <= max_leads:
+            return dict(yields)
         
-        # Construir URL específica
-        search_url = f"{self.base_url}/resultados/{category}/{formatted_location}/1"
-        
-        logger.info(f"🔍 Buscando en: {search_url}")
-        
-        # Simular comportamiento humano
-        await asyncio.sleep(random.uniform(2, 5))
+        shares = {category: max_leads * count / total for category, count in yields.items()}
+        quotas = {category: int(share) for category, share in shares.items()}
+        leftover = max_leads - sum(quotas.values())
+        for category in sorted(shares, key=lambda c: shares[c] - quotas[c], reverse=True)[:leftover]:
+            quotas[category] += 1
+        return quotas
+
+    def _dedup_key(self, lead: Dict) -> str:
+        return phone_key(lead.get('phone') or '') or (lead.get('name') or '').lower()
+
+    async def _search_seccion_amarilla(self, category: str, location: str, page: int = 1) -> List[Dict]:
+        """Buscar en Sección Amarilla con URL específica (página compartida entre jobs concurrentes)"""
+        try:
+            # Obtener ubicación formateada
+            formatted_location = self.location_mapping.get(location, 'queretaro/zona-metropolitana')
+            
+            # Construir URL específica
+            search_url = f"{self.base_url}/resultados/{category}/{formatted_location}/{page}"
+            
+            results = await scrape_flights.do(
+                ('seccion_amarilla', category, formatted_location, page),
+                lambda: self._fetch_results(search_url, category)
+            )
+            return [dict(result) for result in results]
+            
+        except CircuitOpenError as e:
+            logger.warning(f"⏭️ {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error en búsqueda Sección Amarilla: {e}")
+            return []
+
+    async def _fetch_results(self, search_url: str, category: str) -> List[Dict]:
+        logger.debug("🔍 Buscando en: %s", search_url)
         
-        response = self.session.get(search_url, timeout=20)
+        with profile_span('fetch', url=search_url):
+            response = await fetcher.get(search_url, source='seccion_amarilla', timeout=self.config.fetch_timeout)
         
         if response.status_code != 200:
-            logger.warning(f"HTTP {response.status_code} para {search_url}")
+            logger.debug("HTTP %s para %s", response.status_code, search_url)
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extraer resultados
-        results = await self._extract_businesses(soup, max_results)
+        with track_time(PARSE_TIME, source='seccion_amarilla'):
+            with profile_span('parse', url=search_url):
+                soup = BeautifulSoup(response.content, 'html.parser')
+            
+            # Extraer resultados
+            with profile_span('extract', url=search_url):
+                results = self._extract_businesses(soup, category)
         
+        LEADS_PER_PAGE.labels(source='seccion_amarilla').observe(len(results))
         return results
-        
-    except Exception as e:
-        logger.error(f"Error en búsqueda Sección Amarilla: {e}")
-        return []
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda Sección Amarilla: {e}")
-            return []
 
-    async def _extract_businesses(self, soup: BeautifulSoup, max_results: int) -> List[Dict]:
-        """Extraer negocios de Sección Amarilla"""
+    def _extract_businesses(self, soup: BeautifulSoup, category: str) -> List[Dict]:
+        """Extraer negocios de Sección Amarilla con la plantilla de filas (scrapers/templates.json)"""
         businesses = []
         
-        try:
-            # Selectores para elementos de negocio
-            business_selectors = [
-                'div.listing-item',
-                'div.business-item',
-                'div.result-item',
-                'article.business',
-                'div.empresa'
-            ]
-            
-            business_elements = []
-            for selector in business_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    business_elements = elements
-                    logger.info(f"✅ Usando selector: {selector}, encontrados {len(elements)} elementos")
-                    break
-            
-            if not business_elements:
-                logger.warning("❌ No se encontraron elementos de negocio")
-                return []
-            
-            for i, element in enumerate(business_elements[:max_results]):
-                try:
-                    business_data = await self._extract_business_info(element)
-                    
-                    if business_data:
-                        businesses.append(business_data)
-                        logger.info(f"✅ Negocio {i+1}: {business_data.get('name', 'Sin nombre')}")
-                    
-                except Exception as e:
-                    logger.warning(f"Error extrayendo negocio {i+1}: {e}")
-                    continue
+        for _, fields in self.template.extract(soup):
+            # Solo retornar si tiene información útil
+            if not fields['name'] or not (fields['phone'] or fields['address']):
+                continue
             
-        except Exception as e:
-            logger.error(f"Error en extracción: {e}")
-        
-        return businesses
-
-    async def _extract_business_info(self, element) -> Optional[Dict]:
-        """Extraer información específica del negocio"""
-        try:
-            business = {
+            businesses.append({
+                'name': fields['name'],
+                'phone': fields['phone'],
+                'address': fields['address'],
+                'website': fields['website'],
+                'business_type': category.replace('-', ' ').capitalize(),
                 'extracted_at': datetime.now().isoformat(),
                 'source': 'Sección Amarilla'
-            }
-            
-            # Extraer nombre
-            name_selectors = [
-                'h2.business-name',
-                'h3.title',
-                '.company-name',
-                '.business-title',
-                'h2 a',
-                'h3 a'
-            ]
-            
-            for selector in name_selectors:
-                name_elem = element.select_one(selector)
-                if name_elem:
-                    business['name'] = name_elem.get_text().strip()
-                    break
-            
-            # Extraer teléfono
-            phone_selectors = [
-                '.phone',
-                '.telefono',
-                '.contact-phone',
-                '.business-phone'
-            ]
-            
-            for selector in phone_selectors:
-                phone_elem = element.select_one(selector)
-                if phone_elem:
-                    phone_text = phone_elem.get_text().strip()
-                    cleaned_phone = self._clean_phone(phone_text)
-                    if cleaned_phone:
-                        business['phone'] = cleaned_phone
-                        break
-            
-            # Si no encontró teléfono en elementos específicos, buscar en texto
-            if not business.get('phone'):
-                text_content = element.get_text()
-                phone_match = re.search(r'\b\d{2,3}[-\s]?\d{3}[-\s]?\d{4}\b', text_content)
-                if phone_match:
-                    business['phone'] = self._clean_phone(phone_match.group())
-            
-            # Extraer dirección
-            address_selectors = [
-                '.address',
-                '.direccion',
-                '.business-address',
-                '.location'
-            ]
-            
-            for selector in address_selectors:
-                addr_elem = element.select_one(selector)
-                if addr_elem:
-                    business['address'] = addr_elem.get_text().strip()
-                    break
-            
-            # Extraer categoría/tipo de negocio
-            category_selectors = [
-                '.category',
-                '.categoria',
-                '.business-type',
-                '.giro'
-            ]
-            
-            for selector in category_selectors:
-                cat_elem = element.select_one(selector)
-                if cat_elem:
-                    business['business_type'] = cat_elem.get_text().strip()
-                    break
-            
-            # Solo retornar si tiene información útil
-            if business.get('name') and (business.get('phone') or business.get('address')):
-                return business
-            
-            return None
-            
-        except Exception as e:
-            logger.warning(f"Error extrayendo info del negocio: {e}")
-            return None
-
-    def _clean_phone(self, phone: str) -> str:
-        """Limpiar y formatear teléfono mexicano"""
-        if not phone:
-            return ""
-        
-        # Extraer solo números
-        numbers = re.sub(r'[^\d]', '', phone)
-        
-        # Formatear según longitud
-        if len(numbers) == 10:
-            return f"({numbers[:3]}) {numbers[3:6]}-{numbers[6:]}"
-        elif len(numbers) == 12 and numbers.startswith('52'):
-            return f"({numbers[2:5]}) {numbers[5:8]}-{numbers[8:]}"
-        elif len(numbers) >= 10:
-            return f"({numbers[:3]}) {numbers[3:6]}-{numbers[6:10]}"
+            })
         
-        return phone
+        return businesses
 
     def _process_leads(self, leads: List[Dict], sector: str, location: str) -> List[Dict]:
         """Procesar leads de Sección Amarilla"""
@@ -323,7 +264,9 @@ class GoogleMapsLeadScraper:
                 enhanced_lead = {
                     'name': lead.get('name', ''),
                     'phone': lead.get('phone', ''),
-                    'email': self._generate_email(lead.get('name', '')),
+                    # El email real lo completa el enriquecimiento web a partir de `website`
+                    'email': None,
+                    'website': lead.get('website'),
                     'address': lead.get('address', ''),
                     'business_type': lead.get('business_type', ''),
                     'sector': sector,
@@ -344,23 +287,6 @@ class GoogleMapsLeadScraper:
         
         return processed
 
-    def _generate_email(self, business_name: str) -> str:
-        """Generar email probable"""
-        if not business_name:
-            return ""
-        
-        clean_name = re.sub(r'[^a-zA-Z\s]', '', business_name.lower())
-        words = clean_name.split()
-        
-        domains = ['gmail.com', 'hotmail.com', 'yahoo.com.mx', 'outlook.com']
-        
-        if len(words) >= 2:
-            return f"{words[0]}.{words[1]}@{random.choice(domains)}"
-        elif len(words) == 1:
-            return f"{words[0]}@{random.choice(domains)}"
-        
-        return ""
-
     def _calculate_credit_potential(self, business: Dict, sector: str) -> str:
         """Calcular potencial crediticio"""
         score = 0
@@ -6,19 +6,57 @@ Scraper para encontrar vendedores PyME establecidos
 
 import asyncio
 import requests
-from bs4 import BeautifulSoup
-import time
-import random
-from typing import List, Dict, Optional
-import re
+from typing import AsyncIterator, List, Dict, Optional, Set
 import logging
+import unicodedata
 from datetime import datetime
 from urllib.parse import quote_plus
 
+from config import Settings, settings
+from scrapers.base import BaseLeadScraper
+from utils.cache import TTLCache
+from utils.http_client import CircuitOpenError, FetchError, fetcher
+from utils.single_flight import scrape_flights
+
 logger = logging.getLogger(__name__)
 
-class MercadoLibreLeadScraper:
-    def __init__(self):
+# Máximo de ids por request en /users?ids= y tamaño de lote de perfiles
+SELLER_BATCH_SIZE = 20
+
+# La búsqueda pública no pagina más allá de este offset
+MAX_SEARCH_OFFSET = 1000
+# Fallos de una página o lote (red, HTTP, JSON inválido): se registran y se sigue con lo demás
+PAGE_ERRORS = (FetchError, requests.RequestException, ValueError)
+
+# Ubicación pedida → nombres de estado como los reporta MercadoLibre (normalizados)
+LOCATION_STATES = {
+    "queretaro": {"queretaro"},
+    "ciudad de mexico": {"ciudad de mexico", "distrito federal", "cdmx"},
+    "cdmx": {"ciudad de mexico", "distrito federal", "cdmx"},
+    "estado de mexico": {"estado de mexico"},
+    "toluca": {"estado de mexico"},
+    "naucalpan": {"estado de mexico"}
+}
+
+# Perfiles de vendedor compartidos entre jobs (MERCADOLIBRE_SELLER_CACHE_TTL)
+seller_cache = TTLCache(ttl=settings.mercadolibre_seller_cache_ttl, max_size=50000)
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas y sin acentos, para comparar nombres de estado"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+class MercadoLibreLeadScraper(BaseLeadScraper):
+    name = "mercadolibre"
+    capabilities = {
+        'fields': ['name', 'website', 'seller_id', 'credit_potential', 'total_sales', 'seller_rating'],
+        'sectors': ['Comercio', 'Servicios', 'Producción', 'Restaurantes', 'Talleres'],
+        'locations': ['Querétaro', 'Ciudad de México', 'Estado de México']
+    }
+
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
         self.session = requests.Session()
         self.leads = []
         
@@ -50,45 +88,211 @@ class MercadoLibreLeadScraper:
             }
         }
         
-        self.target_states = [
-            "querétaro", "ciudad de méxico", "estado de méxico", "cdmx"
-        ]
+        self.target_states = {
+            _normalize(state) for state in ["querétaro", "ciudad de méxico", "distrito federal", "estado de méxico", "cdmx"]
+        }
+        
+        self.api_url = self.config.mercadolibre_api_url
 
-    async def test_single_search(self, category: str, location: str, max_results: int = 1) -> List[Dict]:
-        """Test con una búsqueda simple"""
+    async def test_connection(self) -> bool:
         try:
-            return [{"name": f"Vendedor {category} en {location}", "source": "mercadolibre"}]
+            url = f"{self.api_url}/sites/{self.config.mercadolibre_site_id}"
+            response = await asyncio.to_thread(self.session.get, url, timeout=self.config.health_probe_timeout)
+            return response.status_code == 200
         except Exception as e:
-            logger.error(f"Test search failed: {e}")
-            return []
+            logger.error(f"Test connection failed: {e}")
+            return False
 
     async def scrape_leads(self, sector: str, location: str, max_leads: int = 30) -> List[Dict]:
-        """Scraping principal de vendedores PyME"""
+        """Scraping principal de vendedores PyME
+
+        Recorre los listados de búsqueda página por página, descarta en el
+        momento los vendedores fuera de los estados objetivo y resuelve los
+        perfiles de vendedor en lotes (multi-get), solapando cada lote con la
+        descarga de la siguiente página.
+        """
+        lookup: Optional[asyncio.Task] = None
+        leads = []
         try:
             logger.info(f"🛒 Iniciando scraping MercadoLibre: {sector} en {location}")
             
-            # Por ahora retornamos datos de ejemplo
-            sample_sellers = [
-                {
-                    "name": f"Tienda {sector} {location}",
-                    "phone": "442-234-5678",
-                    "email": "tienda@email.com",
-                    "sector": sector,
-                    "location": location,
-                    "source": "MercadoLibre",
-                    "credit_potential": "MEDIO",
-                    "total_sales": 500,
-                    "seller_rating": 4.5,
-                    "extracted_at": datetime.now().isoformat()
-                }
-            ]
+            category_info = self._map_sector_to_category(sector) or {
+                "terms": [sector.lower()],
+                "credit_potential": "MEDIO",
+                "business_type": sector
+            }
+            states = self._states_for_location(location)
+            if not states:
+                # Filtrar por otros estados daría vendedores de donde no se pidió
+                logger.warning(f"⏭️ MercadoLibre: {location} no es una ubicación objetivo; se omite")
+                return []
             
-            logger.info(f"✅ MercadoLibre completado: {len(sample_sellers)} vendedores")
-            return sample_sellers
+            batch: Dict[int, Dict] = {}
+            seen_sellers = set()
             
+            async for listing in self._stream_listings(category_info["terms"], states):
+                seller_id = (listing.get('seller') or {}).get('id')
+                if seller_id is None or seller_id in seen_sellers:
+                    continue
+                seen_sellers.add(seller_id)
+                batch[seller_id] = listing
+                
+                if len(batch) >= SELLER_BATCH_SIZE:
+                    if lookup:
+                        leads.extend(await lookup)
+                    if len(leads) >= max_leads:
+                        lookup = None
+                        break
+                    lookup = asyncio.create_task(self._resolve_sellers(batch, sector, category_info))
+                    batch = {}
+            
+            if lookup:
+                leads.extend(await lookup)
+                lookup = None
+            if batch and len(leads) < max_leads:
+                leads.extend(await self._resolve_sellers(batch, sector, category_info))
+            
+            leads = leads[:max_leads]
+            logger.info(
+                f"✅ MercadoLibre completado: {len(leads)} vendedores",
+                extra={'sellers_seen': len(seen_sellers), 'seller_cache': seller_cache.stats()}
+            )
+            return leads
+            
+        except CircuitOpenError as e:
+            logger.warning(f"⏭️ {e}")
+            return leads[:max_leads]
         except Exception as e:
             logger.error(f"❌ Error en scraping MercadoLibre: {e}")
-            return []
+            return leads[:max_leads]
+        finally:
+            if lookup:
+                lookup.cancel()
+
+    async def _get_json(self, url: str):
+        headers = {'Accept': 'application/json'}
+        if self.config.mercadolibre_access_token:
+            headers['Authorization'] = f"Bearer {self.config.mercadolibre_access_token}"
+        
+        response = await fetcher.get(url, source='mercadolibre', timeout=self.config.fetch_timeout, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def _stream_listings(self, terms: List[str], states: Set[str]) -> AsyncIterator[Dict]:
+        """Listados de búsqueda ya filtrados por estado del vendedor"""
+        page_size = self.config.mercadolibre_page_size
+        
+        for term in terms:
+            for page in range(self.config.mercadolibre_max_pages):
+                offset = page * page_size
+                url = (f"{self.api_url}/sites/{self.config.mercadolibre_site_id}/search"
+                       f"?q={quote_plus(term)}&offset={offset}&limit={page_size}")
+                # La página de búsqueda solo se lee: se comparte tal cual entre jobs
+                try:
+                    data = await scrape_flights.do(
+                        ('mercadolibre', term, self.config.mercadolibre_site_id, page),
+                        lambda: self._get_json(url)
+                    )
+                except PAGE_ERRORS as e:
+                    logger.warning(f"⚠️ MercadoLibre: falló la página {page + 1} de '{term}', se sigue con el siguiente término: {e}")
+                    break
+                results = data.get('results') or []
+                
+                for listing in results:
+                    if _normalize(self._listing_state(listing)) in states:
+                        yield listing
+                
+                total = min((data.get('paging') or {}).get('total', 0), MAX_SEARCH_OFFSET)
+                if not results or offset + page_size >= total:
+                    break
+
+    def _listing_state(self, listing: Dict) -> str:
+        seller_address = listing.get('seller_address') or {}
+        state = (seller_address.get('state') or {}).get('name')
+        return state or (listing.get('address') or {}).get('state_name') or ''
+
+    def _listing_city(self, listing: Dict) -> str:
+        seller_address = listing.get('seller_address') or {}
+        city = (seller_address.get('city') or {}).get('name')
+        return city or (listing.get('address') or {}).get('city_name') or ''
+
+    async def _get_sellers(self, seller_ids: List[int]) -> Dict[int, Dict]:
+        """Perfiles de vendedor: cache por id y multi-get de hasta 20 ids por request para los faltantes"""
+        profiles = {}
+        missing = []
+        for seller_id in seller_ids:
+            profile = seller_cache.get(seller_id)
+            if profile is None:
+                missing.append(seller_id)
+            else:
+                profiles[seller_id] = profile
+        
+        chunks = [missing[i:i + SELLER_BATCH_SIZE] for i in range(0, len(missing), SELLER_BATCH_SIZE)]
+        responses = await asyncio.gather(*[
+            self._get_json(f"{self.api_url}/users?ids={','.join(str(seller_id) for seller_id in chunk)}")
+            for chunk in chunks
+        ], return_exceptions=True)
+        
+        for chunk, entries in zip(chunks, responses):
+            if isinstance(entries, PAGE_ERRORS):
+                logger.warning(f"⚠️ MercadoLibre: falló el lote de {len(chunk)} vendedores: {entries}")
+                continue
+            if isinstance(entries, BaseException):
+                raise entries
+            for entry in entries or []:
+                body = entry.get('body') or {}
+                if entry.get('code') == 200 and body.get('id') is not None:
+                    seller_cache.set(body['id'], body)
+                    profiles[body['id']] = body
+        
+        return profiles
+
+    async def _resolve_sellers(self, listings: Dict[int, Dict], sector: str, category_info: Dict) -> List[Dict]:
+        profiles = await self._get_sellers(list(listings))
+        leads = []
+        
+        for seller_id, listing in listings.items():
+            profile = profiles.get(seller_id)
+            if not profile:
+                continue
+            
+            seller = self._build_seller(profile, listing)
+            if not self._is_viable_pyme_seller(seller):
+                continue
+            
+            leads.append({
+                "name": seller['store_name'],
+                "phone": None,
+                "website": profile.get('permalink'),
+                "seller_id": seller_id,
+                "sector": sector,
+                "location": seller['seller_location'],
+                "source": "MercadoLibre",
+                "business_type": category_info.get('business_type'),
+                "credit_potential": self._calculate_seller_credit_potential(seller, category_info),
+                "total_sales": seller['total_sales'],
+                "seller_rating": seller['seller_rating'],
+                "extracted_at": datetime.now().isoformat()
+            })
+        
+        return leads
+
+    def _build_seller(self, profile: Dict, listing: Dict) -> Dict:
+        reputation = profile.get('seller_reputation') or {}
+        transactions = reputation.get('transactions') or {}
+        ratings = transactions.get('ratings') or {}
+        
+        return {
+            'store_name': profile.get('nickname') or (listing.get('seller') or {}).get('nickname') or '',
+            'total_sales': transactions.get('completed') or transactions.get('total') or 0,
+            # Proporción de calificaciones positivas (0-1) llevada a escala de 5 estrellas
+            'seller_rating': round(5 * ratings.get('positive', 0), 2),
+            'seller_location': f"{self._listing_city(listing)}, {self._listing_state(listing)}".strip(', ')
+        }
+
+    def _states_for_location(self, location: str) -> Set[str]:
+        """Estados a aceptar: los de la ubicación pedida que sean estados objetivo (vacío si ninguno)"""
+        return (LOCATION_STATES.get(_normalize(location)) or set()) & self.target_states
 
     def _map_sector_to_category(self, sector: str) -> Optional[Dict]:
         """Mapea sectores de negocio a categorías de MercadoLibre"""
@@ -106,7 +310,7 @@ class MercadoLibreLeadScraper:
         """Determina si un vendedor es viable para crédito PyME"""
         store_name = seller.get('store_name', '').lower()
         total_sales = seller.get('total_sales', 0)
-        seller_location = seller.get('seller_location', '').lower()
+        seller_location = _normalize(seller.get('seller_location', ''))
         
         # Filtros básicos
         if not store_name or len(store_name) < 3:
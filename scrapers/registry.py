@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Source Registry
+Catálogo de fuentes de leads disponibles para /scrape
+"""
+
+import logging
+from typing import Callable, Dict, List
+
+from scrapers.base import BaseLeadScraper
+from scrapers.directories_scraper import DirectoriesLeadScraper
+from scrapers.google_maps_scraper import SeccionAmarillaLeadScraper
+from scrapers.mercadolibre_scraper import MercadoLibreLeadScraper
+from scrapers.seccion_amarilla_simple import GoogleMapsLeadScraper
+
+logger = logging.getLogger(__name__)
+
+
+class SourceRegistry:
+    """Mapea nombre de fuente → fábrica de scrapers (un scraper nuevo por búsqueda)"""
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], BaseLeadScraper]] = {}
+        self.capabilities: Dict[str, Dict] = {}
+
+    def register(self, name: str, factory: Callable[[], BaseLeadScraper], capabilities: Dict = None):
+        self.factories[name] = factory
+        self.capabilities[name] = capabilities if capabilities is not None else getattr(factory, 'capabilities', {})
+
+    def names(self) -> List[str]:
+        return list(self.factories)
+
+    def create(self, name: str) -> BaseLeadScraper:
+        if name not in self.factories:
+            raise KeyError(f"Fuente no registrada: {name}")
+        return self.factories[name]()
+
+    def describe(self) -> Dict[str, Dict]:
+        return {name: dict(capabilities) for name, capabilities in self.capabilities.items()}
+
+
+# Instancia global
+source_registry = SourceRegistry()
+source_registry.register("google_maps", GoogleMapsLeadScraper)
+source_registry.register("mercadolibre", MercadoLibreLeadScraper)
+source_registry.register("directories", DirectoriesLeadScraper)
+source_registry.register("seccion_amarilla", SeccionAmarillaLeadScraper)
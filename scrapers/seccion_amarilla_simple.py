@@ -7,20 +7,40 @@ CON ESTRUCTURA HTML CORRECTA: span itemprop="name" + small class="short_address"
 import asyncio
 import time
 import random
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
 import logging
 from datetime import datetime
 import re
 
+from config import Settings, settings
+from scrapers.base import BaseLeadScraper
+from utils.extraction import get_template
+from utils.http_client import CircuitOpenError, fetcher
+from utils.lead import Lead, SectorProfile, sector_profile
+from utils.logging_config import log_sampler
+from utils.metrics import PARSE_TIME, LEADS_PER_PAGE, track_time
+from utils.phone import format_phone
+from utils.profiling import profile_span
+from utils.single_flight import scrape_flights
+
 # Logger setup
 logger = logging.getLogger(__name__)
 
-class GoogleMapsLeadScraper:
+class GoogleMapsLeadScraper(BaseLeadScraper):
     """Scraper funcional con estructura HTML correcta"""
     
-    def __init__(self):
+    name = "google_maps"
+    capabilities = {
+        'fields': ['name', 'phone', 'address', 'credit_potential', 'estimated_revenue', 'loan_range'],
+        'sectors': ['Contadores', 'Abogados', 'Arquitectos', 'Médicos', 'Dentistas', 'Ingenieros', 'Consultores', 'Publicidad', 'Marketing'],
+        'locations': ['Ciudad de México']
+    }
+    
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -31,19 +51,19 @@ class GoogleMapsLeadScraper:
             'Upgrade-Insecure-Requests': '1'
         })
         self.extracted_leads = set()
+        self.base_url = self.config.seccion_amarilla_base_url
+        self.template = get_template('seccion_amarilla')
+        self._profiles: Dict[str, SectorProfile] = {}
 
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         try:
-            response = self.session.get("https://www.google.com", timeout=10)
+            response = await asyncio.to_thread(self.session.get, "https://www.google.com", timeout=self.config.health_probe_timeout)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Test connection failed: {e}")
             return False
 
-    async def test_single_search(self, sector: str, location: str, max_results: int = 1) -> List[Dict]:
-        return await self.scrape_leads(sector, location, max_results)
-
-    async def scrape_leads(self, sector: str, location: str, max_leads: int = 10) -> List[Dict]:
+    async def scrape_leads(self, sector: str, location: str, max_leads: int = 10) -> List[Lead]:
         try:
             logger.info(f"🔥 Iniciando scraping: {sector} en {location}")
             logger.info(f"🎯 Objetivo: {max_leads} leads")
@@ -60,48 +80,48 @@ class GoogleMapsLeadScraper:
             
             # CONSTRUIR URL CON PÁGINA DINÁMICA
             if "contadores" in sector.lower() or "contador" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/contadores/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/contadores/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("📊 CATEGORÍA: Contadores")
                 
             elif "abogados" in sector.lower() or "abogado" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/abogados/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/abogados/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("⚖️ CATEGORÍA: Abogados")
                 
             elif "arquitectos" in sector.lower() or "arquitecto" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/arquitectos/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/arquitectos/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("🏗️ CATEGORÍA: Arquitectos")
                 
             elif "medicos" in sector.lower() or "medico" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/medicos/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/medicos/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("👨‍⚕️ CATEGORÍA: Médicos")
                 
             elif "dentistas" in sector.lower() or "dentista" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/dentistas/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/dentistas/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("🦷 CATEGORÍA: Dentistas")
                 
             elif "ingenieros" in sector.lower() or "ingeniero" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/ingenieros/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/ingenieros/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("🔧 CATEGORÍA: Ingenieros")
                 
             elif "consultores" in sector.lower() or "consultor" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/consultores/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/consultores/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("💼 CATEGORÍA: Consultores")
                 
             elif "publicidad" in sector.lower():
-                base_url = "https://www.seccionamarilla.com.mx/resultados/agencias-de-publicidad/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/agencias-de-publicidad/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("📢 CATEGORÍA: Publicidad")
                 
             # DEFAULT: Marketing
             else:
-                base_url = "https://www.seccionamarilla.com.mx/resultados/agencias-de-marketing/distrito-federal/zona-metropolitana"
+                base_url = f"{self.base_url}/resultados/agencias-de-marketing/distrito-federal/zona-metropolitana"
                 url = f"{base_url}/{page_number}"
                 logger.info("🎯 CATEGORÍA: Marketing (Default)")
             
@@ -119,51 +139,82 @@ class GoogleMapsLeadScraper:
             logger.error(f"❌ Error en scraping: {e}")
             return []
 
-    async def scrape_leads_from_url(self, url: str, max_leads: int = 10) -> List[Dict]:
-        """Scrapear desde URL específica"""
+    async def scrape_leads_from_url(self, url: str, max_leads: int = 10) -> List[Lead]:
+        """Scrapear desde URL específica
+
+        La descarga y el parseo de la página se comparten con otros jobs que
+        pidan la misma página (utils.single_flight); aquí solo se deduplica y
+        se recorta a `max_leads`, sobre copias de los leads compartidos.
+        """
         try:
             logger.info(f"🔥 Scraping URL específica: {url}")
             
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            page_leads = await scrape_flights.do(self._flight_key(url), lambda: self._page_leads(url))
             
-            soup = BeautifulSoup(response.content, 'html.parser')
             leads = []
-            
-            sector = self._extract_sector_from_url(url)
-            
-            business_rows = soup.find_all('tr')
-            logger.info(f"📋 Filas encontradas: {len(business_rows)}")
-            
-            for row in business_rows:
-                lead = self._extract_from_business_row(row, sector)
-                if lead and len(leads) < max_leads:
-                    lead_id = f"{lead.get('name', '')}-{lead.get('phone', '')}"
-                    if lead_id not in self.extracted_leads:
-                        self.extracted_leads.add(lead_id)
-                        leads.append(lead)
-                        logger.info(f"✅ Lead extraído: {lead.get('name', 'Sin nombre')}")
-            
-            phone_links = soup.find_all('a', href=re.compile(r'tel:'))
-            logger.info(f"📞 Enlaces de teléfono: {len(phone_links)}")
-            
-            for link in phone_links:
+            for lead in page_leads:
                 if len(leads) >= max_leads:
                     break
-                lead = self._extract_from_phone_link(link, soup, sector)
-                if lead:
-                    lead_id = f"{lead.get('name', '')}-{lead.get('phone', '')}"
-                    if lead_id not in self.extracted_leads:
-                        self.extracted_leads.add(lead_id)
-                        leads.append(lead)
+                lead_id = f"{lead.get('name', '')}-{lead.get('phone', '')}"
+                if lead_id not in self.extracted_leads:
+                    self.extracted_leads.add(lead_id)
+                    leads.append(lead.copy())
             
-            logger.info(f"🎯 Total leads de {sector}: {len(leads)}")
+            logger.info("🎯 Total leads de %s: %d", self._extract_sector_from_url(url), len(leads), extra={'url': url, 'leads': len(leads)})
             return leads
             
+        except CircuitOpenError as e:
+            logger.warning(f"⏭️ {e}")
+            return []
         except Exception as e:
             logger.error(f"❌ Error scraping {url}: {e}")
             return []
 
+    def _flight_key(self, url: str) -> Tuple[str, str, str, int]:
+        """/resultados/{categoría}/{estado}/{zona}/{página} → (fuente, categoría, ubicación, página)"""
+        parts = urlparse(url).path.strip('/').split('/')
+        if len(parts) >= 4 and parts[0] == 'resultados' and parts[-1].isdigit():
+            return (self.name, parts[1], '/'.join(parts[2:-1]), int(parts[-1]))
+        return (self.name, url, '', 1)
+
+    async def _page_leads(self, url: str) -> List[Lead]:
+        """Todos los leads de la página (filas y enlaces tel:), sin deduplicar contra otros jobs"""
+        with profile_span('fetch', url=url):
+            response = await fetcher.get(url, source='seccion_amarilla', timeout=self.config.fetch_timeout)
+            response.raise_for_status()
+        
+        with track_time(PARSE_TIME, source='seccion_amarilla'):
+            with profile_span('parse', url=url):
+                soup = BeautifulSoup(response.content, 'html.parser')
+            
+            with profile_span('extract', url=url):
+                sector = self._extract_sector_from_url(url)
+                leads = []
+                seen = set()
+                
+                rows = 0
+                for row, fields in self.template.extract(soup):
+                    rows += 1
+                    lead = self._lead_from_fields(fields, sector)
+                    if lead:
+                        lead_id = f"{lead.get('name', '')}-{lead.get('phone', '')}"
+                        if lead_id not in seen:
+                            seen.add(lead_id)
+                            leads.append(lead)
+                
+                phone_links = soup.find_all('a', href=re.compile(r'tel:'))
+                for link in phone_links:
+                    lead = self._extract_from_phone_link(link, soup, sector)
+                    if lead:
+                        lead_id = f"{lead.get('name', '')}-{lead.get('phone', '')}"
+                        if lead_id not in seen:
+                            seen.add(lead_id)
+                            leads.append(lead)
+        
+        LEADS_PER_PAGE.labels(source='seccion_amarilla').observe(len(leads))
+        logger.debug("📄 Página parseada: %s", url, extra={'rows': rows, 'phone_links': len(phone_links), 'leads': len(leads)})
+        return leads
+
     def _extract_sector_from_url(self, url: str) -> str:
         """Extraer sector de la URL"""
         if 'contadores' in url.lower():
@@ -187,65 +238,43 @@ class GoogleMapsLeadScraper:
         else:
             return 'Servicios Profesionales'
 
-    def _extract_from_business_row(self, row, sector: str) -> Optional[Dict]:
-        """Extraer información - CORRECTO: span itemprop='name' = NOMBRE, small short_address = DIRECCIÓN"""
+    def _extract_from_business_row(self, row, sector: str) -> Optional[Lead]:
+        """Extraer información de una fila con la plantilla 'seccion_amarilla' (scrapers/templates.json)"""
         try:
-            name = None
-            address = None
-            phone = None
-            
-                      # — MÉTODO 1: Nombre desde el <a> dentro de <p class="bussines_name">
-            name_tag = row.select_one('p.bussines_name a')
-            if name_tag:
-                name = name_tag.get_text(strip=True)
-                logger.info(f"🏷️ Nombre extraído de <a>: {name}")
-
-            # — MÉTODO 2: Fallback si no hay <a>
-            if not name:
-                for tag in ['h1','h2','h3','h4','strong','b']:
-                    elem = row.find(tag)
-                    if elem:
-                        txt = elem.get_text(strip=True)
-                        if len(txt) > 3 and not any(skip in txt.lower() for skip in ['abierto','cerrado','acciones']):
-                            name = txt
-                            logger.info(f"🎯 Nombre fallback: {name}")
-                            break
-
-            # — DIRECCIÓN desde el <small.short_address> visible
-            address = None
-            address_tag = row.select_one('small.short_address:not(.nodisplay)')
-            if address_tag:
-                address = address_tag.get_text(strip=True)
-                logger.info(f"📍 Dirección extraída: {address}")
-
-            # — TELÉFONO (método robusto existente)
-            phone = self._extract_phone_robust(row)
+            return self._lead_from_fields(self.template.extract_item(row), sector)
+        except Exception as e:
+            log_sampler.log(logger, logging.ERROR, 'row_extract_error', "Error extrayendo de fila: %s", e)
+            return None
 
+    def _lead_from_fields(self, fields: Dict, sector: str) -> Optional[Lead]:
+        """Lead a partir de los campos extraídos: nombre en p.bussines_name, dirección en small.short_address"""
+        try:
+            name = fields.get('name')
+            address = fields.get('address')
+            phone = fields.get('phone')
             
             # VALIDACIÓN FINAL
             if name and phone and len(name) > 3 and phone != "#ERROR!":
                 # Limpiar nombre (muy ligero)
                 name = name.strip()
                 
-                return {
-                    'name': name,
-                    'phone': phone,
-                    'email': None,
-                    'address': address or "México, DF",
-                    'sector': sector,
-                    'location': 'México, DF',
-                    'source': 'seccion_amarilla',
-                    'credit_potential': self._assess_credit_potential(sector),
-                    'estimated_revenue': self._estimate_revenue(sector),
-                    'loan_range': self._estimate_loan_range(sector),
-                    'extracted_at': datetime.now().isoformat(),
-                    'debug_results_type': f'<class "business_row_{sector}">'
-                }
+                return Lead(
+                    name=name,
+                    phone=phone,
+                    profile=self._sector_profile(sector),
+                    address=address or "México, DF",
+                    website=fields.get('website'),
+                    rating=fields.get('rating'),
+                    location='México, DF',
+                    source='seccion_amarilla',
+                    extracted_at=datetime.now().isoformat(),
+                    origin='business_row'
+                )
             
             return None
             
         except Exception as e:
-            logger.error(f"Error extrayendo de fila: {e}")
+            log_sampler.log(logger, logging.ERROR, 'row_extract_error', "Error extrayendo de fila: %s", e)
             return None
 
     def _looks_like_address(self, text: str) -> bool:
@@ -281,81 +310,18 @@ class GoogleMapsLeadScraper:
         return False
 
     def _extract_phone_robust(self, row) -> Optional[str]:
-        """Extraer teléfono de forma robusta"""
+        """Extraer teléfono de forma robusta: enlace tel:, botón de teléfono o texto de la fila"""
         try:
-            # MÉTODO 1: Enlaces tel: (más confiable)
-            phone_links = row.find_all('a', href=re.compile(r'tel:'))
-            for link in phone_links:
-                phone_raw = link.get('href').replace('tel:', '').strip()
-                if phone_raw and len(phone_raw) >= 10:
-                    return self._format_phone(phone_raw)
-            
-            # MÉTODO 2: Buscar en botones con clase de teléfono
-            phone_buttons = row.find_all(['button', 'span', 'div'], class_=re.compile(r'phone|tel', re.I))
-            for button in phone_buttons:
-                button_text = button.get_text(strip=True)
-                phone = self._extract_phone_simple(button_text)
-                if phone:
-                    return phone
-            
-            # MÉTODO 3: Buscar en texto general de la fila
-            row_text = row.get_text()
-            phone = self._extract_phone_simple(row_text)
-            if phone:
-                return phone
-            
-            return None
+            return self.template.extract_field(row, 'phone')
             
         except Exception as e:
-            logger.error(f"Error extrayendo teléfono: {e}")
+            log_sampler.log(logger, logging.ERROR, 'phone_extract_error', "Error extrayendo teléfono: %s", e)
             return None
 
-    def _extract_phone_simple(self, text: str) -> Optional[str]:
-        """Extraer teléfono del texto"""
-        if not text:
-            return None
-        
-        # Patrones para teléfonos mexicanos
-        patterns = [
-            r'\(\d{2,3}\)\s*\d{3,4}[-\s]?\d{4}',      # (55)1234-5678
-            r'\d{2,3}[-\s]\d{3,4}[-\s]\d{4}',         # 55-1234-5678
-            r'\b\d{10}\b',                             # 5512345678
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                # Verificar que no esté cerca de indicadores de dirección
-                match_pos = text.find(match)
-                context = text[max(0, match_pos-15):match_pos+len(match)+15]
-                
-                if not re.search(r'(MZ|LT|NO\.|NUM\.|C\.P\.|CALLE|AV\.)', context, re.IGNORECASE):
-                    return self._format_phone(match)
-        
-        return None
-
-    def _format_phone(self, phone: str) -> str:
-        """Formatear teléfono"""
-        try:
-            # Solo números
-            numbers_only = re.sub(r'[^\d]', '', phone)
-            
-            # Formatear según longitud
-            if len(numbers_only) == 10:
-                return f"({numbers_only[:2]}){numbers_only[2:6]}-{numbers_only[6:]}"
-            elif len(numbers_only) == 11:
-                return f"({numbers_only[:3]}){numbers_only[3:7]}-{numbers_only[7:]}"
-            else:
-                return numbers_only if len(numbers_only) >= 10 else phone
-            
-        except Exception as e:
-            return phone
-
-    def _extract_from_phone_link(self, link, soup, sector: str) -> Optional[Dict]:
+    def _extract_from_phone_link(self, link, soup, sector: str) -> Optional[Lead]:
         """Extraer información del enlace de teléfono"""
         try:
-            phone = link.get('href').replace('tel:', '').strip()
-            phone = self._format_phone(phone)
+            phone = format_phone(link.get('href').replace('tel:', '').strip())
             
             container = link.find_parent(['tr', 'div', 'td'])
             if container:
@@ -367,27 +333,36 @@ class GoogleMapsLeadScraper:
                     name = self._find_business_name_in_container(container)
                 
                 if name and phone:
-                    return {
-                        'name': name.strip(),
-                        'phone': phone,
-                        'email': None,
-                        'address': "México, DF",
-                        'sector': sector,
-                        'location': 'México, DF',
-                        'source': 'seccion_amarilla',
-                        'credit_potential': self._assess_credit_potential(sector),
-                        'estimated_revenue': self._estimate_revenue(sector),
-                        'loan_range': self._estimate_loan_range(sector),
-                        'extracted_at': datetime.now().isoformat(),
-                        'debug_results_type': f'<class "phone_link_{sector}">'
-                    }
+                    return Lead(
+                        name=name.strip(),
+                        phone=phone,
+                        profile=self._sector_profile(sector),
+                        address="México, DF",
+                        location='México, DF',
+                        source='seccion_amarilla',
+                        extracted_at=datetime.now().isoformat(),
+                        origin='phone_link'
+                    )
             
             return None
             
         except Exception as e:
-            logger.error(f"Error extrayendo de enlace: {e}")
+            log_sampler.log(logger, logging.ERROR, 'phone_link_error', "Error extrayendo de enlace: %s", e)
             return None
 
+    def _sector_profile(self, sector: str) -> SectorProfile:
+        """Perfil compartido (potencial, ingresos, préstamo) de todos los leads del sector"""
+        profile = self._profiles.get(sector)
+        if profile is None:
+            profile = sector_profile(
+                sector,
+                self._assess_credit_potential(sector),
+                self._estimate_revenue(sector),
+                self._estimate_loan_range(sector)
+            )
+            self._profiles[sector] = profile
+        return profile
+
     def _assess_credit_potential(self, sector: str) -> str:
         """Evaluar potencial crediticio basado en sector"""
         high_potential = ['Contadores', 'Abogados', 'Arquitectos', 'Médicos', 'Ingenieros']
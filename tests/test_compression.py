@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests de utils.compression y utils.serialization: ida y vuelta de resultados
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import serialization  # noqa: E402
+from utils.compression import MAGIC, compress, decompress, is_compressed, iter_decompress  # noqa: E402
+from utils.lead import Lead  # noqa: E402
+from utils.serialization import RawJSON, dumps, iter_object, join_object, loads  # noqa: E402
+
+LEADS = [
+    {
+        'name': f"Despacho Contable Núñez {i}",
+        'phone': f"(55) 5{i:03d}-1234",
+        'email': None,
+        'address': 'AV. INSURGENTES SUR NO. 1, COL. DEL VALLE, C.P. 03100, DISTRITO FEDERAL',
+        'sector': 'Contadores',
+        'location': 'Ciudad de México',
+        'source': 'seccion_amarilla',
+        'rating': 4.5,
+        'social': {'facebook': 'despacho'}
+    }
+    for i in range(300)
+]
+
+
+def test_compress_round_trip():
+    payload = dumps(LEADS)
+    stored = compress(payload)
+
+    assert is_compressed(stored)
+    assert len(stored) < len(payload)
+    assert decompress(stored) == payload
+    assert loads(decompress(stored)) == LEADS
+
+
+def test_iter_decompress_yields_the_same_bytes_in_bounded_chunks():
+    payload = dumps(LEADS)
+    chunks = list(iter_decompress(compress(payload), chunk_size=1024))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1024 for chunk in chunks)
+    assert b''.join(chunks) == payload
+
+
+def test_plain_json_rows_pass_through():
+    payload = dumps(LEADS)
+
+    assert not is_compressed(payload)
+    assert decompress(payload) == payload
+    assert b''.join(iter_decompress(payload, chunk_size=1000)) == payload
+
+
+def test_unknown_dictionary_version_is_rejected():
+    stored = compress(dumps(LEADS))
+    tampered = MAGIC + bytes([99]) + stored[len(MAGIC) + 1:]
+
+    with pytest.raises(ValueError):
+        decompress(tampered)
+
+
+def test_dumps_serializes_leads_and_non_ascii():
+    lead = Lead.from_dict({'name': 'Café Niño', 'phone': '5512345678', 'sector': 'Contadores', 'source': 'x'})
+
+    data = loads(dumps({'leads': [lead]}))
+
+    assert data['leads'][0]['name'] == 'Café Niño'
+    assert data['leads'][0]['phone'] == '5512345678'
+    # Filas guardadas como str antes de los bytes
+    assert loads(dumps(LEADS).decode('utf-8')) == LEADS
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    encoded = dumps(LEADS)
+    monkeypatch.setattr(serialization, 'orjson', None)
+
+    assert loads(dumps(LEADS)) == LEADS
+    assert loads(encoded) == LEADS
+
+
+def test_raw_json_is_embedded_without_decoding():
+    stored = compress(dumps(LEADS))
+
+    whole = join_object(job_id='abc', leads=RawJSON(decompress(stored)))
+    streamed = b''.join(iter_object('leads', iter_decompress(stored, chunk_size=512), job_id='abc'))
+
+    assert loads(whole) == {'job_id': 'abc', 'leads': LEADS}
+    assert loads(streamed) == {'job_id': 'abc', 'leads': LEADS}
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests de database.JobDatabase: migración de bases viejas y resultados guardados
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import JobDatabase  # noqa: E402
+from utils.compression import is_compressed, iter_decompress  # noqa: E402
+from utils.serialization import loads  # noqa: E402
+
+LEADS = [{'name': f"Taller Mecánico {i}", 'phone': f"44{i:08d}", 'sector': 'Talleres'} for i in range(50)]
+
+
+def _legacy_db(path: str):
+    """Base con el esquema original: sin profile, lead_count ni stop_reason, resultados como texto JSON"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            request_data TEXT,
+            results TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            estimated_time INTEGER
+        )
+    ''')
+    conn.execute(
+        'INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ('legacy', 'completed', json.dumps({'sectors': ['Talleres']}), json.dumps(LEADS, ensure_ascii=False),
+         '2024-01-01T00:00:00', '2024-01-01T00:05:00', 5)
+    )
+    conn.commit()
+    conn.close()
+
+
+def _columns(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+    finally:
+        conn.close()
+
+
+def test_legacy_database_is_migrated_and_still_readable(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    _legacy_db(path)
+
+    db = JobDatabase(path)
+
+    assert {'profile', 'lead_count', 'stop_reason'} <= set(_columns(path))
+    job = db.get_job_status('legacy')
+    assert job['results'] == LEADS
+    assert job['request_data'] == {'sectors': ['Talleres']}
+    assert job['stop_reason'] is None
+
+    status, results, lead_count, stop_reason = db.get_job_results_raw('legacy')
+    assert (status, lead_count, stop_reason) == ('completed', len(LEADS), None)
+    assert loads(b''.join(iter_decompress(results))) == LEADS
+
+
+def test_migration_is_idempotent(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    _legacy_db(path)
+
+    JobDatabase(path)
+    JobDatabase(path)
+
+    assert _columns(path).count('stop_reason') == 1
+    assert JobDatabase(path).get_job_status('legacy')['results'] == LEADS
+
+
+def test_results_round_trip_compressed(tmp_path):
+    db = JobDatabase(str(tmp_path / 'jobs.db'), compression_level=6)
+    job_id = db.create_job({'sectors': ['Talleres'], 'locations': ['Querétaro']})
+
+    db.update_job(job_id, 'cancelled', LEADS, stop_reason='deadline')
+
+    status, results, lead_count, stop_reason = db.get_job_results_raw(job_id)
+    assert is_compressed(results)
+    assert (status, lead_count, stop_reason) == ('cancelled', len(LEADS), 'deadline')
+    assert loads(b''.join(iter_decompress(results, chunk_size=256))) == LEADS
+    assert db.get_job_status(job_id)['results'] == LEADS
+
+
+def test_results_round_trip_uncompressed(tmp_path):
+    db = JobDatabase(str(tmp_path / 'jobs.db'), compression_level=0)
+    job_id = db.create_job({'sectors': ['Talleres']})
+
+    db.update_job(job_id, 'completed', LEADS)
+
+    status, results, lead_count, _ = db.get_job_results_raw(job_id)
+    assert not is_compressed(results)
+    assert loads(results) == LEADS
+    assert lead_count == len(LEADS)
+
+
+def test_job_without_results(tmp_path):
+    db = JobDatabase(str(tmp_path / 'jobs.db'))
+    job_id = db.create_job({'sectors': ['Talleres']})
+
+    db.update_job(job_id, 'failed', [])
+
+    assert db.get_job_results_raw(job_id) == ('failed', None, 0, None)
+    assert db.get_job_status(job_id)['results'] is None
+    assert db.get_job_results_raw('missing') is None
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests de utils.single_flight: dos jobs sobre la misma unidad, uno se detiene;
+spans del trabajo compartido en el perfil del job que lo inicia
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_control import BudgetExceeded, JobControl, charge_request  # noqa: E402
+from utils.profiling import JobProfiler, profile_span  # noqa: E402
+from utils.single_flight import SingleFlight  # noqa: E402
+
+KEY = ('seccion_amarilla', 'contadores', 'distrito-federal/zona-metropolitana', 1)
+
+
+class SharedPage:
+    """Unidad de trabajo que no termina hasta que el test la libera; cobra como lo haría fetcher.get"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        charge_request()
+        await self.release.wait()
+        charge_request()
+        return ['lead']
+
+
+async def _job(flights: SingleFlight, control: JobControl, work: SharedPage, results: dict):
+    async def scrape():
+        try:
+            results[control.job_id] = await flights.do(KEY, work)
+        except BudgetExceeded as e:
+            results[control.job_id] = e
+
+    control.start_clock()
+    await control.run(scrape())
+
+
+def test_budget_of_one_job_does_not_leak_into_shared_work():
+    async def scenario():
+        flights = SingleFlight(ttl=0)
+        work = SharedPage()
+        leader = JobControl('leader', max_requests=1)
+        follower = JobControl('follower')
+        results = {}
+
+        jobs = [
+            asyncio.create_task(_job(flights, leader, work, results)),
+            asyncio.create_task(_job(flights, follower, work, results)),
+        ]
+        await asyncio.sleep(0.01)
+        work.release.set()
+        await asyncio.gather(*jobs)
+        return work, leader, follower, results
+
+    work, leader, follower, results = asyncio.run(scenario())
+
+    assert work.calls == 1
+    # Cada job paga una vez por sumarse; los requests de la tarea compartida no son de nadie
+    assert leader.requests == 1 and follower.requests == 1
+    assert results == {'leader': ['lead'], 'follower': ['lead']}
+    assert leader.stop_reason is None
+
+
+def test_stopping_one_job_keeps_shared_work_for_the_other():
+    async def scenario():
+        flights = SingleFlight(ttl=0)
+        work = SharedPage()
+        leader = JobControl('leader')
+        follower = JobControl('follower')
+        results = {}
+
+        jobs = [
+            asyncio.create_task(_job(flights, leader, work, results)),
+            asyncio.create_task(_job(flights, follower, work, results)),
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        work.release.set()
+        await asyncio.gather(*jobs)
+        return work, leader, results
+
+    work, leader, results = asyncio.run(scenario())
+
+    assert work.calls == 1
+    assert leader.stop_reason == 'cancelled'
+    assert 'leader' not in results
+    assert results['follower'] == ['lead']
+
+
+def test_exhausted_job_fails_alone_before_joining():
+    async def scenario():
+        flights = SingleFlight(ttl=0)
+        work = SharedPage()
+        broke = JobControl('broke', max_requests=1)
+        broke.requests = 1
+        other = JobControl('other')
+        results = {}
+
+        jobs = [
+            asyncio.create_task(_job(flights, other, work, results)),
+            asyncio.create_task(_job(flights, broke, work, results)),
+        ]
+        await asyncio.sleep(0.01)
+        work.release.set()
+        await asyncio.gather(*jobs)
+        return broke, results
+
+    broke, results = asyncio.run(scenario())
+
+    assert results['other'] == ['lead']
+    assert broke.stop_reason == 'max_requests'
+    assert 'broke' not in results or isinstance(results['broke'], BudgetExceeded)
+
+
+def test_profiled_job_records_spans_of_shared_work():
+    async def work():
+        with profile_span('fetch', page=1):
+            charge_request()
+            await asyncio.sleep(0)
+        with profile_span('parse'):
+            return ['lead']
+
+    async def scenario():
+        flights = SingleFlight(ttl=0)
+        control = JobControl('profiled', max_requests=5)
+        profiler = JobProfiler('profiled')
+        results = {}
+
+        profiler.start()
+        try:
+            await _job(flights, control, work, results)
+        finally:
+            profiler.stop()
+        return control, profiler, results
+
+    control, profiler, results = asyncio.run(scenario())
+
+    assert results == {'profiled': ['lead']}
+    assert [span['name'] for span in profiler.spans] == ['fetch', 'parse']
+    # El request del trabajo compartido sigue sin cobrarse al job
+    assert control.requests == 1
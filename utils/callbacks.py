@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Callbacks Module
+Notificaciones firmadas de progreso y fin de job al `callback_url` del request
+
+Cada evento se encola y lo entregan workers en background con reintentos
+(backoff exponencial con jitter, respetando Retry-After). Un reintento no
+ocupa al worker: la entrega vuelve a la cola cuando le toca.
+
+Firma: HMAC-SHA256 con API_SECRET_KEY sobre "{timestamp}.{cuerpo}", en los
+headers X-Swip-Timestamp y X-Swip-Signature ("sha256=<hex>"). X-Swip-Delivery
+es el mismo en todos los intentos de una entrega, para deduplicar del lado del
+receptor. La cola vive en memoria: lo pendiente se pierde al reiniciar.
+
+Para no convertir el servicio en un proxy hacia la red interna (SSRF), el host
+del callback debe resolver solo a IPs públicas, salvo que esté en
+CALLBACK_ALLOWED_HOSTS; se comprueba al crear el job y antes de cada entrega, y
+no se siguen redirects.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from config import Settings, settings
+from utils.http_client import UnsafeURLError, check_public_url
+from utils.integrations import N8NIntegration
+from utils.metrics import CALLBACK_DELIVERIES, INTEGRATION_LATENCY
+from utils.rate_limiter import parse_retry_after
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_EVENTS = ('progress', 'completed', 'cancelled', 'failed')
+DEFAULT_CALLBACK_EVENTS = ['completed', 'cancelled', 'failed']
+# Errores del receptor que no se arreglan reintentando (los redirects no se siguen)
+PERMANENT_STATUSES = range(300, 500)
+RETRY_STATUSES = {408, 425, 429}
+
+
+class Delivery:
+    __slots__ = ('delivery_id', 'url', 'event', 'body', 'attempt')
+
+    def __init__(self, url: str, event: str, body: bytes):
+        self.delivery_id = str(uuid.uuid4())
+        self.url = url
+        self.event = event
+        self.body = body
+        self.attempt = 0
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode('utf-8'), timestamp.encode('utf-8') + b'.' + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+async def check_callback_url(url: str, allowed_hosts: List[str]):
+    """ValueError si el callback apunta a la red interna (ver http_client.check_public_url)"""
+    try:
+        await check_public_url(url, allowed_hosts)
+    except UnsafeURLError as e:
+        raise ValueError(f"callback_url: {e}")
+
+
+class CallbackDispatcher:
+    """Cola de entregas de webhooks con workers, reintentos y firma HMAC"""
+
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
+        self.secret = self.config.api_secret_key
+        self.max_attempts = self.config.callback_max_attempts
+        self.backoff_base = self.config.callback_backoff_base
+        self.backoff_max = self.config.callback_backoff_max
+        self.allowed_hosts = self.config.callback_allowed_hosts
+        self.timeout = aiohttp.ClientTimeout(total=self.config.integration_timeout)
+        self.payloads = N8NIntegration(self.config)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        if not self.secret:
+            logger.warning("⚠️ API_SECRET_KEY vacío: los callbacks se enviarán sin firma")
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.config.callback_queue_size)
+        self._session = aiohttp.ClientSession(timeout=self.timeout, headers={'User-Agent': 'Swip-Lead-Scraper/1.0'})
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.config.callback_workers)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def notify(self, url: str, event: str, payload: Dict[str, Any]):
+        """Encola un evento; si la cola está llena se descarta (no bloquea al job)"""
+        self._enqueue(Delivery(url, event, dumps(payload)))
+
+    def _enqueue(self, delivery: Delivery):
+        if self._queue is None:
+            logger.warning(f"⚠️ Callback {delivery.event} descartado: dispatcher detenido")
+            CALLBACK_DELIVERIES.labels(event=delivery.event, result='dropped').inc()
+            return
+        try:
+            self._queue.put_nowait(delivery)
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Cola de callbacks llena: se descarta {delivery.event} para {delivery.url}")
+            CALLBACK_DELIVERIES.labels(event=delivery.event, result='dropped').inc()
+
+    async def _worker(self):
+        while True:
+            delivery = await self._queue.get()
+            try:
+                await self._deliver(delivery)
+            except Exception as e:
+                logger.error(f"❌ Error entregando callback {delivery.event}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, delivery: Delivery):
+        delivery.attempt += 1
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Swip-Event': delivery.event,
+            'X-Swip-Delivery': delivery.delivery_id,
+            'X-Swip-Timestamp': timestamp
+        }
+        if self.secret:
+            headers['X-Swip-Signature'] = sign(self.secret, timestamp, delivery.body)
+
+        try:
+            # El DNS pudo cambiar desde que se creó el job
+            await check_callback_url(delivery.url, self.allowed_hosts)
+        except ValueError as e:
+            logger.error(f"❌ Callback {delivery.event} a {delivery.url} rechazado: {e}")
+            CALLBACK_DELIVERIES.labels(event=delivery.event, result='failed').inc()
+            return
+
+        retry_after = None
+        start = time.perf_counter()
+        try:
+            async with self._session.post(delivery.url, data=delivery.body, headers=headers, allow_redirects=False) as response:
+                status = response.status
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            error = None if status < 300 else f"HTTP {status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = None
+            error = f"{type(e).__name__}: {e}"
+        INTEGRATION_LATENCY.labels(integration='callback', operation=delivery.event).observe(time.perf_counter() - start)
+
+        if error is None:
+            logger.info(f"✅ Callback {delivery.event} entregado a {delivery.url}")
+            CALLBACK_DELIVERIES.labels(event=delivery.event, result='delivered').inc()
+            return
+
+        permanent = status in PERMANENT_STATUSES and status not in RETRY_STATUSES
+        if permanent or delivery.attempt >= self.max_attempts:
+            logger.error(f"❌ Callback {delivery.event} a {delivery.url} falló tras {delivery.attempt} intentos: {error}")
+            CALLBACK_DELIVERIES.labels(event=delivery.event, result='failed').inc()
+            return
+
+        delay = self._backoff(delivery.attempt - 1, retry_after)
+        logger.debug("🔁 Callback %s: reintento %d en %.1fs (%s)", delivery.event, delivery.attempt, delay, error)
+        CALLBACK_DELIVERIES.labels(event=delivery.event, result='retry').inc()
+        asyncio.get_running_loop().call_later(delay, self._enqueue, delivery)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter, igual que SourceFetcher
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+
+class JobCallbacks:
+    """Traduce los cambios del JobStream de un job a eventos de callback filtrados"""
+
+    def __init__(self, job_id: str, url: str, events: List[str], dispatcher: 'CallbackDispatcher', progress_interval: float):
+        self.job_id = job_id
+        self.url = url
+        self.events = set(events)
+        self.dispatcher = dispatcher
+        self.progress_interval = progress_interval
+        self._last_progress = 0.0
+
+    def __call__(self, stream):
+        if stream.final is not None:
+            self._finished(stream)
+        elif 'progress' in self.events:
+            # Como mucho uno cada `callback_progress_interval`; el evento final trae los totales
+            now = time.monotonic()
+            if now - self._last_progress >= self.progress_interval:
+                self._last_progress = now
+                self.dispatcher.notify(self.url, 'progress', {
+                    "event": "scraping_progress",
+                    "job_id": self.job_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "progress": {**stream.progress, 'leads': len(stream.leads)}
+                })
+
+    def _finished(self, stream):
+        status = stream.final['status']
+        if status not in self.events:
+            return
+        payload = self.dispatcher.payloads.completion_payload(self.job_id, stream.leads, event=f"scraping_{status}")
+        payload.update(status=status, stop_reason=stream.final['stop_reason'])
+        self.dispatcher.notify(self.url, status, payload)
+
+
+# Instancia global
+callback_dispatcher = CallbackDispatcher()
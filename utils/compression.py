@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compression Module
+Compresión de resultados de jobs (zlib con diccionario precargado)
+
+Formato guardado: MAGIC + versión del diccionario (1 byte) + stream zlib
+comprimido con ese diccionario. Un diccionario nunca cambia una vez publicado:
+uno nuevo lleva otra versión y las filas viejas se siguen leyendo con el suyo.
+Los payloads sin MAGIC son JSON plano (filas anteriores) y pasan tal cual.
+"""
+
+import zlib
+from typing import Iterator
+
+# Ningún JSON empieza con \x00
+MAGIC = b'\x00LZ'
+CHUNK_SIZE = 64 * 1024
+
+# Diccionario v1: claves, fuentes y valores por sector que se repiten en cada lead.
+# zlib aprovecha mejor lo que está al final, así que lo más frecuente va abajo.
+_DICTIONARY_V1 = ''.join([
+    '"business_type":"","contact_priority":"","total_sales":0,"seller_rating":4.',
+    '"seller_id":,"website":"https://www.mercadolibre.com.mx/perfil/","source":"MercadoLibre",',
+    '"source":"Sección Amarilla","email":"contacto@.com.mx","rating":4.',
+    '"data_completeness":83.3,"preferred_contact":"WhatsApp","contact_urgency":"ALTA","final_score":',
+    '"preferred_contact":"Email","contact_urgency":"MEDIA","contact_urgency":"BAJA",',
+    '"sector":"Restaurantes","sector":"Comercio","sector":"Manufactura","sector":"Servicios",',
+    '"sector":"Dentistas","sector":"Consultores","sector":"Publicidad","credit_potential":"MEDIO-ALTO",',
+    '"estimated_revenue":"$300,000 - $800,000","loan_range":"$75,000 - $2,000,000",',
+    '"estimated_revenue":"$200,000 - $600,000","loan_range":"$50,000 - $1,500,000","credit_potential":"MEDIO",',
+    '"sector":"Arquitectos","sector":"Ingenieros","sector":"Abogados","sector":"Médicos",',
+    '"estimated_revenue":"$400,000 - $1,200,000","loan_range":"$100,000 - $3,000,000",',
+    '"location":"Ciudad de México","location":"Guadalajara, Jalisco","location":"Monterrey, Nuevo León",',
+    'CALLE , COL. CENTRO, C.P. , AV. REFORMA NO. , MZ LT , ESTADO DE MEXICO',
+    '{"name":"","phone":"(55)","email":null,"address":"AV. INSURGENTES SUR NO. , COL. DEL VALLE, ',
+    'C.P. 0, DISTRITO FEDERAL","sector":"Contadores","location":"México, DF","source":"seccion_amarilla",',
+    '"credit_potential":"ALTO","estimated_revenue":"$500,000 - $1,500,000","loan_range":"$125,000 - $3,750,000",',
+    '"extracted_at":"2026-','T:.","debug_results_type":"<class \\"business_row_Contadores\\">"},',
+]).encode('utf-8')
+
+DICTIONARIES = {1: _DICTIONARY_V1}
+CURRENT_VERSION = 1
+
+
+def is_compressed(payload: bytes) -> bool:
+    return payload[:len(MAGIC)] == MAGIC
+
+
+def compress(payload: bytes, level: int = 6) -> bytes:
+    """JSON en bytes → MAGIC + versión + zlib con el diccionario vigente"""
+    compressor = zlib.compressobj(level, zdict=DICTIONARIES[CURRENT_VERSION])
+    return MAGIC + bytes([CURRENT_VERSION]) + compressor.compress(payload) + compressor.flush()
+
+
+def _decompressor(payload: bytes):
+    version = payload[len(MAGIC)]
+    if version not in DICTIONARIES:
+        raise ValueError(f"Versión de diccionario desconocida: {version}")
+    return zlib.decompressobj(zdict=DICTIONARIES[version])
+
+
+def decompress(payload: bytes) -> bytes:
+    """Payload guardado → JSON en bytes (si no está comprimido se devuelve igual)"""
+    if not is_compressed(payload):
+        return payload
+    decompressor = _decompressor(payload)
+    return decompressor.decompress(payload[len(MAGIC) + 1:]) + decompressor.flush()
+
+
+def iter_decompress(payload: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Descomprime por bloques de a lo sumo `chunk_size` bytes, sin armar el JSON completo en memoria"""
+    if not is_compressed(payload):
+        for start in range(0, len(payload), chunk_size):
+            yield payload[start:start + chunk_size]
+        return
+
+    decompressor = _decompressor(payload)
+    pending = memoryview(payload)[len(MAGIC) + 1:]
+    while pending:
+        chunk = decompressor.decompress(pending, chunk_size)
+        pending = decompressor.unconsumed_tail
+        if chunk:
+            yield chunk
+        if decompressor.eof:
+            break
+    tail = decompressor.flush()
+    if tail:
+        yield tail
@@ -12,6 +12,11 @@ from datetime import datetime, timedelta
 import logging
 from collections import Counter
 
+from utils.lead import Lead, as_lead
+from utils.metrics import PROCESSOR_STAGE_DURATION, track_time
+from utils.phone import normalize_phone, phone_info
+from utils.profiling import profile_span
+
 logger = logging.getLogger(__name__)
 
 class LeadProcessor:
@@ -24,11 +29,14 @@ class LeadProcessor:
         ]
         
         # Patrones para limpiar datos
-        self.phone_pattern = re.compile(r'\b(?:\+?52\s?)?(?:\d{2,3}[-\s]?\d{3,4}[-\s]?\d{4})\b')
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         
-    def process_leads(self, raw_leads: List[Dict], filters: Optional[Dict] = None) -> List[Dict]:
-        """Procesa lista de leads crudos"""
+    def process_leads(self, raw_leads: List[Any], filters: Optional[Dict] = None) -> List[Lead]:
+        """Procesa lista de leads crudos (Lead o dict); los Lead se limpian y enriquecen en el lugar"""
+        with profile_span('process', leads=len(raw_leads)):
+            return self._process_leads(raw_leads, filters)
+
+    def _process_leads(self, raw_leads: List[Any], filters: Optional[Dict] = None) -> List[Lead]:
         try:
             logger.info(f"🔄 Procesando {len(raw_leads)} leads crudos")
             
@@ -36,32 +44,39 @@ class LeadProcessor:
                 return []
             
             # 1. Limpiar y normalizar datos
-            cleaned_leads = self._clean_leads(raw_leads)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='clean'):
+                cleaned_leads = self._clean_leads(raw_leads)
             logger.info(f"🧹 Después de limpieza: {len(cleaned_leads)} leads")
             
             # 2. Eliminar duplicados
-            unique_leads = self._remove_duplicates(cleaned_leads)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='dedup'):
+                unique_leads = self._remove_duplicates(cleaned_leads)
             logger.info(f"🔧 Después de eliminar duplicados: {len(unique_leads)} leads")
             
             # 3. Filtrar empresas no viables
-            viable_leads = self._filter_viable_companies(unique_leads)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='viability'):
+                viable_leads = self._filter_viable_companies(unique_leads)
             logger.info(f"✅ Leads viables: {len(viable_leads)} leads")
             
             # 4. Aplicar filtros personalizados
             if filters:
-                filtered_leads = self._apply_custom_filters(viable_leads, filters)
+                with track_time(PROCESSOR_STAGE_DURATION, stage='custom_filters'):
+                    filtered_leads = self._apply_custom_filters(viable_leads, filters)
                 logger.info(f"🎯 Después de filtros personalizados: {len(filtered_leads)} leads")
             else:
                 filtered_leads = viable_leads
             
             # 5. Enriquecer con datos calculados
-            enriched_leads = self._enrich_leads(filtered_leads)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='enrich'):
+                enriched_leads = self._enrich_leads(filtered_leads)
             
             # 6. Calcular scores finales
-            scored_leads = self._calculate_final_scores(enriched_leads)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='score'):
+                scored_leads = self._calculate_final_scores(enriched_leads)
             
             # 7. Ordenar por score
-            final_leads = sorted(scored_leads, key=lambda x: x.get('final_score', 0), reverse=True)
+            with track_time(PROCESSOR_STAGE_DURATION, stage='sort'):
+                final_leads = sorted(scored_leads, key=lambda x: x.final_score or 0, reverse=True)
             
             logger.info(f"🎉 Procesamiento completado: {len(final_leads)} leads finales")
             
@@ -71,40 +86,30 @@ class LeadProcessor:
             logger.error(f"❌ Error procesando leads: {e}")
             return raw_leads
 
-    def _clean_leads(self, leads: List[Dict]) -> List[Dict]:
-        """Limpia y normaliza datos básicos"""
+    def _clean_leads(self, leads: List[Any]) -> List[Lead]:
+        """Limpia y normaliza datos básicos (sin copiar: se corrige cada Lead)"""
         cleaned = []
         
-        for lead in leads:
+        for raw_lead in leads:
             try:
-                cleaned_lead = {}
+                lead = as_lead(raw_lead)
                 
                 # Limpiar nombre
-                name = lead.get('name', '').strip()
+                name = (lead.name or '').strip()
                 if name:
                     name = re.sub(r'[^\w\s\-\.\&]', '', name)
                     name = self._capitalize_business_name(name)
-                    cleaned_lead['name'] = name
+                lead.name = name or None
                 
                 # Limpiar teléfono
-                phone = self._clean_phone(lead.get('phone', ''))
-                if phone:
-                    cleaned_lead['phone'] = phone
+                lead.phone = self._clean_phone(lead.phone or '') or None
                 
                 # Limpiar email
-                email = self._clean_email(lead.get('email', ''))
-                if email:
-                    cleaned_lead['email'] = email
-                
-                # Copiar otros campos importantes
-                for field in ['sector', 'location', 'source', 'credit_potential', 
-                             'address', 'website', 'extracted_at']:
-                    if field in lead:
-                        cleaned_lead[field] = lead[field]
+                lead.email = self._clean_email(lead.email or '') or None
                 
                 # Solo agregar si tiene información mínima
-                if cleaned_lead.get('name') or cleaned_lead.get('phone'):
-                    cleaned.append(cleaned_lead)
+                if lead.name or lead.phone:
+                    cleaned.append(lead)
                 
             except Exception as e:
                 logger.warning(f"Error limpiando lead individual: {e}")
@@ -113,17 +118,8 @@ class LeadProcessor:
         return cleaned
 
     def _clean_phone(self, phone: str) -> str:
-        """Limpia y valida números de teléfono"""
-        if not phone:
-            return ''
-        
-        cleaned = re.sub(r'[^\d+\s\-\(\)]', '', phone.strip())
-        digits_only = re.sub(r'\D', '', cleaned)
-        
-        if 10 <= len(digits_only) <= 13:
-            return cleaned
-        
-        return ''
+        """Valida el teléfono y lo normaliza a E.164 (+52 + 10 dígitos)"""
+        return normalize_phone(phone) or ''
 
     def _clean_email(self, email: str) -> str:
         """Limpia y valida emails"""
@@ -154,15 +150,15 @@ class LeadProcessor:
         
         return ' '.join(capitalized_words)
 
-    def _remove_duplicates(self, leads: List[Dict]) -> List[Dict]:
+    def _remove_duplicates(self, leads: List[Lead]) -> List[Lead]:
         """Elimina leads duplicados"""
         unique_leads = []
         seen_phones = set()
         seen_names = set()
         
         for lead in leads:
-            phone = lead.get('phone', '')
-            name = lead.get('name', '').lower()
+            phone = lead.phone or ''
+            name = (lead.name or '').lower()
             
             is_duplicate = False
             
@@ -181,7 +177,7 @@ class LeadProcessor:
         
         return unique_leads
 
-    def _filter_viable_companies(self, leads: List[Dict]) -> List[Dict]:
+    def _filter_viable_companies(self, leads: List[Lead]) -> List[Lead]:
         """Filtra empresas viables para crédito PyME"""
         viable = []
         
@@ -191,9 +187,9 @@ class LeadProcessor:
         
         return viable
 
-    def _is_viable_pyme(self, lead: Dict) -> bool:
+    def _is_viable_pyme(self, lead: Lead) -> bool:
         """Determina si una empresa es viable para crédito PyME"""
-        name = lead.get('name', '').lower()
+        name = (lead.name or '').lower()
         
         if not name or len(name) < 3:
             return False
@@ -201,13 +197,13 @@ class LeadProcessor:
         if any(keyword in name for keyword in self.big_company_keywords):
             return False
         
-        has_contact = lead.get('phone') or lead.get('email') or lead.get('address')
+        has_contact = lead.phone or lead.email or lead.address
         if not has_contact:
             return False
         
         return True
 
-    def _apply_custom_filters(self, leads: List[Dict], filters: Dict) -> List[Dict]:
+    def _apply_custom_filters(self, leads: List[Lead], filters: Dict) -> List[Lead]:
         """Aplica filtros personalizados"""
         filtered = leads.copy()
         
@@ -215,12 +211,12 @@ class LeadProcessor:
             if filters.get('sectors'):
                 target_sectors = [s.lower() for s in filters['sectors']]
                 filtered = [lead for lead in filtered 
-                           if lead.get('sector', '').lower() in target_sectors]
+                           if lead.sector.lower() in target_sectors]
             
             if filters.get('locations'):
                 target_locations = [l.lower() for l in filters['locations']]
                 filtered = [lead for lead in filtered 
-                           if any(loc in lead.get('location', '').lower() 
+                           if any(loc in (lead.location or '').lower() 
                                  for loc in target_locations)]
             
         except Exception as e:
@@ -228,62 +224,62 @@ class LeadProcessor:
         
         return filtered
 
-    def _enrich_leads(self, leads: List[Dict]) -> List[Dict]:
-        """Enriquece leads con datos calculados"""
-        enriched = []
-        
+    def _enrich_leads(self, leads: List[Lead]) -> List[Lead]:
+        """Enriquece leads con datos calculados (en el mismo Lead, sin copia)"""
         for lead in leads:
             try:
-                enriched_lead = lead.copy()
+                # Ciudad y tipo de línea del teléfono según el plan de numeración
+                info = phone_info(lead.phone) if lead.phone else None
+                if info:
+                    lead.phone_city = info.city
+                    lead.phone_state = info.state
+                    lead.phone_type = info.line_type
                 
                 # Calcular completitud de datos
-                enriched_lead['data_completeness'] = self._calculate_data_completeness(lead)
+                lead.data_completeness = self._calculate_data_completeness(lead)
                 
                 # Determinar mejor método de contacto
-                enriched_lead['preferred_contact'] = self._get_preferred_contact_method(lead)
+                lead.preferred_contact = self._get_preferred_contact_method(lead)
                 
                 # Calcular urgencia de contacto
-                enriched_lead['contact_urgency'] = self._calculate_contact_urgency(lead)
-                
-                enriched.append(enriched_lead)
+                lead.contact_urgency = self._calculate_contact_urgency(lead)
                 
             except Exception as e:
                 logger.warning(f"Error enriqueciendo lead: {e}")
-                enriched.append(lead)
         
-        return enriched
+        return leads
 
-    def _calculate_data_completeness(self, lead: Dict) -> float:
+    def _calculate_data_completeness(self, lead: Lead) -> float:
         """Calcula porcentaje de completitud de datos"""
-        required_fields = ['name', 'phone', 'email', 'address', 'sector', 'location']
-        completed_fields = sum(1 for field in required_fields if lead.get(field))
+        completed_fields = sum(1 for value in (lead.name, lead.phone, lead.email, lead.address, lead.sector, lead.location) if value)
         
-        return round((completed_fields / len(required_fields)) * 100, 1)
+        return round((completed_fields / 6) * 100, 1)
 
-    def _get_preferred_contact_method(self, lead: Dict) -> str:
+    def _get_preferred_contact_method(self, lead: Lead) -> str:
         """Determina el mejor método de contacto"""
-        if lead.get('phone'):
+        if lead.phone:
+            # Los consumidores (Chatwoot, n8n) esperan WhatsApp para cualquier teléfono; phone_type va aparte
             return 'WhatsApp'
-        elif lead.get('email'):
+        elif lead.email:
             return 'Email'
-        elif lead.get('website'):
+        elif lead.website:
             return 'Website'
         else:
             return 'Visita presencial'
 
-    def _calculate_contact_urgency(self, lead: Dict) -> str:
+    def _calculate_contact_urgency(self, lead: Lead) -> str:
         """Calcula urgencia de contacto"""
         score = 0
         
-        credit_potential = lead.get('credit_potential', 'BAJO').upper()
+        credit_potential = (lead.credit_potential or 'BAJO').upper()
         if credit_potential == 'ALTO':
             score += 3
         elif credit_potential == 'MEDIO':
             score += 2
         
-        if lead.get('phone'):
+        if lead.phone:
             score += 2
-        if lead.get('email'):
+        if lead.email:
             score += 1
         
         if score >= 5:
@@ -293,40 +289,40 @@ class LeadProcessor:
         else:
             return 'BAJA'
 
-    def _calculate_final_scores(self, leads: List[Dict]) -> List[Dict]:
+    def _calculate_final_scores(self, leads: List[Lead]) -> List[Lead]:
         """Calcula scores finales ponderados"""
         for lead in leads:
             try:
                 score = 0.0
                 
                 # Score base por información de contacto
-                if lead.get('phone'):
+                if lead.phone:
                     score += 40
-                if lead.get('email'):
+                if lead.email:
                     score += 20
-                if lead.get('address'):
+                if lead.address:
                     score += 10
                 
                 # Score por potencial de crédito
-                credit_potential = lead.get('credit_potential', 'BAJO').upper()
+                credit_potential = (lead.credit_potential or 'BAJO').upper()
                 credit_score = {'ALTO': 30, 'MEDIO': 20, 'BAJO': 10}.get(credit_potential, 10)
                 score += credit_score
                 
-                lead['final_score'] = round(score, 2)
+                lead.final_score = round(score, 2)
                 
             except Exception as e:
                 logger.warning(f"Error calculando score final: {e}")
-                lead['final_score'] = 0.0
+                lead.final_score = 0.0
         
         return leads
 
-    def save_to_csv(self, leads: List[Dict], filename: str):
+    def save_to_csv(self, leads: List[Lead], filename: str):
         """Guarda leads en archivo CSV"""
         try:
             if not leads:
                 return
             
-            df = pd.DataFrame(leads)
+            df = pd.DataFrame([as_lead(lead).to_dict() for lead in leads])
             df.to_csv(filename, index=False, encoding='utf-8')
             logger.info(f"✅ Leads guardados en CSV: {filename}")
             
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Extraction Engine
+Plantillas declarativas de extracción (selectores CSS por campo) compiladas una vez
+
+Una plantilla define el selector de cada resultado (`item`) y, por campo, una
+lista de reglas que se prueban en orden hasta que una da un valor válido:
+
+    {"css": "a[href^='tel:']", "attr": "href", "type": "tel"}
+
+- css        selector relativo al item (sin css = el item completo)
+- attr       atributo a leer en lugar del texto
+- type       text | phone | tel | url | float
+- min_length largo mínimo del texto
+- exclude    palabras que descartan el valor
+"""
+
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import soupsieve
+
+from utils.phone import find_phone, format_phone
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scrapers', 'templates.json')
+
+NUMBER = re.compile(r'\d+(?:[.,]\d+)?')
+WHITESPACE = re.compile(r'\s+')
+
+
+def _tel(value: str) -> Optional[str]:
+    return format_phone(value.replace('tel:', '').strip())
+
+
+def _float(value: str) -> Optional[float]:
+    match = NUMBER.search(value)
+    return float(match.group().replace(',', '.')) if match else None
+
+
+PROCESSORS: Dict[str, Callable[[str], Optional[object]]] = {
+    'text': lambda value: WHITESPACE.sub(' ', value).strip() or None,
+    'phone': find_phone,
+    'tel': _tel,
+    'url': lambda value: value.strip() or None,
+    'float': _float,
+}
+
+
+class FieldRule:
+    """Una forma de obtener un campo; `selector` ya compilado"""
+
+    __slots__ = ('selector', 'attr', 'processor', 'min_length', 'exclude')
+
+    def __init__(self, spec: Dict):
+        if isinstance(spec, str):
+            spec = {'css': spec}
+        self.selector = soupsieve.compile(spec['css']) if spec.get('css') else None
+        self.attr = spec.get('attr')
+        self.processor = PROCESSORS[spec.get('type', 'text')]
+        self.min_length = spec.get('min_length', 0)
+        self.exclude = [word.lower() for word in spec.get('exclude', [])]
+
+    def apply(self, item) -> Optional[object]:
+        element = self.selector.select_one(item) if self.selector else item
+        if element is None:
+            return None
+
+        if self.attr:
+            raw = element.get(self.attr)
+        else:
+            # Texto del item completo sin tocar (para buscar teléfonos), el de un sub-elemento limpio
+            raw = element.get_text(strip=True) if self.selector else element.get_text()
+        if not raw:
+            return None
+        if len(raw) < self.min_length:
+            return None
+        if self.exclude and any(word in raw.lower() for word in self.exclude):
+            return None
+        return self.processor(raw)
+
+
+class ExtractionTemplate:
+    """Plantilla compilada: selector de items + reglas por campo"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        self.item_selector = soupsieve.compile(spec['item'])
+        self.required = list(spec.get('required', []))
+        self.fields: List[Tuple[str, List[FieldRule]]] = [
+            (field, [FieldRule(rule) for rule in (rules if isinstance(rules, list) else [rules])])
+            for field, rules in spec['fields'].items()
+        ]
+
+    def extract_item(self, item) -> Dict:
+        """Campos de un item; los que no se encuentran quedan en None"""
+        return {field: self._apply_rules(rules, item) for field, rules in self.fields}
+
+    def extract_field(self, item, field: str) -> Optional[object]:
+        for name, rules in self.fields:
+            if name == field:
+                return self._apply_rules(rules, item)
+        raise KeyError(f"Campo {field} no definido en la plantilla {self.name}")
+
+    @staticmethod
+    def _apply_rules(rules: List[FieldRule], item) -> Optional[object]:
+        for rule in rules:
+            value = rule.apply(item)
+            if value:
+                return value
+        return None
+
+    def extract(self, root) -> Iterator[Tuple[object, Dict]]:
+        """Una sola pasada por la página: (item, campos) para cada item con los campos requeridos"""
+        for item in self.item_selector.select(root):
+            values = self.extract_item(item)
+            if all(values.get(field) for field in self.required):
+                yield item, values
+
+
+@lru_cache(maxsize=None)
+def load_templates(path: str = TEMPLATES_PATH) -> Dict:
+    """Lee y compila el archivo de plantillas una sola vez por proceso"""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+
+    templates = {name: ExtractionTemplate(name, spec) for name, spec in raw.get('templates', {}).items()}
+    logger.debug("🧩 %d plantillas de extracción compiladas", len(templates))
+    return {'templates': templates, 'directories': raw.get('directories', {})}
+
+
+def get_template(name: str) -> ExtractionTemplate:
+    return load_templates()['templates'][name]
+
+
+def get_directories() -> Dict[str, Dict]:
+    """Definición de directorios (URL base, patrón de búsqueda, plantilla)"""
+    return {name: dict(directory) for name, directory in load_templates()['directories'].items()}
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Health Module
+Prober en background que cachea la disponibilidad de fuentes y dependencias
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """Ejecuta probes fuera del request y guarda el último resultado de cada uno"""
+
+    def __init__(self, interval: float = 60.0, timeout: float = 15.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.probes: Dict[str, Callable[[], Union[bool, Awaitable[bool]]]] = {}
+        self.results: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Callable[[], Union[bool, Awaitable[bool]]]):
+        """Registra un probe que devuelve True si el recurso está disponible
+
+        Los probes síncronos (bloqueantes) corren en un hilo; las corutinas en el event loop.
+        """
+        self.probes[name] = probe
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        await asyncio.gather(*[self._probe(name, probe) for name, probe in self.probes.items()])
+
+    async def _probe(self, name: str, probe: Callable[[], Union[bool, Awaitable[bool]]]):
+        start = time.perf_counter()
+        error = None
+        try:
+            pending = probe() if asyncio.iscoroutinefunction(probe) else asyncio.to_thread(probe)
+            ok = bool(await asyncio.wait_for(pending, timeout=self.timeout))
+        except asyncio.TimeoutError:
+            ok = False
+            error = f"timeout ({self.timeout}s)"
+        except Exception as e:
+            ok = False
+            error = str(e)
+
+        previous = self.results.get(name)
+        if previous is not None and previous['ok'] != ok:
+            logger.warning(f"⚠️ Probe {name}: {'disponible' if ok else 'no disponible'}")
+
+        self.results[name] = {
+            'ok': ok,
+            'checked_at': datetime.now().isoformat(),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            'error': error
+        }
+
+    def status(self, name: str) -> Optional[bool]:
+        """Último resultado de un probe; None si todavía no se ha ejecutado"""
+        result = self.results.get(name)
+        return result['ok'] if result else None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return dict(self.results)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+HTTP Client
+Capa de descarga para fuentes: reintentos con backoff exponencial + jitter
+y circuit breakers por fuente
+"""
+
+import asyncio
+import ipaddress
+import logging
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from config import Settings, settings
+from utils.job_control import charge_request
+from utils.metrics import FETCH_LATENCY, FETCH_RETRIES
+from utils.proxy_pool import ProxyPool, proxy_pool
+from utils.rate_limiter import parse_retry_after, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Status que vale la pena reintentar en un GET (idempotente)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UnsafeURLError(ValueError):
+    """URL que no es http(s) o cuyo host resuelve a una dirección no pública (SSRF)"""
+    pass
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: str, allowed_hosts: Iterable[str] = ()):
+    """UnsafeURLError si `url` no es http(s) o su host resuelve a una IP no pública
+    (loopback, privada, link-local como 169.254.169.254...) sin estar permitido
+
+    Para URLs que vienen de afuera (callbacks, sitios de los negocios): el
+    servicio no debe servir de proxy hacia la red interna.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise UnsafeURLError("debe ser una URL http(s)")
+
+    host = parsed.hostname.lower()
+    if host in allowed_hosts:
+        return
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port)
+    except (OSError, ValueError) as e:
+        raise UnsafeURLError(f"no se pudo resolver {host} ({e})")
+    if not infos or not all(_is_public(info[4][0]) for info in infos):
+        raise UnsafeURLError(f"{host} resuelve a una dirección no pública")
+
+
+class CircuitOpenError(Exception):
+    """La fuente está marcada como caída; se falla rápido sin tocar la red"""
+
+
+class FetchError(Exception):
+    """Se agotaron los reintentos de una descarga"""
+
+
+class CircuitBreaker:
+    """closed → open tras N fallos consecutivos; half_open tras `reset_timeout` deja pasar una prueba"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_failure: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            # Una sola prueba por ventana; si la prueba nunca reporta, se permite otra
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"✅ Circuit breaker {self.name}: cerrado")
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self.failures += 1
+            self.last_failure = error
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"🔌 Circuit breaker {self.name}: abierto ({error})")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at) if self.state == 'open' else 0
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'last_failure': self.last_failure,
+                'retry_in_s': round(max(0.0, retry_in), 1)
+            }
+
+
+class SourceFetcher:
+    """GET con pacing por host, reintentos y breaker por fuente; la llamada bloqueante corre en un hilo
+
+    Sin `session` explícita cada intento sale por una identidad del pool de
+    proxies, así un reintento tras un bloqueo usa otra IP/user-agent.
+    """
+
+    def __init__(
+        self,
+        pool: ProxyPool,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0
+    ):
+        self.pool = pool
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_settings(cls, pool: ProxyPool, config: Settings) -> 'SourceFetcher':
+        return cls(
+            pool,
+            timeout=config.fetch_timeout,
+            max_retries=config.fetch_max_retries,
+            backoff_base=config.fetch_backoff_base,
+            backoff_max=config.fetch_backoff_max,
+            failure_threshold=config.breaker_failure_threshold,
+            reset_timeout=config.breaker_reset_timeout
+        )
+
+    def breaker(self, source: str) -> CircuitBreaker:
+        if source not in self.breakers:
+            self.breakers[source] = CircuitBreaker(source, self.failure_threshold, self.reset_timeout)
+        return self.breakers[source]
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter: uniforme entre 0 y el tope exponencial
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    async def get(
+        self,
+        url: str,
+        source: str,
+        timeout: Optional[float] = None,
+        session: Optional[requests.Session] = None,
+        max_retries: Optional[int] = None,
+        use_breaker: bool = True,
+        pace_hosts: bool = True,
+        **kwargs
+    ) -> requests.Response:
+        """`use_breaker=False` para hosts heterogéneos (p. ej. sitios de cada negocio),
+        donde la caída de uno no dice nada de los demás. `pace_hosts=False` no pasa
+        por el rate limiter: cada host tendría un bucket (y una serie de métricas)
+        permanente aunque se visite una sola vez; quien llama limita la concurrencia"""
+        timeout = timeout or self.timeout
+        breaker = self.breaker(source) if use_breaker else None
+        if breaker and not breaker.allow():
+            raise CircuitOpenError(f"Fuente {source} no disponible (circuit breaker abierto)")
+
+        # Sin breaker los hosts son de cada negocio: no se etiquetan para no disparar la cardinalidad
+        host = urlparse(url).netloc if use_breaker else 'varios'
+        last_error = None
+        max_retries = self.max_retries if max_retries is None else max_retries
+        # En half_open basta un intento para decidir si la fuente volvió
+        if breaker and breaker.state == 'half_open':
+            max_retries = 0
+
+        for attempt in range(max_retries + 1):
+            # Presupuesto de requests del job en curso (cada reintento también cuenta)
+            charge_request()
+            # La identidad se elige antes del pacing porque el bucket es por (host, proxy)
+            identity = self.pool.acquire() if session is None else None
+            lane = identity.lane if identity else None
+            response = None
+            status = None
+            retry_after = None
+            latency = 0.0
+            finished = False
+
+            try:
+                if pace_hosts:
+                    await rate_limiter.acquire(url, lane)
+                start = time.perf_counter()
+                try:
+                    http = identity.session if identity else session
+                    response = await asyncio.to_thread(http.get, url, timeout=timeout, **kwargs)
+                except requests.RequestException as e:
+                    # Red, timeout, redirects, URL inválida, cuerpo cortado...: intento fallido
+                    last_error = f"{type(e).__name__}: {e}"
+                else:
+                    status = response.status_code
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                latency = time.perf_counter() - start
+                finished = True
+            finally:
+                # Siempre se devuelve la identidad; si el intento se canceló no hay resultado que registrar
+                if finished:
+                    if pace_hosts:
+                        rate_limiter.record(url, status, latency, retry_after, lane=lane)
+                    if identity:
+                        self.pool.release(identity, status, latency)
+                elif identity:
+                    self.pool.abandon(identity)
+
+            FETCH_LATENCY.labels(source=source, host=host).observe(latency)
+            if response is not None:
+                if status not in RETRY_STATUSES:
+                    if breaker:
+                        breaker.record_success()
+                    return response
+                last_error = f"HTTP {status}"
+
+            if attempt < max_retries:
+                FETCH_RETRIES.labels(source=source).inc()
+                delay = self._backoff(attempt, retry_after)
+                logger.debug("🔁 %s: reintento %d en %.2fs (%s)", url, attempt + 1, delay, last_error)
+                await asyncio.sleep(delay)
+
+        if breaker:
+            breaker.record_failure(last_error)
+        raise FetchError(f"{url}: {last_error} tras {max_retries + 1} intentos")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+
+# Instancia global compartida por todos los scrapers
+fetcher = SourceFetcher.from_settings(proxy_pool, settings)
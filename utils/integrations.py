@@ -8,17 +8,24 @@ import asyncio
 import aiohttp
 import requests
 import json
-import os
+import time
 from typing import List, Dict, Optional, Any
 import logging
 from datetime import datetime
 
+from config import Settings, settings
+from utils.lead import as_dict
+from utils.metrics import INTEGRATION_LATENCY, timed
+from utils.rate_limiter import parse_retry_after, rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class N8NIntegration:
-    def __init__(self):
-        self.webhook_url = os.getenv('N8N_WEBHOOK_URL')
-        self.api_key = os.getenv('N8N_API_KEY')
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
+        self.webhook_url = self.config.n8n_webhook_url
+        self.api_key = self.config.n8n_api_key
+        self.timeout = aiohttp.ClientTimeout(total=self.config.integration_timeout)
         
         self.headers = {
             'Content-Type': 'application/json',
@@ -28,23 +35,28 @@ class N8NIntegration:
         if self.api_key:
             self.headers['Authorization'] = f'Bearer {self.api_key}'
 
+    def completion_payload(self, job_id: str, leads: List[Dict], event: str = "scraping_completed") -> Dict:
+        """Payload de fin de job (también lo usan los callbacks de utils.callbacks)"""
+        return {
+            "event": event,
+            "job_id": job_id,
+            "timestamp": datetime.now().isoformat(),
+            "summary": {
+                "total_leads": len(leads),
+                "leads_by_sector": self._group_by_field(leads, 'sector'),
+                "leads_by_location": self._group_by_field(leads, 'location'),
+                "leads_by_credit_potential": self._group_by_field(leads, 'credit_potential')
+            },
+            "leads": [as_dict(lead) for lead in leads[:50]]  # Enviar máximo 50 leads en webhook
+        }
+
+    @timed(INTEGRATION_LATENCY, integration='n8n', operation='completion_webhook')
     async def send_completion_webhook(self, webhook_url: str, job_id: str, leads: List[Dict]) -> bool:
         """Envía webhook de completación a N8N"""
         try:
-            payload = {
-                "event": "scraping_completed",
-                "job_id": job_id,
-                "timestamp": datetime.now().isoformat(),
-                "summary": {
-                    "total_leads": len(leads),
-                    "leads_by_sector": self._group_by_field(leads, 'sector'),
-                    "leads_by_location": self._group_by_field(leads, 'location'),
-                    "leads_by_credit_potential": self._group_by_field(leads, 'credit_potential')
-                },
-                "leads": leads[:50]  # Enviar máximo 50 leads en webhook
-            }
+            payload = self.completion_payload(job_id, leads)
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.post(webhook_url, json=payload, headers=self.headers) as response:
                     if response.status == 200:
                         logger.info(f"✅ Webhook enviado exitosamente a N8N")
@@ -57,6 +69,7 @@ class N8NIntegration:
             logger.error(f"❌ Error enviando webhook a N8N: {e}")
             return False
 
+    @timed(INTEGRATION_LATENCY, integration='n8n', operation='workflow')
     async def trigger_workflow(self, workflow_name: str, data: Dict) -> Optional[Dict]:
         """Activa un workflow específico en N8N"""
         try:
@@ -70,7 +83,7 @@ class N8NIntegration:
                 "timestamp": datetime.now().isoformat()
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.post(self.webhook_url, json=payload, headers=self.headers) as response:
                     if response.status == 200:
                         result = await response.json()
@@ -93,10 +106,12 @@ class N8NIntegration:
         return groups
 
 class ChatwootIntegration:
-    def __init__(self):
-        self.api_url = os.getenv('CHATWOOT_API_URL', '').rstrip('/')
-        self.api_token = os.getenv('CHATWOOT_API_TOKEN')
-        self.account_id = os.getenv('CHATWOOT_ACCOUNT_ID', '1')
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
+        self.api_url = self.config.chatwoot_api_url
+        self.api_token = self.config.chatwoot_api_token
+        self.account_id = self.config.chatwoot_account_id
+        self.timeout = aiohttp.ClientTimeout(total=self.config.integration_timeout)
         
         self.headers = {
             'Content-Type': 'application/json',
@@ -115,12 +130,12 @@ class ChatwootIntegration:
             try:
                 contact_data = self._prepare_contact_data(lead)
                 
+                await rate_limiter.acquire(self.api_url)
+                
                 if await self._create_contact(contact_data):
                     created_count += 1
                     logger.info(f"✅ Contacto creado: {lead.get('name', 'Sin nombre')}")
                 
-                await asyncio.sleep(0.5)
-                
             except Exception as e:
                 logger.warning(f"Error creando contacto {lead.get('name', '')}: {e}")
                 continue
@@ -158,13 +173,19 @@ class ChatwootIntegration:
         
         return contact_data
 
+    @timed(INTEGRATION_LATENCY, integration='chatwoot', operation='create_contact')
     async def _create_contact(self, contact_data: Dict) -> bool:
         """Crea un contacto individual en Chatwoot"""
         try:
             url = f"{self.api_url}/api/v1/accounts/{self.account_id}/contacts"
+            start = time.perf_counter()
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.post(url, json=contact_data, headers=self.headers) as response:
+                    rate_limiter.record(
+                        url, response.status, time.perf_counter() - start,
+                        parse_retry_after(response.headers.get('Retry-After'))
+                    )
                     if response.status in [200, 201]:
                         return True
                     elif response.status == 422:
@@ -219,12 +240,13 @@ class ChatwootIntegration:
             logger.error(f"Error encontrando/creando contacto: {e}")
             return None
 
+    @timed(INTEGRATION_LATENCY, integration='chatwoot', operation='create_conversation')
     async def _create_conversation(self, conversation_data: Dict) -> Optional[str]:
         """Crea una nueva conversación"""
         try:
             url = f"{self.api_url}/api/v1/accounts/{self.account_id}/conversations"
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.post(url, json=conversation_data, headers=self.headers) as response:
                     if response.status in [200, 201]:
                         result = await response.json()
@@ -236,6 +258,7 @@ class ChatwootIntegration:
             logger.error(f"Error creando conversación: {e}")
             return None
 
+    @timed(INTEGRATION_LATENCY, integration='chatwoot', operation='send_message')
     async def _send_message(self, conversation_id: str, message: str) -> bool:
         """Envía un mensaje a una conversación"""
         try:
@@ -246,7 +269,7 @@ class ChatwootIntegration:
                 "message_type": "outgoing"
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.post(url, json=message_data, headers=self.headers) as response:
                     return response.status in [200, 201]
                     
@@ -255,12 +278,14 @@ class ChatwootIntegration:
             return False
 
 class GoogleSheetsIntegration:
-    def __init__(self):
-        self.credentials_path = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
-        self.spreadsheet_id = os.getenv('GOOGLE_SHEETS_SPREADSHEET_ID')
+    def __init__(self, config: Optional[Settings] = None):
+        self.config = config or settings
+        self.credentials_path = self.config.google_sheets_credentials
+        self.spreadsheet_id = self.config.google_sheets_spreadsheet_id
         
         logger.info("📊 Google Sheets integration inicializada")
 
+    @timed(INTEGRATION_LATENCY, integration='google_sheets', operation='upload_leads')
     async def upload_leads_to_sheet(self, leads: List[Dict], sheet_name: str = None) -> bool:
         """Sube leads a Google Sheets"""
         try:
@@ -279,6 +304,7 @@ class GoogleSheetsIntegration:
             logger.error(f"❌ Error subiendo a Google Sheets: {e}")
             return False
 
+    @timed(INTEGRATION_LATENCY, integration='google_sheets', operation='summary_dashboard')
     async def create_summary_dashboard(self, leads: List[Dict], sheet_name: str = "Dashboard") -> bool:
         """Crea un dashboard resumen en Google Sheets"""
         try:
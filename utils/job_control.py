@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Job Control
+Cancelación, deadline y presupuestos (requests HTTP y leads) de cada job
+
+Cada fase del job (scraping, enriquecimiento) corre en una tarea propia que
+`JobControl.stop` cancela: por DELETE /jobs/{id} o al vencer el deadline
+(cualquier fase), o al agotarse un presupuesto (solo el scraping). La
+cancelación es cooperativa: llega a la tarea en su siguiente `await`, así que
+las descargas en curso dejan de esperarse (el hilo de `requests` termina solo
+al vencer su timeout) y los leads ya obtenidos se conservan.
+
+Los requests se cobran en utils.http_client vía el ContextVar del job, que
+solo está activo dentro de las fases con presupuesto.
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, Awaitable, Dict, List, Optional
+
+from utils.metrics import JOBS_STOPPED
+
+logger = logging.getLogger(__name__)
+
+_current_job: ContextVar[Optional['JobControl']] = ContextVar('current_job', default=None)
+
+
+class BudgetExceeded(Exception):
+    """El job agotó su presupuesto de requests HTTP"""
+    pass
+
+
+class JobControl:
+    """Estado de parada y presupuestos de un job (creado al encolarlo)"""
+
+    def __init__(
+        self,
+        job_id: str,
+        deadline_seconds: Optional[float] = None,
+        max_requests: Optional[int] = None,
+        max_leads: Optional[int] = None
+    ):
+        self.job_id = job_id
+        self.deadline_seconds = deadline_seconds
+        self.max_requests = max_requests
+        self.max_leads = max_leads
+        self.requests = 0
+        self.leads = 0
+        self.stop_reason: Optional[str] = None
+        self.cancelled = False
+        self.started = False
+        self._deadline: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_reason is not None
+
+    def start_clock(self):
+        """El deadline corre desde que el job empieza a ejecutarse, no desde que se encoló"""
+        self.started = True
+        if self.deadline_seconds is not None:
+            self._deadline = time.monotonic() + self.deadline_seconds
+
+    def remaining(self) -> Optional[float]:
+        """Segundos hasta el deadline (None si no hay)"""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cancel(self):
+        """DELETE /jobs/{id}: detiene cualquier fase, también una ya detenida por presupuesto"""
+        self.cancelled = True
+        self.stop('cancelled')
+
+    def stop(self, reason: str):
+        """Cancela la fase en curso; `stop_reason` conserva la primera razón"""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            JOBS_STOPPED.labels(reason=reason).inc()
+            logger.info(f"🛑 Job {self.job_id} detenido: {reason}")
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def charge_request(self):
+        if self.stopped:
+            raise BudgetExceeded(f"Job {self.job_id} detenido ({self.stop_reason})")
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop('max_requests')
+            raise BudgetExceeded(f"Job {self.job_id} agotó su presupuesto de {self.max_requests} requests")
+        self.requests += 1
+
+    def take_leads(self, leads: List[Any]) -> List[Any]:
+        """Los leads que aún caben en el presupuesto; al llenarlo detiene el scraping"""
+        if self.max_leads is None:
+            self.leads += len(leads)
+            return leads
+        accepted = leads[:max(0, self.max_leads - self.leads)]
+        self.leads += len(accepted)
+        if self.leads >= self.max_leads:
+            self.stop('max_leads')
+        return accepted
+
+    async def run(self, work: Awaitable[Any], timeout: Optional[float] = None, budgeted: bool = True):
+        """Ejecuta una fase del job hasta que termine o se detenga
+
+        `timeout` (SCRAPING_TIMEOUT) se combina con el deadline del request.
+        Con `budgeted` los requests HTTP de la fase se cobran al presupuesto.
+        Una parada no es un error: la corrutina regresa normalmente y
+        `stop_reason` dice por qué.
+        """
+        remaining = self.remaining()
+        limits = [limit for limit in (timeout, remaining) if limit is not None]
+        reason = 'deadline' if remaining is not None and (timeout is None or remaining <= timeout) else 'timeout'
+
+        token = _current_job.set(self if budgeted else None)
+        try:
+            self._task = asyncio.ensure_future(work)
+        finally:
+            _current_job.reset(token)
+
+        if self.cancelled:
+            self._task.cancel()
+        elif self.expired():
+            self.stop('deadline')
+        timer = asyncio.get_running_loop().call_later(min(limits), self.stop, reason) if limits else None
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            # Cancelado desde afuera (apagado del servidor): se propaga
+            if not self.stopped:
+                raise
+        finally:
+            self._task = None
+            if timer:
+                timer.cancel()
+
+
+def detached_context() -> Context:
+    """Copia del contexto actual sin el job en curso, para trabajo compartido entre jobs
+
+    Lo demás (p. ej. el profiler de utils.profiling) se conserva.
+    """
+    context = copy_context()
+    context.run(_current_job.set, None)
+    return context
+
+
+def remaining_requests() -> Optional[int]:
+    """Requests que le quedan al job en curso (None si no hay job o no tiene presupuesto)"""
+    control = _current_job.get()
+    if control is None or control.max_requests is None:
+        return None
+    return max(0, control.max_requests - control.requests)
+
+
+def charge_request():
+    """Cobra un request HTTP al job en curso (si lo hay); BudgetExceeded si ya no hay presupuesto"""
+    control = _current_job.get()
+    if control is not None:
+        control.charge_request()
+
+
+# Instancia global: jobs encolados o en ejecución
+active_jobs: Dict[str, JobControl] = {}
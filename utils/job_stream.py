@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Job Stream
+Leads y progreso de un job en vivo, como Server-Sent Events
+
+Cada job en curso tiene un `JobStream` cuya lista de leads es la misma que el
+job guarda al final: el id de cada evento `lead` es su posición en esa lista
+(1, 2, ...), así que un cliente que se reconecta con `Last-Event-ID` (o
+`?offset=`) retoma exactamente donde se quedó, en vivo o ya desde la base.
+
+No hay cola por cliente: cada conexión lee la lista a su propio ritmo y la
+escritura al socket marca el paso (backpressure). El progreso es una foto que
+se sobrescribe; un cliente lento recibe solo la más reciente.
+
+Los eventos `lead` en vivo salen al parsear cada par, antes del enriquecimiento
+por sitio web (emails, redes), que al final completa esos mismos leads en el
+lugar: lo ya enviado no se reenvía. Lo que se relee de la base ya está
+enriquecido: mismas posiciones, más campos.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Comentario SSE para que proxies y clientes no cierren una conexión sin eventos
+HEARTBEAT_INTERVAL = 15.0
+# Leads por escritura al socket
+LEAD_BATCH_SIZE = 50
+
+
+def sse_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Un evento SSE: `event`, `id` opcional y `data` en JSON de una línea"""
+    head = f"event: {event}\n" if event_id is None else f"event: {event}\nid: {event_id}\n"
+    return head.encode('utf-8') + b'data: ' + dumps(data) + b'\n\n'
+
+
+class JobStream:
+    """Leads y progreso de un job, con aviso a los lectores cuando algo cambia"""
+
+    def __init__(self, job_id: str, pairs_total: int = 0):
+        self.job_id = job_id
+        self.leads: List[Any] = []
+        self.progress: Dict[str, Any] = {'phase': 'queued', 'pairs_done': 0, 'pairs_total': pairs_total}
+        self.final: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self._changed = asyncio.Event()
+        self._listeners: List[Callable[['JobStream'], None]] = []
+
+    def subscribe(self, listener: Callable[['JobStream'], None]):
+        """`listener(stream)` se llama en cada cambio (p. ej. utils.callbacks.JobCallbacks); no debe bloquear"""
+        self._listeners.append(listener)
+
+    def _notify(self):
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"❌ Error notificando job {self.job_id}: {e}")
+
+    def add_leads(self, leads: List[Any], pairs_done: int = 1):
+        """Leads de un par sector × ubicación ya parseado"""
+        self.leads.extend(leads)
+        self.progress['pairs_done'] += pairs_done
+        self._notify()
+
+    def set_phase(self, phase: str):
+        self.progress['phase'] = phase
+        self._notify()
+
+    def finish(self, status: str, stop_reason: Optional[str] = None):
+        self.final = {'status': status, 'stop_reason': stop_reason, 'total_leads': len(self.leads)}
+        self._notify()
+
+    async def events(self, offset: int = 0) -> AsyncIterator[bytes]:
+        """Eventos desde el lead `offset`: leads pendientes, progreso y `end` al terminar"""
+        version_sent = -1
+        while True:
+            changed = self._changed
+
+            if offset < len(self.leads):
+                batch = self.leads[offset:offset + LEAD_BATCH_SIZE]
+                yield b''.join(sse_event('lead', lead, offset + index + 1) for index, lead in enumerate(batch))
+                offset += len(batch)
+                continue
+
+            if version_sent != self.version:
+                version_sent = self.version
+                yield sse_event('progress', {**self.progress, 'leads': len(self.leads)})
+
+            if self.final is not None:
+                yield sse_event('end', self.final, offset)
+                return
+
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+
+
+def replay_events(leads: List[Any], offset: int, final: Dict[str, Any]) -> List[bytes]:
+    """Eventos de un job que ya terminó (resultados guardados), desde el lead `offset`"""
+    chunks = [
+        b''.join(sse_event('lead', lead, start + index + 1) for index, lead in enumerate(leads[start:start + LEAD_BATCH_SIZE]))
+        for start in range(offset, len(leads), LEAD_BATCH_SIZE)
+    ]
+    chunks.append(sse_event('end', final, max(offset, len(leads))))
+    return chunks
+
+
+# Instancia global: streams de jobs encolados o en ejecución
+job_streams: Dict[str, JobStream] = {}
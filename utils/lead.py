@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Lead Model
+Registro compacto de lead (__slots__) con perfil de sector compartido
+
+Los atributos que dependen solo del sector (potencial de crédito, ingresos y
+rango de préstamo estimados) viven en un SectorProfile que comparten todos los
+leads con los mismos valores; los strings categóricos se internan. El lead
+se convierte a dict solo al serializar.
+"""
+
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class SectorProfile:
+    """Atributos derivados del sector; una instancia por combinación de valores"""
+
+    __slots__ = ('sector', 'credit_potential', 'estimated_revenue', 'loan_range')
+
+    def __init__(self, sector: str, credit_potential: Optional[str], estimated_revenue: Optional[str], loan_range: Optional[str]):
+        self.sector = sector
+        self.credit_potential = credit_potential
+        self.estimated_revenue = estimated_revenue
+        self.loan_range = loan_range
+
+
+_profiles: Dict[Tuple, SectorProfile] = {}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def sector_profile(
+    sector: str,
+    credit_potential: Optional[str] = None,
+    estimated_revenue: Optional[str] = None,
+    loan_range: Optional[str] = None
+) -> SectorProfile:
+    """Perfil compartido para esta combinación (se crea la primera vez)"""
+    key = (sector, credit_potential, estimated_revenue, loan_range)
+    profile = _profiles.get(key)
+    if profile is None:
+        profile = SectorProfile(*(_intern(value) for value in key))
+        _profiles[key] = profile
+    return profile
+
+
+class Lead:
+    """Lead tipado; acepta acceso tipo dict (`get`, `[]`, `in`) para código que trabaja con dicts"""
+
+    __slots__ = (
+        'name', 'phone', 'email', 'address', 'website', 'rating', 'location', 'source',
+        'extracted_at', 'origin', 'profile', 'extra',
+        'data_completeness', 'preferred_contact', 'contact_urgency', 'final_score',
+        'phone_city', 'phone_state', 'phone_type'
+    )
+
+    # Campos que salen del perfil de sector
+    PROFILE_FIELDS = ('sector', 'credit_potential', 'estimated_revenue', 'loan_range')
+    ENRICHMENT_FIELDS = (
+        'data_completeness', 'preferred_contact', 'contact_urgency', 'final_score',
+        'phone_city', 'phone_state', 'phone_type'
+    )
+    OPTIONAL_FIELDS = ('website', 'rating')
+
+    def __init__(
+        self,
+        name: Optional[str],
+        phone: Optional[str] = None,
+        profile: Optional[SectorProfile] = None,
+        email: Optional[str] = None,
+        address: Optional[str] = None,
+        website: Optional[str] = None,
+        rating: Optional[float] = None,
+        location: Optional[str] = None,
+        source: Optional[str] = None,
+        extracted_at: Optional[str] = None,
+        origin: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.phone = phone
+        self.profile = profile or sector_profile('')
+        self.email = email
+        self.address = _intern(address)
+        self.website = website
+        self.rating = rating
+        self.location = _intern(location)
+        self.source = _intern(source)
+        self.extracted_at = extracted_at
+        self.origin = _intern(origin)
+        self.extra = extra
+        self.data_completeness = None
+        self.preferred_contact = None
+        self.contact_urgency = None
+        self.final_score = None
+        self.phone_city = None
+        self.phone_state = None
+        self.phone_type = None
+
+    # Campos del perfil
+    @property
+    def sector(self) -> str:
+        return self.profile.sector
+
+    @property
+    def credit_potential(self) -> Optional[str]:
+        return self.profile.credit_potential
+
+    @property
+    def estimated_revenue(self) -> Optional[str]:
+        return self.profile.estimated_revenue
+
+    @property
+    def loan_range(self) -> Optional[str]:
+        return self.profile.loan_range
+
+    @property
+    def debug_results_type(self) -> Optional[str]:
+        return f'<class "{self.origin}_{self.sector}">' if self.origin else None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Lead':
+        """Lead a partir del dict que devuelven las fuentes que aún no construyen Lead"""
+        known = set(cls.__slots__) | set(cls.PROFILE_FIELDS) | {'debug_results_type'}
+        lead = cls(
+            name=data.get('name'),
+            phone=data.get('phone'),
+            profile=sector_profile(
+                data.get('sector') or '',
+                data.get('credit_potential'),
+                data.get('estimated_revenue'),
+                data.get('loan_range')
+            ),
+            email=data.get('email'),
+            address=data.get('address'),
+            website=data.get('website'),
+            rating=data.get('rating'),
+            location=data.get('location'),
+            source=data.get('source'),
+            extracted_at=data.get('extracted_at'),
+            extra={key: value for key, value in data.items() if key not in known} or None
+        )
+        for field in cls.ENRICHMENT_FIELDS:
+            if field in data:
+                setattr(lead, field, data[field])
+        return lead
+
+    def copy(self) -> 'Lead':
+        lead = Lead.__new__(Lead)
+        for slot in self.__slots__:
+            setattr(lead, slot, getattr(self, slot))
+        if self.extra:
+            lead.extra = dict(self.extra)
+        return lead
+
+    def to_dict(self) -> Dict[str, Any]:
+        profile = self.profile
+        data = {'name': self.name, 'phone': self.phone, 'email': self.email, 'address': self.address}
+        if self.website is not None:
+            data['website'] = self.website
+        if self.rating is not None:
+            data['rating'] = self.rating
+        data['sector'] = profile.sector
+        data['location'] = self.location
+        data['source'] = self.source
+        data['credit_potential'] = profile.credit_potential
+        if profile.estimated_revenue is not None:
+            data['estimated_revenue'] = profile.estimated_revenue
+        if profile.loan_range is not None:
+            data['loan_range'] = profile.loan_range
+        data['extracted_at'] = self.extracted_at
+        if self.origin:
+            data['debug_results_type'] = f'<class "{self.origin}_{profile.sector}">'
+        if self.extra:
+            data.update(self.extra)
+        if self.final_score is not None or self.data_completeness is not None:
+            for field in self.ENRICHMENT_FIELDS:
+                value = getattr(self, field)
+                if value is not None:
+                    data[field] = value
+        return data
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return iter(self.to_dict().items())
+
+    # Acceso tipo dict
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.PROFILE_FIELDS or key in _SLOT_NAMES or key == 'debug_results_type':
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _SLOT_NAMES:
+            setattr(self, key, value)
+        elif key in self.PROFILE_FIELDS:
+            values = {field: getattr(self.profile, field) for field in self.PROFILE_FIELDS}
+            values[key] = value
+            self.profile = sector_profile(**values)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __repr__(self) -> str:
+        return f"Lead(name={self.name!r}, phone={self.phone!r}, sector={self.sector!r}, source={self.source!r})"
+
+
+_SLOT_NAMES = frozenset(Lead.__slots__) - {'profile', 'extra', 'origin'}
+_MISSING = object()
+
+
+def as_dict(lead: Any) -> Any:
+    """Lead → dict; cualquier otro valor se devuelve igual"""
+    return lead.to_dict() if isinstance(lead, Lead) else lead
+
+
+def as_lead(lead: Any) -> Lead:
+    return lead if isinstance(lead, Lead) else Lead.from_dict(lead)
+
+
+def lead_json_default(obj: Any) -> Dict[str, Any]:
+    """`default=` para json.dumps: serializa Lead sin convertir antes toda la lista"""
+    if isinstance(obj, Lead):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Logging Config
+Logging estructurado (JSON), no bloqueante y con muestreo para loops calientes
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config import settings
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        # Campos pasados con extra={...}
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: Optional[str] = None, json_output: Optional[bool] = None) -> logging.handlers.QueueListener:
+    """Configura el root logger con un QueueHandler; la escritura ocurre en un hilo aparte"""
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    level = (level or settings.log_level).upper()
+    if json_output is None:
+        json_output = settings.log_format == 'json'
+
+    stream_handler = logging.StreamHandler()
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    return _listener
+
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class LogSampler:
+    """Muestreo por mensaje: deja pasar las primeras `burst` ocurrencias por ventana y luego 1 de cada `every`"""
+
+    def __init__(self, burst: int = 5, every: int = 100, window: float = 60.0):
+        self.burst = burst
+        self.every = every
+        self.window = window
+        self._counters: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def should_log(self, key: str) -> bool:
+        now = time.monotonic()
+
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] > self.window:
+                counter = [now, 0]
+                self._counters[key] = counter
+
+            counter[1] += 1
+            seen = counter[1]
+
+        return seen <= self.burst or (seen - self.burst) % self.every == 0
+
+    def log(self, logger: logging.Logger, level: int, key: str, msg: str, *args, **kwargs):
+        """Registra `msg` solo si la muestra lo permite; el formateo es perezoso"""
+        if logger.isEnabledFor(level) and self.should_log(key):
+            logger.log(level, msg, *args, **kwargs)
+
+
+# Instancia global para loops calientes de scrapers
+log_sampler = LogSampler()
+
+
+class JobLogSummary:
+    """Acumula contadores de un job y emite un único registro resumen al terminar"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started = time.monotonic()
+        self.counters: Dict[str, int] = {}
+
+    def add(self, **counts: int):
+        for key, value in counts.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def emit(self, logger: logging.Logger, status: str):
+        logger.info(
+            "📊 Resumen job %s: %s",
+            self.job_id,
+            status,
+            extra={
+                'job_id': self.job_id,
+                'status': status,
+                'duration_s': round(time.monotonic() - self.started, 3),
+                **self.counters
+            }
+        )
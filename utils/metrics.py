@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+Métricas Prometheus para localizar cuellos de botella del scraper
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets de latencia: desde milisegundos (DB, parseo) hasta timeouts HTTP completos
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+FETCH_LATENCY = Histogram(
+    'scraper_fetch_seconds',
+    'Latencia de descarga de páginas por fuente y host',
+    ['source', 'host'],
+    buckets=LATENCY_BUCKETS
+)
+
+FETCH_RETRIES = Counter(
+    'scraper_fetch_retries_total',
+    'Reintentos de descarga por fuente',
+    ['source']
+)
+
+PARSE_TIME = Histogram(
+    'scraper_parse_seconds',
+    'Tiempo de parseo y extracción por página',
+    ['source'],
+    buckets=LATENCY_BUCKETS
+)
+
+LEADS_PER_PAGE = Histogram(
+    'scraper_leads_per_page',
+    'Leads extraídos por página',
+    ['source'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+)
+
+PROCESSOR_STAGE_DURATION = Histogram(
+    'lead_processor_stage_seconds',
+    'Duración de cada etapa de LeadProcessor',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+DB_QUERY_DURATION = Histogram(
+    'db_query_seconds',
+    'Duración de operaciones de JobDatabase',
+    ['operation'],
+    buckets=LATENCY_BUCKETS
+)
+
+INTEGRATION_LATENCY = Histogram(
+    'integration_delivery_seconds',
+    'Latencia de entrega a integraciones externas',
+    ['integration', 'operation'],
+    buckets=LATENCY_BUCKETS
+)
+
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds',
+    'Retraso del event loop respecto al intervalo programado',
+    buckets=LATENCY_BUCKETS
+)
+
+SINGLE_FLIGHT = Counter(
+    'scraper_single_flight_total',
+    'Unidades de scraping por fuente: ejecutadas (leader), compartidas en curso (shared) o memorizadas (memo)',
+    ['source', 'result']
+)
+
+CALLBACK_DELIVERIES = Counter(
+    'job_callback_deliveries_total',
+    'Entregas de callbacks de jobs por evento y resultado (delivered, retry, failed, dropped)',
+    ['event', 'result']
+)
+
+ENRICHMENT_RESULTS = Counter(
+    'website_enrichment_total',
+    'Dominios procesados por el enriquecimiento web por resultado',
+    ['result']
+)
+
+HOST_REQUEST_RATE = Gauge(
+    'scraper_host_request_rate',
+    'Tasa permitida actual (req/s) por host según el rate limiter adaptativo',
+    ['host']
+)
+
+JOBS_QUEUED = Gauge(
+    'scraping_jobs_queued',
+    'Jobs creados que aún no empiezan a ejecutarse'
+)
+
+JOBS_RUNNING = Gauge(
+    'scraping_jobs_running',
+    'Jobs de scraping en ejecución'
+)
+
+JOBS_STOPPED = Counter(
+    'scraping_jobs_stopped_total',
+    'Jobs detenidos antes de terminar por razón (cancelled, deadline, timeout, max_requests, max_leads)',
+    ['reason']
+)
+
+
+@contextmanager
+def track_time(histogram: Histogram, **labels):
+    """Mide el bloque con el histograma indicado"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorador que mide funciones síncronas y asíncronas"""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_time(histogram, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_time(histogram, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+async def monitor_event_loop_lag(interval: float = 0.1):
+    """Mide cuánto tarda el loop en despertar respecto a lo programado (bloqueos síncronos)"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serializa el registro en formato de exposición Prometheus"""
+    return generate_latest(), CONTENT_TYPE_LATEST
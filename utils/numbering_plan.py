@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Numbering Plan
+Índice local del plan de numeración mexicano: rango de números → NIR, ciudad y tipo de línea
+
+Los rangos se guardan ordenados en arrays paralelos (inicio, fin, registro) y se
+buscan con bisect, sin red y en microsegundos. Hay dos fuentes posibles:
+
+- utils/numbering_plan_mx.csv (incluido): un rango por NIR (lada) con su ciudad.
+  No trae tipo de línea y no cubre todas las ladas, así que no sirve para rechazar
+  números de ladas que no conoce.
+- El CSV público del IFT (NUMBERING_PLAN_PATH), con columnas NIR, SERIE,
+  NUMERACION_INICIAL, NUMERACION_FINAL, POBLACION, ESTADO y TIPO_RED: rangos por
+  bloque con tipo fijo/móvil. Este sí cubre todo el plan y se usa para validar.
+"""
+
+import csv
+import logging
+import os
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_PLAN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'numbering_plan_mx.csv')
+NATIONAL_DIGITS = 10
+LINE_TYPES = {'FIJO': 'fijo', 'MOVIL': 'movil', 'MÓVIL': 'movil'}
+LOWERCASE_WORDS = {'de', 'del', 'la', 'las', 'los', 'y'}
+
+
+class PhoneInfo(NamedTuple):
+    nir: str
+    city: Optional[str]
+    state: Optional[str]
+    line_type: Optional[str]
+
+
+class NumberingPlan:
+    """Rangos [inicio, fin] de números nacionales de 10 dígitos, sin traslapes"""
+
+    def __init__(self, ranges: Iterable[Tuple[int, int, PhoneInfo]], complete: bool = False):
+        self.complete = complete
+        self.starts = array('Q')
+        self.ends = array('Q')
+        self.info_ids = array('I')
+        self.infos: List[PhoneInfo] = []
+
+        info_ids: Dict[PhoneInfo, int] = {}
+        for start, end, info in sorted(ranges):
+            info_id = info_ids.setdefault(info, len(info_ids))
+            if info_id == len(self.infos):
+                self.infos.append(info)
+            # Bloques contiguos con los mismos datos se funden en un solo rango
+            if self.starts and self.info_ids[-1] == info_id and self.ends[-1] + 1 >= start:
+                self.ends[-1] = max(self.ends[-1], end)
+                continue
+            self.starts.append(start)
+            self.ends.append(end)
+            self.info_ids.append(info_id)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, national: str) -> Optional[PhoneInfo]:
+        """Datos del rango que contiene el número nacional (10 dígitos)"""
+        number = int(national)
+        index = bisect_right(self.starts, number) - 1
+        if index >= 0 and number <= self.ends[index]:
+            return self.infos[self.info_ids[index]]
+        return None
+
+    @classmethod
+    def from_nir_csv(cls, path: str) -> 'NumberingPlan':
+        """Un rango por NIR: columnas nir, ciudad, estado, tipo"""
+        ranges = []
+        for row in _read_csv(path):
+            nir = row['nir'].strip()
+            span = 10 ** (NATIONAL_DIGITS - len(nir))
+            start = int(nir) * span
+            ranges.append((start, start + span - 1, PhoneInfo(
+                nir, row.get('ciudad') or None, row.get('estado') or None, row.get('tipo') or None
+            )))
+        return cls(ranges, complete=False)
+
+    @classmethod
+    def from_ift_csv(cls, path: str) -> 'NumberingPlan':
+        """Plan completo del IFT: un rango por bloque NIR + SERIE + numeración"""
+        ranges = []
+        for row in _read_csv(path):
+            try:
+                nir, serie = row['NIR'].strip(), row['SERIE'].strip()
+                prefix = int(nir + serie) * 10_000
+                info = PhoneInfo(
+                    nir,
+                    _title(row.get('POBLACION')),
+                    _title(row.get('ESTADO')),
+                    LINE_TYPES.get((row.get('TIPO_RED') or '').strip().upper())
+                )
+                ranges.append((prefix + int(row['NUMERACION_INICIAL']), prefix + int(row['NUMERACION_FINAL']), info))
+            except (KeyError, ValueError):
+                continue
+        return cls(ranges, complete=True)
+
+
+def _title(value: Optional[str]) -> Optional[str]:
+    """QUERÉTARO DE ARTEAGA → Querétaro de Arteaga (el IFT publica todo en mayúsculas)"""
+    words = (value or '').strip().lower().split()
+    return ' '.join(
+        word if index and word in LOWERCASE_WORDS else word.capitalize()
+        for index, word in enumerate(words)
+    ) or None
+
+
+def _read_csv(path: str) -> List[Dict[str, str]]:
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            return list(csv.DictReader(f))
+    except UnicodeDecodeError:
+        # El archivo del IFT se publica en Latin-1
+        with open(path, encoding='latin-1', newline='') as f:
+            return list(csv.DictReader(f))
+
+
+@lru_cache(maxsize=None)
+def load_numbering_plan(path: str = '') -> NumberingPlan:
+    """Plan del IFT si se configuró uno; si no (o no se puede leer), el plan por NIR incluido"""
+    if path:
+        try:
+            plan = NumberingPlan.from_ift_csv(path)
+            if len(plan):
+                logger.info("📇 Plan de numeración IFT cargado: %d rangos", len(plan))
+                return plan
+            logger.warning(f"⚠️ Plan de numeración sin rangos válidos: {path}")
+        except OSError as e:
+            logger.error(f"❌ No se pudo leer el plan de numeración {path}: {e}")
+
+    return NumberingPlan.from_nir_csv(BUNDLED_PLAN_PATH)
+
+
+# Instancia global
+numbering_plan = load_numbering_plan(settings.numbering_plan_path)
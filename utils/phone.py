@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Phone Engine
+Detección y normalización de teléfonos mexicanos, compartida por scrapers y procesador
+
+- find_phone       primer teléfono de un texto (ignora números pegados a direcciones)
+- normalize_phone  E.164 (+52 + 10 dígitos) o None si no es un número válido
+- format_phone     formato de presentación: (55)1234-5678 / (442)123-4567
+- phone_key        10 dígitos nacionales, para deduplicar
+- phone_info       lada, ciudad y tipo de línea según el plan de numeración
+
+Desde 2019 todos los números nacionales tienen 10 dígitos; los prefijos viejos
+(01 larga distancia, 044/045 celular, 1 después de +52) se descartan. Los
+resultados se memorizan: las mismas cadenas se repiten entre páginas y fuentes.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+from utils.numbering_plan import PhoneInfo, numbering_plan
+
+# Una sola pasada: la primera alternativa que coincide más a la izquierda. El lookahead
+# inicial deja que el motor salte directo a los caracteres con que puede empezar un número.
+PHONE_PATTERN = re.compile(r'''
+    (?=[+(\d])
+    (?:
+        (?P<international>\+52[-\s]?(?:1[-\s]?)?(?:\(\d{2,3}\)|\d{2,3})[-\s]?\d{3,4}[-\s]?\d{4})
+      | (?P<parenthesized>\(\d{2,3}\)\s*\d{3,4}[-\s]?\d{4})
+      | (?P<separated>\d{2,3}[-\s]\d{3,4}[-\s]\d{4})
+      | (?P<compact>\b\d{10}\b)
+    )
+''', re.VERBOSE)
+ADDRESS_CONTEXT = re.compile(r'MZ|LT|NO\.|NUM\.|C\.P\.|CALLE|AV\.', re.IGNORECASE)
+NON_DIGITS = re.compile(r'\D')
+
+COUNTRY_CODE = '52'
+# Lada de 2 dígitos (CDMX, Guadalajara, Monterrey); el resto usa 3. Solo se usa
+# para números que no están en el plan de numeración cargado.
+TWO_DIGIT_AREA_CODES = frozenset({'55', '56', '33', '81'})
+TRUNK_PREFIXES = ('044', '045')
+
+
+@lru_cache(maxsize=16384)
+def phone_key(raw: str) -> Optional[str]:
+    """Los 10 dígitos nacionales del número, o None si no es un teléfono mexicano válido"""
+    if not raw:
+        return None
+    digits = NON_DIGITS.sub('', raw)
+
+    if len(digits) in (12, 13) and digits.startswith(COUNTRY_CODE):
+        digits = digits[2:]
+        if len(digits) == 11 and digits[0] == '1':
+            digits = digits[1:]
+    elif len(digits) == 12 and digits.startswith('01'):
+        digits = digits[2:]
+    elif len(digits) == 13 and digits.startswith(TRUNK_PREFIXES):
+        digits = digits[3:]
+
+    if len(digits) != 10 or digits[0] in '01':
+        return None
+    # Con el plan completo del IFT se rechazan números fuera de rangos asignados
+    if numbering_plan.complete and numbering_plan.lookup(digits) is None:
+        return None
+    return digits
+
+
+@lru_cache(maxsize=16384)
+def phone_info(raw: str) -> Optional[PhoneInfo]:
+    """Lada, ciudad, estado y tipo de línea (fijo/movil) del número, si el plan lo conoce"""
+    national = phone_key(raw)
+    return numbering_plan.lookup(national) if national else None
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """Número en E.164 (+525512345678)"""
+    national = phone_key(raw)
+    return f"+{COUNTRY_CODE}{national}" if national else None
+
+
+@lru_cache(maxsize=16384)
+def format_phone(raw: str) -> Optional[str]:
+    """Número para mostrar según la longitud de la lada: (55)1234-5678 o (442)123-4567"""
+    national = phone_key(raw)
+    if not national:
+        return None
+    info = numbering_plan.lookup(national)
+    nir_length = len(info.nir) if info else (2 if national[:2] in TWO_DIGIT_AREA_CODES else 3)
+    if nir_length == 2:
+        return f"({national[:2]}){national[2:6]}-{national[6:]}"
+    return f"({national[:3]}){national[3:6]}-{national[6:]}"
+
+
+@lru_cache(maxsize=8192)
+def find_phone(text: str) -> Optional[str]:
+    """Primer teléfono válido del texto que no esté pegado a una dirección, ya formateado"""
+    for match in PHONE_PATTERN.finditer(text):
+        start, end = match.span()
+        if ADDRESS_CONTEXT.search(text, max(0, start - 15), end + 15):
+            continue
+        phone = format_phone(match.group())
+        if phone:
+            return phone
+    return None
+
+
+def clear_phone_caches():
+    for cached in (phone_key, phone_info, format_phone, find_phone):
+        cached.cache_clear()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Profiling Module
+Perfil de CPU por muestreo + spans de tiempo real por job (opt-in)
+
+El muestreo lee la pila del hilo del event loop, que comparten todos los jobs.
+Para que el perfil sea solo del job, cada tarea asyncio queda asociada al
+profiler del job que la creó, y solo se cuentan las muestras tomadas mientras
+corre una tarea del job. Las del loop ocioso o de otros jobs se descartan
+(`samples_dropped`). El trabajo compartido entre jobs (utils.single_flight)
+cuenta para el job que lo inició, tanto en muestras (su tarea se crea desde ese
+job) como en spans (corre con el profiler de ese job en su contexto); los jobs
+que solo lo esperan no lo ven. Lo que corre en hilos (`asyncio.to_thread`) no
+se muestrea, aunque sí queda dentro de los spans.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+_current_profiler: ContextVar[Optional['JobProfiler']] = ContextVar('current_profiler', default=None)
+# Tarea asyncio → profiler del job que la creó
+_task_profilers: 'WeakKeyDictionary[asyncio.Task, JobProfiler]' = WeakKeyDictionary()
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop):
+    """Envuelve la task factory del loop para asociar cada tarea nueva al profiler de su contexto"""
+    previous = loop.get_task_factory()
+    if getattr(previous, '_job_profiler', False):
+        return
+
+    def factory(loop, coro, **kwargs):
+        if previous is None:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        else:
+            task = previous(loop, coro, **kwargs)
+        # El contexto de quien la crea, aunque la tarea corra en otro (utils.single_flight)
+        profiler = _current_profiler.get()
+        if profiler is not None:
+            _task_profilers[task] = profiler
+        return task
+
+    factory._job_profiler = True
+    loop.set_task_factory(factory)
+
+
+class JobProfiler:
+    """Muestrea la pila del hilo del event loop y registra spans fetch/parse/extract/process/persist"""
+
+    def __init__(self, job_id: str, interval: float = 0.005, max_samples: int = 200000):
+        self.job_id = job_id
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples: Counter = Counter()
+        self.samples_dropped = 0
+        self.spans: List[Dict] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._target_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._token = None
+
+    def start(self):
+        """Desde la tarea del job, dentro del event loop"""
+        self._loop = asyncio.get_running_loop()
+        _install_task_factory(self._loop)
+        self._task = asyncio.current_task()
+        if self._task is not None:
+            _task_profilers[self._task] = self
+        self._target_thread = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._token = _current_profiler.set(self)
+        self._thread = threading.Thread(target=self._sample_loop, name=f"profiler-{self.job_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._token is not None:
+            _current_profiler.reset(self._token)
+            self._token = None
+        # La tarea del job puede seguir corriendo otras cosas (p. ej. otra BackgroundTask)
+        if self._task is not None and _task_profilers.get(self._task) is self:
+            del _task_profilers[self._task]
+        self._task = None
+
+    def _sample_loop(self):
+        total = 0
+        while not self._stop.wait(self.interval) and total < self.max_samples:
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop)
+            if task is None or _task_profilers.get(task) is not self:
+                # Loop ocioso u otra tarea: no es tiempo de este job
+                self.samples_dropped += 1
+                continue
+            self.samples[self._collapse(frame)] += 1
+            total += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """Convierte un frame en una pila colapsada raíz;...;hoja"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.spans.append({
+                'name': name,
+                'start_ms': round((start - self._started_at) * 1000, 3),
+                'duration_ms': round((end - start) * 1000, 3),
+                **attrs
+            })
+
+    def to_dict(self) -> Dict:
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span['name']] = totals.get(span['name'], 0.0) + span['duration_ms']
+
+        return {
+            'job_id': self.job_id,
+            'interval_ms': self.interval * 1000,
+            'wall_ms': round((time.perf_counter() - self._started_at) * 1000, 3),
+            'span_totals_ms': {name: round(total, 3) for name, total in totals.items()},
+            'spans': self.spans,
+            'samples': dict(self.samples),
+            'samples_dropped': self.samples_dropped
+        }
+
+
+@contextmanager
+def profile_span(name: str, **attrs):
+    """Span del job actual; no hace nada si el job no se está perfilando"""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield
+        return
+
+    with profiler.span(name, **attrs):
+        yield
+
+
+def to_collapsed(profile: Dict, view: str = 'cpu') -> str:
+    """Formato de pilas colapsadas (flamegraph.pl, speedscope, inferno)
+
+    view='cpu' emite las muestras de CPU; view='spans' emite los spans de
+    tiempo real como `job;<nombre>` con su duración en milisegundos como peso.
+    """
+    if view == 'spans':
+        lines = [
+            f"job;{name} {max(1, int(round(total_ms)))}"
+            for name, total_ms in profile.get('span_totals_ms', {}).items()
+        ]
+    else:
+        lines = [f"{stack} {count}" for stack, count in profile.get('samples', {}).items()]
+
+    return '\n'.join(lines) + '\n'
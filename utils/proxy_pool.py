@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Proxy Pool
+Identidades de salida (proxy + user-agent + sesión) con score de salud
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Settings, settings
+
+try:
+    from fake_useragent import UserAgent
+except ImportError:
+    UserAgent = None
+
+logger = logging.getLogger(__name__)
+
+# Status que indican que el sitio bloqueó a esta identidad
+BLOCK_STATUSES = {403, 429}
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+FALLBACK_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+]
+
+
+def _user_agent_source():
+    if UserAgent is not None:
+        try:
+            ua = UserAgent(browsers=['chrome', 'firefox', 'edge', 'safari'])
+            return lambda: ua.random
+        except Exception as e:
+            logger.warning(f"fake-useragent no disponible, usando lista fija: {e}")
+    return lambda: random.choice(FALLBACK_USER_AGENTS)
+
+
+class Identity:
+    """Un punto de salida: proxy opcional, user-agent y sesión propia (cookies pegadas al proxy)"""
+
+    def __init__(self, name: str, proxy: Optional[str], user_agent: str, pool_size: int = 10):
+        self.name = name
+        self.proxy = proxy
+        self.user_agent = user_agent
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers['User-Agent'] = user_agent
+        if proxy:
+            self.session.proxies.update({'http': proxy, 'https': proxy})
+
+        self.requests = 0
+        self.blocks = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.in_flight = 0
+        self.evicted_until = 0.0
+
+    @property
+    def lane(self) -> Optional[str]:
+        """Clave para que el rate limiter lleve un bucket por (host, proxy)"""
+        return self.name if self.proxy else None
+
+    def block_rate(self) -> float:
+        return (self.blocks + self.errors) / self.requests if self.requests else 0.0
+
+    def score(self) -> float:
+        """Menor es mejor: latencia penalizada por bloqueos y por carga actual"""
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        return latency * (1 + 5 * self.block_rate()) * (1 + self.in_flight)
+
+    def reset_stats(self):
+        self.requests = self.blocks = self.errors = self.consecutive_failures = 0
+        self.latency_ewma = None
+
+
+class ProxyPool:
+    """Reparte descargas entre identidades y expulsa temporalmente las que se bloquean"""
+
+    def __init__(
+        self,
+        proxies: List[str],
+        rotate_user_agents: bool = True,
+        direct_identities: int = 3,
+        pool_size: int = 10,
+        min_samples: int = 10,
+        max_block_rate: float = 0.3,
+        max_consecutive_failures: int = 3,
+        eviction_cooldown: float = 600.0
+    ):
+        self.min_samples = min_samples
+        self.max_block_rate = max_block_rate
+        self.max_consecutive_failures = max_consecutive_failures
+        self.eviction_cooldown = eviction_cooldown
+        self._lock = threading.Lock()
+
+        next_user_agent = _user_agent_source() if rotate_user_agents else (lambda: FALLBACK_USER_AGENTS[0])
+
+        if proxies:
+            self.identities = [
+                Identity(f"proxy-{i}-{urlparse(proxy).hostname}", proxy, next_user_agent(), pool_size)
+                for i, proxy in enumerate(proxies)
+            ]
+        else:
+            count = direct_identities if rotate_user_agents else 1
+            self.identities = [Identity(f"direct-{i}", None, next_user_agent(), pool_size) for i in range(count)]
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> 'ProxyPool':
+        return cls(
+            config.proxy_list if config.use_proxies else [],
+            rotate_user_agents=config.rotating_user_agents,
+            direct_identities=config.direct_identities,
+            pool_size=config.http_pool_size
+        )
+
+    def acquire(self) -> Identity:
+        """Elige entre dos identidades sanas al azar la de mejor score (power of two choices)"""
+        with self._lock:
+            now = time.monotonic()
+            healthy = [identity for identity in self.identities if identity.evicted_until <= now]
+
+            if not healthy:
+                # Todas expulsadas: usar la que vuelve antes en lugar de detener el scraping
+                healthy = [min(self.identities, key=lambda identity: identity.evicted_until)]
+
+            candidates = random.sample(healthy, k=min(2, len(healthy)))
+            identity = min(candidates, key=lambda candidate: candidate.score())
+            identity.in_flight += 1
+            return identity
+
+    def abandon(self, identity: Identity):
+        """Libera una identidad sin registrar resultado (descarga cancelada antes de terminar)"""
+        with self._lock:
+            identity.in_flight = max(0, identity.in_flight - 1)
+
+    def release(self, identity: Identity, status: Optional[int], latency: float):
+        """Registra el resultado (status None = error de red) y expulsa la identidad si se degradó"""
+        with self._lock:
+            identity.in_flight = max(0, identity.in_flight - 1)
+            identity.requests += 1
+            identity.latency_ewma = latency if identity.latency_ewma is None else 0.8 * identity.latency_ewma + 0.2 * latency
+
+            if status is None:
+                identity.errors += 1
+                identity.consecutive_failures += 1
+            elif status in BLOCK_STATUSES:
+                identity.blocks += 1
+                identity.consecutive_failures += 1
+            else:
+                identity.consecutive_failures = 0
+
+            degraded = (
+                identity.consecutive_failures >= self.max_consecutive_failures
+                or (identity.requests >= self.min_samples and identity.block_rate() > self.max_block_rate)
+            )
+            if degraded and len(self.identities) > 1:
+                identity.evicted_until = time.monotonic() + self.eviction_cooldown
+                identity.reset_stats()
+                logger.warning(f"🚫 Identidad {identity.name} expulsada por {self.eviction_cooldown:.0f}s")
+
+    def snapshot(self) -> List[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'name': identity.name,
+                    'proxy': bool(identity.proxy),
+                    'requests': identity.requests,
+                    'block_rate': round(identity.block_rate(), 3),
+                    'latency_ewma_s': round(identity.latency_ewma, 3) if identity.latency_ewma is not None else None,
+                    'in_flight': identity.in_flight,
+                    'evicted_for_s': round(max(0.0, identity.evicted_until - now), 1)
+                }
+                for identity in self.identities
+            ]
+
+
+# Instancia global (USE_PROXIES, PROXY_LIST, ROTATING_USER_AGENTS)
+proxy_pool = ProxyPool.from_settings(settings)
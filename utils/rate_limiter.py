@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Token buckets por host con ajuste AIMD según latencia, 429 y 5xx
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import Settings, settings
+from utils.metrics import HOST_REQUEST_RATE
+
+logger = logging.getLogger(__name__)
+
+# Respuestas que indican que el host pide bajar el ritmo
+THROTTLE_STATUSES = {429, 503}
+
+
+class HostBucket:
+    """Estado de pacing de un host"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.latency_ewma: Optional[float] = None
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    """Scheduler de cortesía compartido por todos los jobs y scrapers
+
+    Cada host tiene un token bucket. Las respuestas rápidas y exitosas suben la
+    tasa de forma aditiva; 429/503, 5xx, errores de red o latencia muy por
+    encima del objetivo la reducen multiplicativamente (AIMD).
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 0.5,
+        min_rate: float = 0.05,
+        max_rate: float = 5.0,
+        burst: float = 2.0,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        latency_target: float = 2.0,
+        exempt_hosts: Optional[List[str]] = None
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.exempt_hosts = set(exempt_hosts or [])
+        self.buckets: Dict[str, HostBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> 'HostRateLimiter':
+        return cls(
+            initial_rate=1 / config.rate_limit_delay,
+            min_rate=config.rate_limit_min_rate,
+            max_rate=config.rate_limit_max_rate,
+            burst=config.rate_limit_burst,
+            exempt_hosts=config.rate_limit_exempt_hosts
+        )
+
+    @staticmethod
+    def host_for(url_or_host: str) -> str:
+        return urlparse(url_or_host).netloc or url_or_host
+
+    def _bucket(self, host: str) -> HostBucket:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = HostBucket(self.initial_rate, self.burst)
+            self.buckets[host] = bucket
+            HOST_REQUEST_RATE.labels(host=host).set(bucket.rate)
+        return bucket
+
+    def reserve(self, url_or_host: str, lane: Optional[str] = None) -> float:
+        """Reserva un token y devuelve cuántos segundos esperar antes de usarlo
+
+        `lane` separa buckets del mismo host (p. ej. uno por proxy de salida).
+        """
+        host = self.host_for(url_or_host)
+        if host in self.exempt_hosts:
+            return 0.0
+
+        with self._lock:
+            bucket = self._bucket(f"{host}|{lane}" if lane else host)
+            now = time.monotonic()
+            bucket.refill(now)
+            bucket.tokens -= 1
+            wait = max(0.0, -bucket.tokens / bucket.rate) if bucket.tokens < 0 else 0.0
+            return max(wait, bucket.blocked_until - now)
+
+    async def acquire(self, url_or_host: str, lane: Optional[str] = None):
+        wait = self.reserve(url_or_host, lane)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(
+        self,
+        url_or_host: str,
+        status: Optional[int] = None,
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        lane: Optional[str] = None
+    ):
+        """Ajusta la tasa del host con el resultado de una petición (status None = error de red)"""
+        host = self.host_for(url_or_host)
+        if host in self.exempt_hosts:
+            return
+
+        with self._lock:
+            host = f"{host}|{lane}" if lane else host
+            bucket = self._bucket(host)
+
+            if latency is not None:
+                bucket.latency_ewma = latency if bucket.latency_ewma is None else 0.8 * bucket.latency_ewma + 0.2 * latency
+
+            throttled = status is None or status in THROTTLE_STATUSES or status >= 500
+            slow = bucket.latency_ewma is not None and bucket.latency_ewma > 2 * self.latency_target
+
+            if throttled or slow:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+                if retry_after:
+                    bucket.blocked_until = time.monotonic() + retry_after
+                logger.debug("🐢 %s: tasa reducida a %.3f req/s (status=%s)", host, bucket.rate, status)
+            elif status < 400 and (bucket.latency_ewma is None or bucket.latency_ewma <= self.latency_target):
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase_step)
+
+            HOST_REQUEST_RATE.labels(host=host).set(bucket.rate)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(bucket.rate, 3),
+                    'latency_ewma_s': round(bucket.latency_ewma, 3) if bucket.latency_ewma is not None else None,
+                    'blocked_for_s': round(max(0.0, bucket.blocked_until - time.monotonic()), 1)
+                }
+                for host, bucket in self.buckets.items()
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos (se ignora el formato de fecha HTTP)"""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# Instancia global compartida; RATE_LIMIT_DELAY es el intervalo inicial entre peticiones a un host
+rate_limiter = HostRateLimiter.from_settings(settings)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Serialization Module
+JSON rápido (orjson si está instalado, si no json estándar) para DB y respuestas
+
+`dumps` siempre devuelve bytes UTF-8 compactos, listos para guardarse tal cual
+y para devolverse como cuerpo de una respuesta sin volver a codificar.
+"""
+
+import json
+from typing import Any, Iterable, Iterator, Union
+
+from utils.lead import lead_json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def dumps(obj: Any) -> bytes:
+    """Objeto (incluye Lead) → JSON en bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=lead_json_default)
+    return json.dumps(obj, default=lead_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """JSON en bytes o str (filas guardadas antes de este formato) → objeto"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RawJSON:
+    """JSON ya serializado que se copia tal cual al construir una respuesta"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Union[bytes, str]):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+
+def join_object(**fields: Union[Any, RawJSON]) -> bytes:
+    """Arma un objeto JSON insertando los RawJSON sin decodificarlos"""
+    parts = []
+    for key, value in fields.items():
+        encoded = value.data if isinstance(value, RawJSON) else dumps(value)
+        parts.append(dumps(key) + b':' + encoded)
+    return b'{' + b','.join(parts) + b'}'
+
+
+def iter_object(stream_key: str, stream: Iterable[bytes], **fields: Any) -> Iterator[bytes]:
+    """Como join_object, pero el valor de `stream_key` se emite por bloques (va al final)"""
+    head = join_object(**fields)
+    yield head[:-1] + (b',' if fields else b'') + dumps(stream_key) + b':'
+    yield from stream
+    yield b'}'
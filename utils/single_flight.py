@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Single Flight
+Trabajo de scraping compartido entre jobs concurrentes
+
+Una unidad de trabajo (fuente, categoría, ubicación, página) se descarga y
+parsea una sola vez aunque varios jobs la pidan al mismo tiempo: el primero la
+ejecuta y los demás esperan su resultado. Al terminar, el resultado queda
+memorizado `scrape_memo_ttl` segundos. Los errores no se memorizan.
+
+El resultado es el mismo objeto para todos: quien lo vaya a modificar debe
+copiarlo. La tarea compartida sigue viva mientras alguien la espere; si todos
+los que esperaban se cancelan, se cancela también.
+
+La tarea compartida corre sin el job que la pidió (job_control.detached_context):
+sus requests no se cobran a ningún job y la parada de uno no afecta a los
+demás. Cada job que se suma a una unidad no memorizada paga un request de su
+presupuesto, sea quien la ejecute o quien la comparta. El resto del contexto se
+conserva: si el job que la inicia se está perfilando, sus spans quedan en su
+perfil.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from config import settings
+from utils.cache import TTLCache
+from utils.job_control import charge_request, detached_context
+from utils.metrics import SINGLE_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters', 'abandoned')
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.abandoned = False
+
+
+class SingleFlight:
+    """Coalesce llamadas concurrentes con la misma clave y memoriza el resultado con TTL"""
+
+    def __init__(self, ttl: float, max_size: int = 5000):
+        self.memo = TTLCache(ttl=ttl, max_size=max_size)
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """Resultado de `work()` para `key`: memorizado, en curso o ejecutándolo ahora"""
+        source = str(key[0]) if isinstance(key, tuple) and key else 'otros'
+
+        if self.memo.ttl > 0:
+            result = self.memo.get(key, _MISSING)
+            if result is not _MISSING:
+                SINGLE_FLIGHT.labels(source=source, result='memo').inc()
+                return result
+
+        # Puede lanzar BudgetExceeded: solo para este job, antes de sumarse
+        charge_request()
+
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is None or flight.abandoned or flight.task.get_loop() is not loop:
+            flight = _Flight()
+            flight.task = loop.create_task(self._run(key, flight, work), context=detached_context())
+            self._flights[key] = flight
+            SINGLE_FLIGHT.labels(source=source, result='leader').inc()
+        else:
+            SINGLE_FLIGHT.labels(source=source, result='shared').inc()
+            logger.debug("🔗 Compartiendo trabajo en curso: %s", key)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.abandoned = True
+                flight.task.cancel()
+
+    async def _run(self, key: Hashable, flight: _Flight, work: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await work()
+            if self.memo.ttl > 0:
+                self.memo.set(key, result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def clear(self):
+        self.memo.clear()
+
+
+# Instancia global
+scrape_flights = SingleFlight(ttl=settings.scrape_memo_ttl)
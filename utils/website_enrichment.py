@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Website Enrichment
+Emails y redes sociales reales a partir del sitio web de cada lead
+
+Por dominio se descarga la página principal y hasta `enrichment_max_pages - 1`
+páginas de contacto enlazadas desde ella, en paralelo con un límite global y
+otro por dominio. El resultado (aunque venga vacío) queda en un cache por
+dominio con TTL, así que volver a enriquecer el mismo negocio no toca la red.
+Estas descargas no pasan por el rate limiter por host: cada negocio dejaría un
+bucket y una serie de métricas para siempre, y la cortesía ya la dan esos
+límites de concurrencia.
+
+Las URLs salen de listados de terceros: cada una (y cada redirect, que se
+siguen a mano) debe resolver a una IP pública (http_client.check_public_url).
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from config import Settings, settings
+from utils.cache import TTLCache
+from utils.http_client import CircuitOpenError, FetchError, UnsafeURLError, check_public_url, fetcher
+from utils.metrics import ENRICHMENT_RESULTS
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}')
+# Archivos tipo logo@2x.png y dominios de proveedores que aparecen en el HTML sin ser contacto
+EMAIL_JUNK = re.compile(r'\.(?:png|jpe?g|gif|svg|webp|css|js)$|@(?:example\.|sentry|wixpress\.com|domain\.com)', re.IGNORECASE)
+CONTACT_LINK = re.compile(r'contact|contacto|nosotros|about|ubicacion|sucursal', re.IGNORECASE)
+
+SOCIAL_PATTERNS = {
+    'facebook': re.compile(r'(?:^|[/.])facebook\.com/(?!sharer|share|plugins|tr\b|dialog)([A-Za-z0-9.\-]+)', re.IGNORECASE),
+    'instagram': re.compile(r'(?:^|[/.])instagram\.com/(?!p/|explore)([A-Za-z0-9._]+)', re.IGNORECASE),
+    'twitter': re.compile(r'(?:^|[/.])(?:twitter|x)\.com/(?!intent|share|home)([A-Za-z0-9_]+)', re.IGNORECASE),
+    'linkedin': re.compile(r'(?:^|[/.])linkedin\.com/(?:company|in)/([A-Za-z0-9\-_%]+)', re.IGNORECASE),
+    'tiktok': re.compile(r'(?:^|[/.])tiktok\.com/@([A-Za-z0-9._]+)', re.IGNORECASE),
+    'whatsapp': re.compile(r'(?:wa\.me/|api\.whatsapp\.com/send\?phone=)(\d{10,13})', re.IGNORECASE),
+}
+
+# Sitios que no son del negocio: no tiene caso rastrearlos
+SKIP_DOMAINS = (
+    'mercadolibre.com', 'mercadolibre.com.mx', 'seccionamarilla.com.mx', 'google.com', 'goo.gl',
+    'facebook.com', 'instagram.com', 'twitter.com', 'x.com', 'linkedin.com', 'tiktok.com', 'wa.me'
+)
+
+# Un dominio que falló se reintenta antes que uno que respondió
+FAILED_DOMAIN_TTL = 900.0
+# Redirects que se siguen (validando cada destino) por página
+MAX_REDIRECTS = 5
+
+# Instancia global: dominio → {'emails': [...], 'social': {...}}
+domain_cache = TTLCache(ttl=settings.enrichment_cache_ttl, max_size=50000)
+
+
+def _domain(url: str) -> Optional[str]:
+    if '://' not in url:
+        url = f"http://{url}"
+    host = urlparse(url).netloc.lower().split('@')[-1].split(':')[0]
+    return host[4:] if host.startswith('www.') else host or None
+
+
+def _is_skipped(domain: str) -> bool:
+    return any(domain == skipped or domain.endswith('.' + skipped) for skipped in SKIP_DOMAINS)
+
+
+def extract_contacts(html: str, base_url: str, domain: str) -> Dict[str, Any]:
+    """Emails (los del propio dominio primero), redes sociales y enlaces a páginas de contacto"""
+    soup = BeautifulSoup(html, 'html.parser')
+    emails: Dict[str, None] = {}
+    social: Dict[str, str] = {}
+    contact_pages: Dict[str, None] = {}
+
+    for link in soup.find_all('a', href=True):
+        href = link['href'].strip()
+        if href.lower().startswith('mailto:'):
+            address = href[7:].split('?')[0].strip()
+            if EMAIL_PATTERN.fullmatch(address):
+                emails.setdefault(address.lower())
+            continue
+
+        for network, pattern in SOCIAL_PATTERNS.items():
+            if network not in social:
+                match = pattern.search(href)
+                if match:
+                    social[network] = match.group(1)
+
+        absolute = urljoin(base_url, href)
+        if _domain(absolute) == domain and CONTACT_LINK.search(href + ' ' + link.get_text(' ', strip=True)):
+            contact_pages.setdefault(absolute.split('#')[0])
+
+    for address in EMAIL_PATTERN.findall(soup.get_text(' ')):
+        if not EMAIL_JUNK.search(address):
+            emails.setdefault(address.lower())
+
+    ranked = sorted(emails, key=lambda address: not address.endswith('@' + domain))
+    return {'emails': ranked, 'social': social, 'contact_pages': list(contact_pages)}
+
+
+class WebsiteEnricher:
+    """Enriquecedor de leads con `website`: un rastreo por dominio, compartido entre leads"""
+
+    def __init__(self, config: Optional[Settings] = None, cache: Optional[TTLCache] = None):
+        self.config = config or settings
+        self.cache = cache if cache is not None else domain_cache
+        self.max_pages = max(1, self.config.enrichment_max_pages)
+        self.semaphore = asyncio.Semaphore(self.config.enrichment_concurrency)
+
+    async def enrich(self, leads: List[Any]) -> int:
+        """Completa email y redes de los leads (Lead o dict) en el lugar; devuelve cuántos cambiaron
+
+        Cada dominio se aplica a sus leads en cuanto termina, así que si el job
+        cancela el enriquecimiento por tiempo se conserva lo ya obtenido.
+        """
+        by_domain: Dict[str, List[Any]] = {}
+        for lead in leads:
+            website = lead.get('website')
+            domain = _domain(website) if website else None
+            if domain and not _is_skipped(domain):
+                by_domain.setdefault(domain, []).append(lead)
+
+        if not by_domain:
+            return 0
+
+        enriched = sum(await asyncio.gather(*[
+            self._enrich_domain(domain, domain_leads) for domain, domain_leads in by_domain.items()
+        ]))
+        logger.info("🌐 Enriquecimiento web: %d dominios, %d leads con contacto", len(by_domain), enriched)
+        return enriched
+
+    async def _enrich_domain(self, domain: str, leads: List[Any]) -> int:
+        contacts = await self._contacts_for(domain, leads[0]['website'])
+        if not contacts or not (contacts['emails'] or contacts['social']):
+            return 0
+
+        for lead in leads:
+            if contacts['emails'] and not lead.get('email'):
+                lead['email'] = contacts['emails'][0]
+            if contacts['social']:
+                lead['social'] = dict(contacts['social'])
+        return len(leads)
+
+    async def _contacts_for(self, domain: str, website: str) -> Optional[Dict]:
+        cached = self.cache.get(domain)
+        if cached is not None:
+            ENRICHMENT_RESULTS.labels(result='cache_hit').inc()
+            return cached
+
+        try:
+            contacts = await self._crawl(domain, website)
+        except Exception as e:
+            logger.debug("🌐 %s sin enriquecer: %s", domain, e)
+            ENRICHMENT_RESULTS.labels(result='error').inc()
+            self.cache.set(domain, {'emails': [], 'social': {}}, ttl=FAILED_DOMAIN_TTL)
+            return None
+
+        ENRICHMENT_RESULTS.labels(result='found' if contacts['emails'] or contacts['social'] else 'empty').inc()
+        self.cache.set(domain, contacts)
+        return contacts
+
+    async def _crawl(self, domain: str, website: str) -> Dict:
+        """Página principal y luego sus páginas de contacto, a lo sumo `enrichment_per_domain` a la vez"""
+        home_url = website if '://' in website else f"http://{website}"
+        per_domain = asyncio.Semaphore(self.config.enrichment_per_domain)
+
+        home = await self._fetch(home_url, per_domain)
+        if home is None:
+            raise FetchError(f"{home_url}: sin respuesta")
+        html, home_url = home
+        contacts = extract_contacts(html, home_url, domain)
+
+        pages = contacts.pop('contact_pages')[:self.max_pages - 1]
+        fetched = await asyncio.gather(*[self._fetch(url, per_domain) for url in pages], return_exceptions=True)
+        for page in fetched:
+            if not isinstance(page, tuple):
+                continue
+            html, url = page
+            extra = extract_contacts(html, url, domain)
+            contacts['emails'] += [email for email in extra['emails'] if email not in contacts['emails']]
+            for network, handle in extra['social'].items():
+                contacts['social'].setdefault(network, handle)
+
+        contacts['emails'].sort(key=lambda address: not address.endswith('@' + domain))
+        return contacts
+
+    async def _fetch(self, url: str, per_domain: asyncio.Semaphore) -> Optional[Tuple[str, str]]:
+        """(html, URL final tras redirects) o None"""
+        async with per_domain, self.semaphore:
+            try:
+                for _ in range(MAX_REDIRECTS + 1):
+                    await check_public_url(url)
+                    response = await fetcher.get(
+                        url,
+                        source='websites',
+                        timeout=self.config.enrichment_timeout,
+                        max_retries=0,
+                        use_breaker=False,
+                        pace_hosts=False,
+                        allow_redirects=False
+                    )
+                    if not response.is_redirect:
+                        break
+                    url = urljoin(url, response.headers['Location'])
+                else:
+                    logger.debug("🌐 %s: demasiados redirects", url)
+                    return None
+            except (FetchError, CircuitOpenError, UnsafeURLError, requests.RequestException) as e:
+                # Una página que falla no descarta lo que ya dieron las demás
+                logger.debug("🌐 %s: %s", url, e)
+                return None
+
+        content_type = response.headers.get('Content-Type', 'text/html')
+        if response.status_code != 200 or 'html' not in content_type:
+            return None
+        return response.text, url
+
+
+# Instancia global
+website_enricher = WebsiteEnricher()